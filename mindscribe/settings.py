@@ -51,6 +51,7 @@ INSTALLED_APPS = [
     'django.contrib.messages',
     'django.contrib.staticfiles',
     'minscribe_blog',
+    'mindscribe_ai',
     'rest_framework',
     'rest_framework_simplejwt',
     'rest_framework_simplejwt.token_blacklist',
@@ -189,12 +190,52 @@ MARKDOWNIFY = {
     "default": {
         "WHITELIST_TAGS": [
             'a', 'abbr', 'acronym', 'b', 'blockquote', 'em', 'i', 'li', 'ol', 
-            'p', 'strong', 'ul', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'pre', 'code'
-        ]
+            'p', 'strong', 'ul', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'pre', 'code', 'img'
+        ],
+        "WHITELIST_ATTRS": {
+            'a': ['href', 'title'],
+            'abbr': ['title'],
+            'acronym': ['title'],
+            'code': ['class'],
+            'img': ['src', 'alt', 'title'],
+        },
+        "WHITELIST_PROTOCOLS": ['http', 'https', 'mailto'],
+    }
+}
+
+# Cache configuration
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'mindscribe-default',
     }
 }
 
+# Rendered post articles are keyed by post_id and last_edited, so the
+# timeout only bounds memory use, not staleness.
+POST_RENDER_CACHE_TIMEOUT = 60 * 60
+
+# Post.views increments are buffered in memory and written in bulk. A crash
+# loses at most one flush interval or VIEW_COUNT_MAX_PENDING posts of views.
+VIEW_COUNT_FLUSH_INTERVAL = 5  # seconds
+VIEW_COUNT_MAX_PENDING = 1000
+
+# Like/dislike clicks are atomic column updates. Set POST_COUNTER_BUFFERED to
+# coalesce them in memory per post and flush every POST_COUNTER_FLUSH_INTERVAL.
+POST_COUNTER_BUFFERED = False
+POST_COUNTER_FLUSH_INTERVAL = 1  # seconds
+
+# Poll votes are spread over this many counter rows per choice; results are
+# cached briefly because every read has to sum the shards
+POLL_VOTE_SHARDS = 16
+POLL_RESULTS_CACHE_TIMEOUT = 2  # seconds
+
+# Post versions are stored as diffs, with a full snapshot every N versions;
+# rebuilding a version reads at most this many rows
+VERSION_SNAPSHOT_INTERVAL = 20
+
 WSGI_APPLICATION = 'mindscribe.wsgi.application'
+ASGI_APPLICATION = 'mindscribe.asgi.application'
 
 
 # Database
@@ -266,3 +307,61 @@ STATIC_URL = 'static/'
 # https://docs.djangoproject.com/en/5.1/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+# Live collaborative editing (ws/posts/<post_id>/edit/). Edits are broadcast
+# as they arrive and saved as one version per interval. REALTIME_PUBSUB is the
+# in-process stand-in for a channel layer shared between workers.
+REALTIME_FLUSH_INTERVAL = 2  # seconds
+REALTIME_PUBSUB = 'minscribe_blog.realtime.InProcessPubSub'
+
+# A user's role on a post is cached this long; Collaboration changes clear it
+COLLABORATION_ROLE_CACHE_TIMEOUT = 30  # seconds
+
+# AI service responses are cached in the database by operation, model,
+# content hash and parameters; least recently used entries are evicted
+# beyond AI_RESULT_CACHE_MAX_ENTRIES
+AI_MODEL = 'gpt-3.5-turbo'
+AI_RESULT_CACHE_TIMEOUT = 7 * 24 * 60 * 60  # seconds
+AI_RESULT_CACHE_MAX_ENTRIES = 10000
+
+# Async AI client: one connection pool and concurrency limit per process.
+# Failed calls (timeouts, 429, 5xx) are retried with jittered backoff.
+# Set AI_API_BASE to a run_fake_ai_server URL to work offline.
+AI_API_BASE = os.getenv('AI_API_BASE', 'https://api.openai.com/v1')
+AI_API_KEY = os.getenv('OPENAI_API_KEY')
+AI_MAX_CONCURRENCY = 8
+AI_CONNECTION_POOL_SIZE = 20
+AI_REQUEST_TIMEOUT = 30  # seconds
+AI_MAX_RETRIES = 3
+AI_RETRY_BACKOFF = 0.5  # seconds, doubled per attempt
+
+# Backend used by `manage.py enrich_posts` to fill Post.ai_* fields; the
+# 'local' alias (mindscribe_ai.enrichment.LocalEnrichmentBackend) runs offline
+AI_ENRICHMENT_BACKEND = 'mindscribe_ai.enrichment.AIEnrichmentBackend'
+
+# Local TextRank summaries (`manage.py summarize_posts`) rank at most this many
+# sentences of a post, keeping the cost of very long posts bounded
+SUMMARY_SENTENCE_CAP = 200
+
+# Local lexicon sentiment for posts and comments. Optionally the path of a
+# "word<TAB>weight" file (-3..3) extending the built-in lexicon
+SENTIMENT_LEXICON = None
+
+# Posts and reader interests are hashed into vectors of this many dimensions;
+# `manage.py recommend_posts` stores the top RECOMMENDATIONS_PER_USER posts
+INTEREST_VECTOR_DIM = 256
+RECOMMENDATIONS_PER_USER = 10
+
+# Related-posts ANN index (`manage.py build_ann_index`): memory-mapped files
+# shared by every worker. More probed lists means better recall, slower queries
+ANN_INDEX_DIR = os.getenv('ANN_INDEX_DIR', str(BASE_DIR / 'ann_index'))
+ANN_INDEX_NPROBE = 8
+
+# Trending topics: views, likes and comments weighted per event, counted per
+# tag and keyword in hourly buckets over a sliding window with a half-life,
+# and merged across workers through the database every snapshot interval
+TRENDING_WEIGHTS = {'view': 1.0, 'like': 3.0, 'comment': 5.0}
+TRENDING_BUCKET_SECONDS = 60 * 60
+TRENDING_WINDOW = 24 * 60 * 60  # seconds
+TRENDING_HALF_LIFE = 6 * 60 * 60  # seconds
+TRENDING_SNAPSHOT_INTERVAL = 60  # seconds
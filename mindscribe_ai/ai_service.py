@@ -1,58 +1,143 @@
+from asgiref.sync import async_to_sync
 from django.conf import settings
-import os
-import openai
+from minscribe_blog.trending import trending_topics
+from .cache import ai_result_cache, content_hash
+from .client import ai_client
+from .models import ContentAnalysis
+from .readability import content_analyzer
 
 class AIContentService:
-    def __init__(self):
-        # TODO: Initialize OpenAI API KEY here
-        openai.api_key = os.getenv("OPENAI_API_KEY")
-        
-    def generate_topic_suggestions(self, user_interests, trending_topics):
+    """
+    AI writing assistance on top of the async client.
+
+    The coroutine methods are the primary API; the plain methods run them
+    through async_to_sync for synchronous callers such as management commands.
+    """
+
+    def __init__(self, client=None):
+        self.client = client or ai_client
+        self.model = getattr(settings, 'AI_MODEL', 'gpt-3.5-turbo')
+        self.cache = ai_result_cache
+
+    async def agenerate_topic_suggestions(self, user_interests, trending_topics):
         prompt = f"""
         Generate topic suggestions based on user interests: {user_interests} and trending topics: {trending_topics}.
         Suggest 5 relevant blog post topics for the user.
         """
-        
-        response = openai.ChatCompletion.create(
-            model="gpt-3.5-turbo",
-            messages=[
+
+        return await self.client.chat(
+            [
                 {"role": "system", "content": "You are a helpful assistant."},
                 {"role": "user", "content": prompt}
-            ]
+            ],
+            model=self.model
         )
-        
-        return response.choices[0].message.content
-    
-    def analyze_content(self, content):
+
+    def get_trending_topics(self, user_interests=None, limit=10):
+        """
+        Currently trending tags and keywords, read from the in-memory trending
+        counters with no AI call. Topics matching the user's interests lead.
+        """
+        topics = [topic for topic, _ in trending_topics.top(limit * 2)]
+        if isinstance(user_interests, dict):
+            interests = {str(term).lower() for term in user_interests}
+        elif isinstance(user_interests, (list, tuple)):
+            interests = {term.lower() for term in user_interests if isinstance(term, str)}
+        else:
+            interests = set()
+        # Stable sort: interest matches first, each group still hottest first
+        topics.sort(key=lambda topic: topic not in interests)
+        return topics[:limit]
+
+    async def aanalyze_content(self, content, metrics=None):
+        """
+        Improvement suggestions for a draft. Scores are computed locally by
+        the content analyzer and handed to the model, which only writes the
+        qualitative advice; identical drafts with identical metrics (which
+        also depend on the title and keywords) are answered from the cache.
+        """
+        metrics = metrics or content_analyzer.analyze(content)
+        return await self.cache.aget_or_compute(
+            'suggest', self.model, content, {'max_tokens': 200, 'metrics': metrics},
+            lambda: self._request_suggestions(content, metrics)
+        )
+
+    async def aanalyze_post(self, post):
+        """
+        Latest analysis of a post. Scores are filled locally, including on
+        analyses stored before they were; the AI is only asked for
+        suggestions, and only when the content changed.
+        """
+        digest = content_hash(post.content)
+        analysis = await ContentAnalysis.objects.filter(post=post, content_hash=digest).order_by('-analysis_id').afirst()
+        scored = analysis is not None and None not in (analysis.readability_score, analysis.seo_score, analysis.relevance_score)
+        if scored and analysis.suggestions:
+            return analysis
+
+        metrics = content_analyzer.analyze_post(post)
+        if analysis is None:
+            analysis = ContentAnalysis(post=post, content_hash=digest)
+        analysis.readability_score = metrics['readability_score']
+        analysis.seo_score = metrics['seo_score']
+        analysis.relevance_score = metrics['relevance_score']
+        analysis.keywords = metrics['keywords']
+        if not analysis.suggestions:
+            analysis.suggestions = await self.aanalyze_content(post.markdown_content, metrics)
+        await analysis.asave()
+        return analysis
+
+    async def _request_suggestions(self, content, metrics):
         prompt = f"""
-        Analyze the content and provide readability, SEO optimization, sentiment, key points, improvement suggestions and relevance scores.
+        The content below has already been scored: Flesch reading ease {metrics['readability_score']},
+        SEO {metrics['seo_score']}/100, relevance {metrics['relevance_score']}/100, {metrics['words']} words,
+        {metrics['headings']} headings, {metrics['links']} links, keywords {', '.join(metrics['keywords'])}.
+        Do not score it again. Give concise, concrete suggestions to improve its readability, structure and SEO.
         Content: {content}
         """
-        
-        response = openai.ChatCompletion.create(
-            engine="gpt-3.5-turbo",
-            message=[
+
+        return await self.client.chat(
+            [
                 {"role": "system", "content": "You are a content strategy expert."},
                 {"role": "user", "content": prompt}
             ],
+            model=self.model,
             max_tokens=200
         )
-        
-        return response.choices[0].messages.content
-    
-    def improve_content(self, content, style_guide):
+
+    async def aimprove_content(self, content, style_guide):
+        return await self.cache.aget_or_compute(
+            'improve', self.model, content, {'style_guide': style_guide, 'max_tokens': 200},
+            lambda: self._request_improvement(content, style_guide)
+        )
+
+    async def _request_improvement(self, content, style_guide):
         prompt = f"""
         Improve the content based on the style guide: {style_guide}.
         Content: {content}
         """
-        
-        response = openai.ChatCompletion.create(
-            model = "gpt-3.5-turbo",
-            messages=[
+
+        return await self.client.chat(
+            [
                 {"role": "system", "content": "You are a content strategy expert."},
                 {"role": "user", "content": prompt}
             ],
+            model=self.model,
             max_tokens=200
         )
-        
-        return response.choices[0].message.content
\ No newline at end of file
+
+    def _run(self, coroutine_function, *args):
+        return async_to_sync(coroutine_function)(*args)
+
+    def generate_topic_suggestions(self, user_interests, trending_topics):
+        return self._run(self.agenerate_topic_suggestions, user_interests, trending_topics)
+
+    def analyze_content(self, content):
+        return self._run(self.aanalyze_content, content)
+
+    def analyze_post(self, post):
+        return self._run(self.aanalyze_post, post)
+
+    def improve_content(self, content, style_guide):
+        return self._run(self.aimprove_content, content, style_guide)
+
+ai_service = AIContentService()
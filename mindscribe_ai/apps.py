@@ -0,0 +1,10 @@
+from django.apps import AppConfig
+
+
+class MindscribeAiConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'mindscribe_ai'
+
+    def ready(self):
+        # Register the model signal receivers
+        from . import signals  # noqa: F401
@@ -0,0 +1,146 @@
+from asgiref.sync import sync_to_async
+from datetime import timedelta
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+from typing import Any, Awaitable, Callable, Tuple
+from .models import AIResult
+import hashlib
+import json
+import logging
+import threading
+import unicodedata
+
+logger = logging.getLogger(__name__)
+
+def normalize_content(content: str) -> str:
+    """Content as compared for caching: NFC, \\n line ends, no trailing blanks."""
+    content = unicodedata.normalize('NFC', content or '').replace('\r\n', '\n').replace('\r', '\n')
+    return '\n'.join(line.rstrip() for line in content.split('\n')).strip()
+
+def content_hash(content: str) -> str:
+    return hashlib.sha256(normalize_content(content).encode('utf-8')).hexdigest()
+
+class AIResultCache:
+    """
+    Persistent cache of AI service responses.
+
+    Entries are keyed by a hash of (operation, model, normalized content hash,
+    parameters) and stored in AIResult rows, so they survive restarts and are
+    shared by every worker. Entries expire after `timeout` seconds; once more
+    than `max_entries` are stored, the least recently used ones are evicted.
+    """
+
+    PRUNE_EVERY = 100  # stores between eviction passes
+    TOUCH_AFTER = 60  # seconds; bounds the UPDATEs spent on recency tracking
+
+    def __init__(self, timeout: int = 7 * 24 * 60 * 60, max_entries: int = 10000) -> None:
+        self.timeout = timeout
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._hits = {}
+        self._misses = {}
+        self._stores = 0
+
+    def make_key(self, operation: str, model: str, content: str, params: dict = None) -> str:
+        payload = json.dumps([operation, model, content_hash(content), params or {}], sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def get_or_compute(self, operation: str, model: str, content: str, params: dict, compute: Callable[[], Any]) -> Any:
+        """Return the cached result for these inputs, or compute and store it."""
+        key = self.make_key(operation, model, content, params)
+        found, result = self.lookup(key, operation)
+        if not found:
+            result = compute()
+            self.store(key, operation, model, result)
+        return result
+
+    async def aget_or_compute(self, operation: str, model: str, content: str, params: dict, compute: Callable[[], Awaitable]) -> Any:
+        """get_or_compute() for async callers; `compute` returns an awaitable."""
+        key = self.make_key(operation, model, content, params)
+        found, result = await sync_to_async(self.lookup)(key, operation)
+        if not found:
+            result = await compute()
+            await sync_to_async(self.store)(key, operation, model, result)
+        return result
+
+    def lookup(self, key: str, operation: str) -> Tuple[bool, Any]:
+        """(True, result) for a live entry, recording the hit; (False, None) otherwise."""
+        now = timezone.now()
+        entry = (
+            AIResult.objects
+            .filter(cache_key=key, expires_at__gt=now)
+            .values('pk', 'result', 'last_accessed')
+            .first()
+        )
+        if entry is None:
+            self._count(self._misses, operation)
+            return False, None
+
+        self._count(self._hits, operation)
+        updates = {'hits': F('hits') + 1}
+        if (now - entry['last_accessed']).total_seconds() > self.TOUCH_AFTER:
+            updates['last_accessed'] = now
+        AIResult.objects.filter(pk=entry['pk']).update(**updates)
+        return True, entry['result']
+
+    def store(self, key: str, operation: str, model: str, result: Any) -> None:
+        now = timezone.now()
+        values = {
+            'operation': operation,
+            'model_name': model,
+            'result': result,
+            'hits': 0,
+            'last_accessed': now,
+            'expires_at': now + timedelta(seconds=self.timeout),
+        }
+        try:
+            with transaction.atomic():
+                AIResult.objects.update_or_create(cache_key=key, defaults=values)
+        except IntegrityError:
+            # Another worker stored the same result first
+            pass
+
+        with self._lock:
+            self._stores += 1
+            should_prune = self._stores % self.PRUNE_EVERY == 0
+        if should_prune:
+            self.prune()
+
+    def prune(self) -> int:
+        """Drop expired entries, then the least recently used beyond max_entries."""
+        deleted, _ = AIResult.objects.filter(expires_at__lte=timezone.now()).delete()
+        cutoff = (
+            AIResult.objects
+            .order_by('-last_accessed')
+            .values_list('last_accessed', flat=True)[self.max_entries:self.max_entries + 1]
+            .first()
+        )
+        if cutoff is not None:
+            evicted, _ = AIResult.objects.filter(last_accessed__lte=cutoff).delete()
+            deleted += evicted
+            logger.info(f"Evicted {evicted} least recently used AI results")
+        return deleted
+
+    def invalidate(self, operation: str, model: str, content: str, params: dict = None) -> None:
+        AIResult.objects.filter(cache_key=self.make_key(operation, model, content, params)).delete()
+
+    def _count(self, counter: dict, operation: str) -> None:
+        with self._lock:
+            counter[operation] = counter.get(operation, 0) + 1
+
+    def stats(self) -> dict:
+        """Hit/miss counts and hit rate per operation for this process."""
+        with self._lock:
+            operations = set(self._hits) | set(self._misses)
+            stats = {}
+            for operation in sorted(operations):
+                hits, misses = self._hits.get(operation, 0), self._misses.get(operation, 0)
+                stats[operation] = {'hits': hits, 'misses': misses, 'hit_rate': hits / (hits + misses)}
+            return stats
+
+ai_result_cache = AIResultCache(
+    timeout=getattr(settings, 'AI_RESULT_CACHE_TIMEOUT', 7 * 24 * 60 * 60),
+    max_entries=getattr(settings, 'AI_RESULT_CACHE_MAX_ENTRIES', 10000),
+)
@@ -0,0 +1,150 @@
+from django.conf import settings
+from typing import Optional
+from .exceptions import AIServiceError
+import aiohttp
+import asyncio
+import atexit
+import logging
+import os
+import random
+import threading
+
+logger = logging.getLogger(__name__)
+
+class AIClient:
+    """
+    Async client for an OpenAI-compatible chat completions API.
+
+    Calls share one aiohttp connection pool and are bounded by a global
+    semaphore of `max_concurrency`, so a burst of requests queues here instead
+    of opening a connection each. Every call has its own timeout, and
+    connection errors, timeouts, 429s and 5xx responses are retried up to
+    `max_retries` times with full-jitter exponential backoff.
+
+    aiohttp sessions and asyncio primitives belong to one event loop, while
+    callers may each run their own (under WSGI every async view gets a fresh
+    loop). So the pool and semaphore live on one long-lived loop in a daemon
+    thread per process, and chat() hands each request over to it and awaits
+    the result from whatever loop the caller is on.
+    """
+
+    RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+    def __init__(
+        self,
+        base_url: str,
+        api_key: Optional[str] = None,
+        max_concurrency: int = 8,
+        timeout: float = 30.0,
+        max_retries: int = 3,
+        backoff: float = 0.5,
+        max_backoff: float = 8.0,
+        pool_size: int = 20,
+    ) -> None:
+        self.base_url = base_url.rstrip('/')
+        self.api_key = api_key
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.pool_size = pool_size
+        self._lock = threading.Lock()
+        self._loop = None
+        self._thread = None
+        self._pid = None
+        self._session = None
+        self._semaphore = None
+
+    def _client_loop(self) -> asyncio.AbstractEventLoop:
+        """The loop the pool lives on, started on first use (and again after a fork)."""
+        with self._lock:
+            if self._loop is None or self._pid != os.getpid():
+                loop = asyncio.new_event_loop()
+                thread = threading.Thread(target=loop.run_forever, name='ai-client', daemon=True)
+                thread.start()
+                if self._pid is None:
+                    atexit.register(self.close)
+                self._loop, self._thread, self._pid = loop, thread, os.getpid()
+                self._session = self._semaphore = None
+            return self._loop
+
+    def _pool(self):
+        """Session and semaphore; only called on the client loop."""
+        if self._session is None or self._session.closed:
+            headers = {'Authorization': f'Bearer {self.api_key}'} if self.api_key else {}
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.pool_size),
+                headers=headers,
+            )
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._session, self._semaphore
+
+    async def chat(self, messages: list, model: str, timeout: Optional[float] = None, **params) -> str:
+        """Run one chat completion and return the reply text."""
+        loop = self._client_loop()
+        coroutine = self._chat(messages, model, timeout, params)
+        if asyncio.get_running_loop() is loop:
+            return await coroutine
+        # Cancelling the caller cancels the request on the client loop too
+        return await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(coroutine, loop))
+
+    async def _chat(self, messages: list, model: str, timeout: Optional[float], params: dict) -> str:
+        session, semaphore = self._pool()
+        payload = {'model': model, 'messages': messages, **params}
+        client_timeout = aiohttp.ClientTimeout(total=timeout or self.timeout)
+
+        for attempt in range(self.max_retries + 1):
+            retry_after = None
+            try:
+                async with semaphore:
+                    async with session.post(f'{self.base_url}/chat/completions', json=payload, timeout=client_timeout) as response:
+                        if response.status == 200:
+                            body = await response.json()
+                            return body['choices'][0]['message']['content']
+                        if response.status not in self.RETRY_STATUSES:
+                            raise AIServiceError(f"AI request failed with status {response.status}: {await response.text()}")
+                        error = f"status {response.status}"
+                        retry_after = response.headers.get('Retry-After')
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                error = repr(e)
+            except (KeyError, IndexError, ValueError):
+                raise AIServiceError("AI response was not a chat completion")
+
+            if attempt == self.max_retries:
+                break
+
+            delay = random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+            if retry_after is not None:
+                try:
+                    delay = max(delay, float(retry_after))
+                except ValueError:
+                    pass
+            logger.warning(f"AI request attempt {attempt + 1} failed ({error}); retrying in {delay:.2f}s")
+            await asyncio.sleep(delay)
+
+        raise AIServiceError(f"AI request failed after {self.max_retries + 1} attempts ({error})", status_code=503)
+
+    def close(self) -> None:
+        """Close the pool and stop the client loop; the next call starts afresh."""
+        with self._lock:
+            loop, thread, session = self._loop, self._thread, self._session
+            owned = self._pid == os.getpid()
+            self._loop = self._thread = self._session = self._semaphore = None
+        if loop is None or not owned:
+            return
+        if session is not None:
+            asyncio.run_coroutine_threadsafe(session.close(), loop).result(timeout=self.timeout)
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join(timeout=self.timeout)
+        loop.close()
+
+ai_client = AIClient(
+    base_url=getattr(settings, 'AI_API_BASE', 'https://api.openai.com/v1'),
+    api_key=getattr(settings, 'AI_API_KEY', None),
+    max_concurrency=getattr(settings, 'AI_MAX_CONCURRENCY', 8),
+    timeout=getattr(settings, 'AI_REQUEST_TIMEOUT', 30),
+    max_retries=getattr(settings, 'AI_MAX_RETRIES', 3),
+    backoff=getattr(settings, 'AI_RETRY_BACKOFF', 0.5),
+    pool_size=getattr(settings, 'AI_CONNECTION_POOL_SIZE', 20),
+)
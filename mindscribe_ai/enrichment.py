@@ -0,0 +1,199 @@
+from asgiref.sync import async_to_sync, sync_to_async
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from django.utils.module_loading import import_string
+from markdownify import markdownify as md
+from minscribe_blog.models import Post
+from typing import Optional
+from .cache import ai_result_cache
+from .client import ai_client
+from .exceptions import AIServiceError
+from .keywords import keyword_extractor, refresh_keyword_indexes
+from .models import EnrichmentCheckpoint
+from .sentiment import sentiment_scorer
+from .summarizer import plain_text, summarizer
+import asyncio
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+class LocalEnrichmentBackend:
+    """
+    Deterministic offline backend: the TextRank summary, the keyword
+    extractor's TF-IDF keywords and the lexicon sentiment, so its fields
+    match what the batch commands and the Post signals write.
+    """
+
+    def __init__(self) -> None:
+        self.statistics = None
+
+    def prepare(self) -> None:
+        """Reload the corpus statistics; the job calls this once per pass."""
+        self.statistics = keyword_extractor.statistics()
+
+    async def enrich(self, title: str, content: str) -> dict:
+        if self.statistics is None:
+            await sync_to_async(self.prepare)()
+        summary = summarizer.summarize(content)
+
+        # Tokenized as Post.save and the search index would, so keywords match extract_keywords
+        keywords = keyword_extractor.extract_text(title, md(content or ''), self.statistics)
+
+        # Scored on the same text as the post_save signal
+        _, sentiment = sentiment_scorer.score(f"{title}\n{content}")
+        return {'summary': summary, 'keywords': keywords, 'sentiment': sentiment}
+
+class AIEnrichmentBackend:
+    """Asks the chat model for all three fields at once, through the result cache."""
+
+    SENTIMENTS = ('positive', 'negative', 'neutral', 'mixed')
+
+    def __init__(self, client=None) -> None:
+        self.client = client or ai_client
+        self.model = getattr(settings, 'AI_MODEL', 'gpt-3.5-turbo')
+
+    async def enrich(self, title: str, content: str) -> dict:
+        text = plain_text(content)
+        reply = await ai_result_cache.aget_or_compute(
+            'enrich', self.model, f"{title}\n{text}", {'max_tokens': 300},
+            lambda: self._request(title, text)
+        )
+        try:
+            data = json.loads(reply)
+        except (TypeError, ValueError):
+            raise AIServiceError("Enrichment reply was not JSON")
+
+        sentiment = str(data.get('sentiment', '')).lower()
+        return {
+            'summary': str(data.get('summary', '')),
+            'keywords': [str(keyword) for keyword in data.get('keywords', [])],
+            'sentiment': sentiment if sentiment in self.SENTIMENTS else 'neutral',
+        }
+
+    async def _request(self, title: str, text: str) -> str:
+        prompt = f"""
+        Return a JSON object with "summary" (at most two sentences), "keywords" (up to 8 strings)
+        and "sentiment" (positive, negative, neutral or mixed) for this blog post.
+        Title: {title}
+        Content: {text}
+        """
+        return await self.client.chat(
+            [
+                {"role": "system", "content": "You are a content strategy expert. Reply with JSON only."},
+                {"role": "user", "content": prompt}
+            ],
+            model=self.model,
+            max_tokens=300
+        )
+
+BACKENDS = {
+    'local': 'mindscribe_ai.enrichment.LocalEnrichmentBackend',
+    'ai': 'mindscribe_ai.enrichment.AIEnrichmentBackend',
+}
+
+def load_backend(path: Optional[str] = None):
+    """Instantiate a backend from a dotted path or one of the BACKENDS aliases."""
+    path = path or getattr(settings, 'AI_ENRICHMENT_BACKEND', BACKENDS['ai'])
+    return import_string(BACKENDS.get(path, path))()
+
+class EnrichmentJob:
+    """
+    Fills Post.ai_summary, ai_keywords and ai_sentiment for posts whose content
+    changed since they were last enriched.
+
+    Posts are scanned in primary key order in batches of `batch_size`, each
+    batch enriched with up to `concurrency` backend calls in flight and
+    written with one bulk_update. bulk_update sends no post_save, so the
+    batch's related-posts vectors and trending topics are refreshed after
+    it. The checkpoint row records the last post of every written batch, so
+    a run that dies resumes where it stopped. A post whose content changes
+    mid-run keeps the old hash and is picked up by the next pass; a post the
+    backend fails on is retried on the next pass.
+    """
+
+    FIELDS = ['ai_summary', 'ai_keywords', 'ai_sentiment', 'ai_enriched_hash']
+
+    def __init__(self, backend, name: str = 'post-enrichment', batch_size: int = 50, concurrency: int = 8) -> None:
+        self.backend = backend
+        self.name = name
+        self.batch_size = batch_size
+        self.concurrency = concurrency
+
+    def run(self, restart: bool = False, limit: Optional[int] = None) -> EnrichmentCheckpoint:
+        # async_to_sync rather than asyncio.run: it works under a running loop
+        # too, and the job's ORM calls stay on this thread's connection
+        return async_to_sync(self.arun)(restart=restart, limit=limit)
+
+    async def arun(self, restart: bool = False, limit: Optional[int] = None) -> EnrichmentCheckpoint:
+        checkpoint = await sync_to_async(self._checkpoint)(restart)
+        prepare = getattr(self.backend, 'prepare', None)
+        if prepare is not None:
+            await sync_to_async(prepare)()
+        semaphore = asyncio.Semaphore(self.concurrency)
+        handled = 0
+        while limit is None or handled < limit:
+            size = self.batch_size if limit is None else min(self.batch_size, limit - handled)
+            rows = await sync_to_async(self._next_batch)(checkpoint.last_post_id, size)
+            if not rows:
+                checkpoint.finished_at = timezone.now()
+                await sync_to_async(checkpoint.save)()
+                break
+
+            results = await asyncio.gather(*[self._enrich(semaphore, row) for row in rows])
+            await sync_to_async(self._save_batch)(checkpoint, rows, results)
+            handled += len(rows)
+        return checkpoint
+
+    def _checkpoint(self, restart: bool) -> EnrichmentCheckpoint:
+        checkpoint, _ = EnrichmentCheckpoint.objects.get_or_create(job=self.name)
+        if restart or checkpoint.finished_at is not None or checkpoint.started_at is None:
+            # Start a fresh pass; otherwise resume the interrupted one
+            checkpoint.last_post_id = 0
+            checkpoint.processed = 0
+            checkpoint.failed = 0
+            checkpoint.started_at = timezone.now()
+            checkpoint.finished_at = None
+            checkpoint.save()
+        else:
+            logger.info(f"Resuming {self.name} after post {checkpoint.last_post_id}")
+        return checkpoint
+
+    def _next_batch(self, after: int, size: int) -> list:
+        return list(
+            Post.objects
+            .filter(pk__gt=after)
+            .exclude(ai_enriched_hash=F('content_hash'))
+            .order_by('pk')
+            .values('post_id', 'title', 'content', 'content_hash')[:size]
+        )
+
+    async def _enrich(self, semaphore: asyncio.Semaphore, row: dict) -> Optional[dict]:
+        async with semaphore:
+            try:
+                return await self.backend.enrich(row['title'], row['content'])
+            except Exception:
+                logger.exception(f"Enrichment failed for post {row['post_id']}")
+                return None
+
+    def _save_batch(self, checkpoint: EnrichmentCheckpoint, rows: list, results: list) -> None:
+        posts = [
+            Post(
+                post_id=row['post_id'],
+                ai_summary=result['summary'],
+                ai_keywords=', '.join(result['keywords']),
+                ai_sentiment=result['sentiment'][:20],
+                ai_enriched_hash=row['content_hash'],
+            )
+            for row, result in zip(rows, results)
+            if result is not None
+        ]
+        with transaction.atomic():
+            Post.objects.bulk_update(posts, self.FIELDS)
+            checkpoint.last_post_id = rows[-1]['post_id']
+            checkpoint.processed += len(posts)
+            checkpoint.failed += len(rows) - len(posts)
+            checkpoint.save(update_fields=['last_post_id', 'processed', 'failed', 'updated_at'])
+        refresh_keyword_indexes([post.post_id for post in posts])
@@ -0,0 +1,6 @@
+class AIServiceError(Exception):
+    """Raised when the AI backend cannot produce a response."""
+    def __init__(self, message, status_code=502):
+        self.message = message
+        self.status_code = status_code
+        super().__init__(self.message)
@@ -0,0 +1,81 @@
+from aiohttp import web
+import asyncio
+import hashlib
+import json
+import random
+
+class FakeAIServer:
+    """
+    A local stand-in for the OpenAI chat completions API.
+
+    Answers POST /v1/chat/completions with a deterministic reply derived from
+    the prompt, after an optional delay, and can fail a share of requests
+    with 429/500 so retries can be exercised offline. Run it with the
+    run_fake_ai_server command and point AI_API_BASE at the printed URL.
+    """
+
+    def __init__(self, latency: float = 0.0, failure_rate: float = 0.0, fail_first: int = 0, seed: int = 0) -> None:
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.fail_first = fail_first
+        self.random = random.Random(seed)
+        self.requests = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    def reply_for(self, messages: list) -> str:
+        prompt = messages[-1].get('content', '') if messages else ''
+        digest = hashlib.sha256(prompt.encode('utf-8')).hexdigest()[:12]
+        words = prompt.split()
+        if any('JSON' in message.get('content', '') for message in messages if message.get('role') == 'system'):
+            return json.dumps({
+                'summary': f"[fake:{digest}] {' '.join(words[:20])}",
+                'keywords': sorted({word.strip('.,:').lower() for word in words if len(word) > 6})[:8],
+                'sentiment': 'neutral',
+            })
+        return f"[fake:{digest}] {' '.join(words[:30])}"
+
+    async def chat_completions(self, request: web.Request) -> web.Response:
+        self.requests += 1
+        number = self.requests
+        # Decided on arrival, before any await lets other requests bump the count
+        fail = number <= self.fail_first or self.random.random() < self.failure_rate
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            payload = await request.json()
+            if self.latency:
+                await asyncio.sleep(self.latency)
+
+            if fail:
+                status = self.random.choice([429, 500])
+                return web.json_response({'error': {'message': 'Injected failure'}}, status=status)
+
+            content = self.reply_for(payload.get('messages', []))
+            return web.json_response({
+                'id': f'chatcmpl-fake-{number}',
+                'object': 'chat.completion',
+                'model': payload.get('model'),
+                'choices': [{'index': 0, 'message': {'role': 'assistant', 'content': content}, 'finish_reason': 'stop'}],
+            })
+        except json.JSONDecodeError:
+            return web.json_response({'error': {'message': 'Invalid JSON'}}, status=400)
+        finally:
+            self.in_flight -= 1
+
+    def application(self) -> web.Application:
+        app = web.Application()
+        app.router.add_post('/v1/chat/completions', self.chat_completions)
+        return app
+
+    async def start(self, host: str = '127.0.0.1', port: int = 0) -> str:
+        """Serve on the running loop; returns the API base URL."""
+        self._runner = web.AppRunner(self.application())
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        port = self._runner.addresses[0][1]
+        return f'http://{host}:{port}/v1'
+
+    async def stop(self) -> None:
+        await self._runner.cleanup()
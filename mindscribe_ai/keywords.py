@@ -0,0 +1,203 @@
+from collections import Counter
+from django.db import transaction
+from django.db.models import Count
+from minscribe_blog.ann import post_ann_index
+from minscribe_blog.models import Post, SearchPosting
+from minscribe_blog.search import search_index
+from minscribe_blog.trending import trending_topics
+from scipy import sparse
+from typing import Dict, Iterable, List
+from .cache import content_hash
+from .models import ContentAnalysis
+import numpy as np
+
+class CorpusStatistics:
+    """IDF weights of the post vocabulary; column i belongs to terms[i]."""
+
+    def __init__(self, terms: List[str], frequencies: np.ndarray, total: int, max_df_ratio: float) -> None:
+        self.terms = terms
+        self.vocabulary = {term: column for column, term in enumerate(terms)}
+        self.total = total
+        self.max_df_ratio = max_df_ratio
+        self.idf = self._weights(frequencies, np.fromiter((term.isdigit() for term in terms), dtype=bool, count=len(terms)))
+
+    def _weights(self, frequencies: np.ndarray, numeric: np.ndarray) -> np.ndarray:
+        weights = np.log((1 + self.total) / (1 + frequencies)) + 1
+        # Terms in most posts say nothing about any one of them; numbers neither
+        weights[(frequencies > max(1, self.max_df_ratio * self.total)) | numeric] = 0
+        return weights.astype(np.float32)
+
+    def weights_for(self, terms: List[str]) -> np.ndarray:
+        """Weights of terms outside the vocabulary, as if each appeared once."""
+        numeric = np.fromiter((term.isdigit() for term in terms), dtype=bool, count=len(terms))
+        return self._weights(np.ones(len(terms), dtype=np.float32), numeric)
+
+class KeywordExtractor:
+    """
+    TF-IDF keyword extraction over the whole post corpus.
+
+    Term statistics come from the search index: its post postings hold the
+    term frequencies of every post (title terms weighted up) and are
+    maintained by the Post signals on every save, so document frequencies
+    stay current without a separate table. A batch of posts is scored as
+    one sparse matrix: sublinear TF times smoothed IDF, then the top terms
+    of every row.
+    """
+
+    def __init__(self, top_k: int = 8, max_df_ratio: float = 0.5) -> None:
+        self.top_k = top_k
+        self.max_df_ratio = max_df_ratio
+
+    def statistics(self) -> CorpusStatistics:
+        """Document frequencies of every post term, turned into IDF weights."""
+        rows = (
+            SearchPosting.objects
+            .filter(document__doc_type='post')
+            .values('term')
+            .annotate(df=Count('document_id'))
+            .values_list('term', 'df')
+        )
+        terms = []
+        frequencies = []
+        for term, df in rows.iterator(chunk_size=5000):
+            terms.append(term)
+            frequencies.append(df)
+        return CorpusStatistics(terms, np.asarray(frequencies, dtype=np.float32), Post.objects.count(), self.max_df_ratio)
+
+    def extract(self, posts: List[dict], statistics: CorpusStatistics) -> Dict[int, List[str]]:
+        """
+        Top keywords for a batch of posts (dicts with post_id, title and
+        markdown_content) against the corpus statistics.
+        """
+        if not posts:
+            return {}
+        return self._rank(self._term_frequencies(posts), statistics)
+
+    def extract_text(self, title: str, markdown_content: str, statistics: CorpusStatistics) -> List[str]:
+        """Top keywords of a post that may not be saved or indexed yet."""
+        terms = Counter(search_index.post_tokens(Post(title=title, markdown_content=markdown_content)))
+        return self._rank({None: terms}, statistics)[None]
+
+    def _rank(self, frequencies: Dict[int, Counter], statistics: CorpusStatistics) -> Dict[int, List[str]]:
+        ids = list(frequencies)
+        row_of = {post_id: row for row, post_id in enumerate(ids)}
+        vocabulary = statistics.vocabulary
+
+        # Terms missing from the statistics (posts not indexed yet) are
+        # weighted as if they appeared in this post only
+        extra_terms = []
+        extra = {}
+        rows, columns, counts = [], [], []
+        for post_id, terms in frequencies.items():
+            for term, frequency in terms.items():
+                column = vocabulary.get(term)
+                if column is None:
+                    column = extra.get(term)
+                    if column is None:
+                        column = extra[term] = len(vocabulary) + len(extra_terms)
+                        extra_terms.append(term)
+                rows.append(row_of[post_id])
+                columns.append(column)
+                counts.append(frequency)
+
+        weights = statistics.idf
+        if extra_terms:
+            weights = np.concatenate([weights, statistics.weights_for(extra_terms)])
+
+        tf = sparse.csr_matrix(
+            (np.asarray(counts, dtype=np.float32), (np.asarray(rows), np.asarray(columns))),
+            shape=(len(ids), len(weights))
+        )
+        tf.data = 1 + np.log(tf.data)
+        scores = sparse.csr_matrix(tf.multiply(weights[np.newaxis, :]))
+        scores.eliminate_zeros()
+
+        def term(column):
+            return statistics.terms[column] if column < len(statistics.terms) else extra_terms[column - len(statistics.terms)]
+
+        keywords = {}
+        for row, post_id in enumerate(ids):
+            start, end = scores.indptr[row], scores.indptr[row + 1]
+            data, indices = scores.data[start:end], scores.indices[start:end]
+            if len(data) > self.top_k:
+                best = np.argpartition(-data, self.top_k)[:self.top_k]
+                data, indices = data[best], indices[best]
+            # Highest score first, ties broken alphabetically for stable output
+            ranked = sorted(zip(-data, (term(column) for column in indices)))
+            keywords[post_id] = [name for _, name in ranked]
+        return keywords
+
+    def _term_frequencies(self, posts: List[dict]) -> Dict[int, Counter]:
+        ids = [post['post_id'] for post in posts]
+        terms_of = {post_id: Counter() for post_id in ids}
+        postings = (
+            SearchPosting.objects
+            .filter(document__doc_type='post', document__object_id__in=ids)
+            .values_list('document__object_id', 'term', 'frequency')
+        )
+        for post_id, term, frequency in postings:
+            terms_of[post_id][term] = frequency
+
+        for post in posts:
+            if not terms_of[post['post_id']]:
+                terms_of[post['post_id']] = Counter(search_index.post_tokens(Post(**post)))
+        return terms_of
+
+    def run(self, batch_size: int = 1000, post_ids: Iterable[int] = None) -> int:
+        """
+        Fill Post.ai_keywords, and the keywords of each post's current
+        ContentAnalysis, for every post (or just `post_ids`). Returns the
+        number of posts updated.
+        """
+        statistics = self.statistics()
+
+        queryset = Post.objects.order_by('post_id')
+        if post_ids is not None:
+            queryset = queryset.filter(post_id__in=list(post_ids))
+
+        last_id = 0
+        updated = 0
+        while True:
+            posts = list(
+                queryset
+                .filter(post_id__gt=last_id)
+                .values('post_id', 'title', 'markdown_content', 'content')[:batch_size]
+            )
+            if not posts:
+                return updated
+
+            keywords = self.extract(
+                [{key: post[key] for key in ('post_id', 'title', 'markdown_content')} for post in posts],
+                statistics
+            )
+            self._save(posts, keywords)
+            refresh_keyword_indexes(list(keywords))
+            last_id = posts[-1]['post_id']
+            updated += len(posts)
+
+    @transaction.atomic
+    def _save(self, posts: List[dict], keywords: Dict[int, List[str]]) -> None:
+        Post.objects.bulk_update(
+            [Post(post_id=post_id, ai_keywords=', '.join(terms)) for post_id, terms in keywords.items()],
+            ['ai_keywords'],
+            batch_size=500
+        )
+
+        hashes = {post['post_id']: content_hash(post['content']) for post in posts}
+        analyses = ContentAnalysis.objects.filter(post_id__in=hashes.keys()).only('analysis_id', 'post_id', 'content_hash')
+        current = [analysis for analysis in analyses if hashes[analysis.post_id] == analysis.content_hash]
+        for analysis in current:
+            analysis.keywords = keywords[analysis.post_id]
+        ContentAnalysis.objects.bulk_update(current, ['keywords'], batch_size=500)
+
+def refresh_keyword_indexes(post_ids: List[int]) -> None:
+    """
+    Catch up what the Post signals derive from ai_keywords after a bulk
+    write, which sends no post_save: the posts' related-posts vectors and
+    their cached trending topics.
+    """
+    post_ann_index.refresh(post_ids)
+    for post_id in post_ids:
+        trending_topics.forget(post_id)
+
+keyword_extractor = KeywordExtractor()
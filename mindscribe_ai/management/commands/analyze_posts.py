@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+from mindscribe_ai.readability import content_analyzer
+import time
+
+class Command(BaseCommand):
+    help = "Score readability, SEO and relevance of every post locally into ContentAnalysis, without calling the AI service."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help='Posts per bulk write')
+        parser.add_argument('--post', type=int, action='append', dest='post_ids', help='Only this post (repeatable)')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        scored = content_analyzer.analyze_posts(batch_size=options['batch_size'], post_ids=options['post_ids'])
+        elapsed = time.perf_counter() - started
+        self.stdout.write(f"Scored {scored} posts in {elapsed:.1f}s ({scored / max(elapsed, 1e-9):.0f} posts/s)")
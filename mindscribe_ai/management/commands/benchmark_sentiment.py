@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand
+from minscribe_blog.models import Comments
+from mindscribe_ai.sentiment import LEXICON, sentiment_scorer
+import random
+import time
+
+class Command(BaseCommand):
+    help = (
+        "Measure sentiment scoring throughput in documents per second, batched "
+        "and one document at a time, without writing anything."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--documents', type=int, default=50000, help='Documents to score')
+        parser.add_argument('--batch-size', type=int, default=2000, help='Documents per batch')
+        parser.add_argument('--synthetic', action='store_true', help='Generate comments instead of reading them')
+
+    def handle(self, *args, **options):
+        documents = options['documents']
+        texts = [] if options['synthetic'] else list(Comments.objects.values_list('content', flat=True)[:documents])
+        if not texts:
+            words = list(LEXICON) + ['not', 'very', 'the', 'post', 'article', 'really', 'this', 'is'] * 20
+            rng = random.Random(0)
+            texts = [' '.join(rng.choices(words, k=rng.randint(8, 60))) for _ in range(documents)]
+        texts = (texts * (documents // len(texts) + 1))[:documents]
+        batch_size = options['batch_size']
+
+        started = time.perf_counter()
+        for start in range(0, len(texts), batch_size):
+            sentiment_scorer.score_batch(texts[start:start + batch_size])
+        batched = len(texts) / (time.perf_counter() - started)
+
+        sample = texts[:min(len(texts), 5000)]
+        started = time.perf_counter()
+        for text in sample:
+            sentiment_scorer.score(text)
+        single = len(sample) / (time.perf_counter() - started)
+
+        self.stdout.write(f"Batched ({batch_size} per batch): {batched:,.0f} docs/s")
+        self.stdout.write(f"One at a time: {single:,.0f} docs/s")
@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand, CommandError
+from mindscribe_ai.enrichment import EnrichmentJob, load_backend
+import time
+
+class Command(BaseCommand):
+    help = (
+        "Fill ai_summary, ai_keywords and ai_sentiment for posts whose content changed "
+        "since they were last enriched. Resumes an interrupted pass from its checkpoint."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--backend', default=None,
+                            help="'local', 'ai' or a dotted path (default: AI_ENRICHMENT_BACKEND)")
+        parser.add_argument('--batch-size', type=int, default=50, help='Posts per bulk update')
+        parser.add_argument('--concurrency', type=int, default=8, help='Backend calls in flight')
+        parser.add_argument('--limit', type=int, default=None, help='Stop after this many posts')
+        parser.add_argument('--restart', action='store_true', help='Ignore the checkpoint and start a new pass')
+        parser.add_argument('--loop', action='store_true', help='Keep running passes as a worker')
+        parser.add_argument('--interval', type=float, default=60, help='Seconds between passes with --loop')
+
+    def handle(self, *args, **options):
+        try:
+            backend = load_backend(options['backend'])
+        except ImportError as e:
+            raise CommandError(f"Cannot load enrichment backend: {e}")
+
+        job = EnrichmentJob(backend, batch_size=options['batch_size'], concurrency=options['concurrency'])
+        restart = options['restart']
+        while True:
+            started = time.perf_counter()
+            checkpoint = job.run(restart=restart, limit=options['limit'])
+            self.stdout.write(
+                f"Enriched {checkpoint.processed} posts ({checkpoint.failed} failed) "
+                f"in {time.perf_counter() - started:.1f}s; checkpoint at post {checkpoint.last_post_id}"
+            )
+            if not options['loop']:
+                break
+            restart = False
+            time.sleep(options['interval'])
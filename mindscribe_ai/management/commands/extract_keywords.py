@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+from mindscribe_ai.keywords import KeywordExtractor
+import time
+
+class Command(BaseCommand):
+    help = "Fill ai_keywords and ContentAnalysis.keywords with TF-IDF keywords computed across all posts."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='Posts scored per sparse matrix')
+        parser.add_argument('--top-k', type=int, default=8, help='Keywords kept per post')
+        parser.add_argument('--post', type=int, action='append', dest='post_ids', help='Only this post (repeatable)')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        extractor = KeywordExtractor(top_k=options['top_k'])
+        updated = extractor.run(batch_size=options['batch_size'], post_ids=options['post_ids'])
+        self.stdout.write(f"Extracted keywords for {updated} posts in {time.perf_counter() - started:.1f}s")
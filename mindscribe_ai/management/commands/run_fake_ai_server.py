@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+from mindscribe_ai.fake_server import FakeAIServer
+import asyncio
+
+class Command(BaseCommand):
+    help = "Serve a local fake of the chat completions API for offline development."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', default='127.0.0.1')
+        parser.add_argument('--port', type=int, default=8765)
+        parser.add_argument('--latency', type=float, default=0.0, help='Seconds to wait before each reply')
+        parser.add_argument('--failure-rate', type=float, default=0.0, help='Share of requests answered with 429/500')
+
+    def handle(self, *args, **options):
+        server = FakeAIServer(latency=options['latency'], failure_rate=options['failure_rate'])
+
+        async def serve():
+            url = await server.start(options['host'], options['port'])
+            self.stdout.write(f"Fake AI server listening; set AI_API_BASE={url}")
+            try:
+                await asyncio.Event().wait()
+            finally:
+                await server.stop()
+
+        try:
+            asyncio.run(serve())
+        except KeyboardInterrupt:
+            self.stdout.write(f"Served {server.requests} requests")
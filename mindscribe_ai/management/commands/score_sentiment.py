@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+from mindscribe_ai.sentiment import sentiment_scorer
+import time
+
+class Command(BaseCommand):
+    help = "Score the sentiment of every post and comment with the local lexicon scorer."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=2000, help='Documents scored per batch')
+        parser.add_argument('--missing', action='store_true', help='Only documents without a sentiment')
+        parser.add_argument('--skip-posts', action='store_true')
+        parser.add_argument('--skip-comments', action='store_true')
+
+    def handle(self, *args, **options):
+        for name, score in (('posts', sentiment_scorer.score_posts), ('comments', sentiment_scorer.score_comments)):
+            if options[f'skip_{name}']:
+                continue
+            started = time.perf_counter()
+            updated = score(batch_size=options['batch_size'], missing_only=options['missing'])
+            elapsed = time.perf_counter() - started
+            self.stdout.write(f"Scored {updated} {name} in {elapsed:.1f}s ({updated / max(elapsed, 1e-9):.0f} docs/s)")
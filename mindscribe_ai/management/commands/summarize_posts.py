@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+from mindscribe_ai.summarizer import TextRankSummarizer
+import time
+
+class Command(BaseCommand):
+    help = "Fill ai_summary with local TextRank summaries, without calling the AI service."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help='Posts per bulk update')
+        parser.add_argument('--workers', type=int, default=None, help='Summarizer processes (default: CPU count)')
+        parser.add_argument('--sentences', type=int, default=3, help='Sentences per summary')
+        parser.add_argument('--missing', action='store_true', help='Only posts without a summary')
+        parser.add_argument('--post', type=int, action='append', dest='post_ids', help='Only this post (repeatable)')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        summarizer = TextRankSummarizer(max_sentences=options['sentences'])
+        updated = summarizer.summarize_posts(
+            batch_size=options['batch_size'],
+            workers=options['workers'],
+            post_ids=options['post_ids'],
+            missing_only=options['missing']
+        )
+        self.stdout.write(f"Summarized {updated} posts in {time.perf_counter() - started:.1f}s")
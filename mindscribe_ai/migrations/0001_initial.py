@@ -0,0 +1,40 @@
+# Generated by Django 5.1.7 on 2026-10-18 19:23
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('minscribe_blog', '0021_versionhistory_deltas'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ContentAnalysis',
+            fields=[
+                ('analysis_id', models.AutoField(primary_key=True, serialize=False)),
+                ('readability_score', models.FloatField()),
+                ('seo_score', models.FloatField()),
+                ('relevance_score', models.FloatField()),
+                ('keywords', models.JSONField()),
+                ('suggestions', models.TextField()),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='minscribe_blog.post')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ContentSuggestion',
+            fields=[
+                ('suggestion_id', models.AutoField(primary_key=True, serialize=False)),
+                ('topic', models.CharField(max_length=200)),
+                ('description', models.TextField()),
+                ('relevance_score', models.FloatField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('is_used', models.BooleanField(default=False)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='minscribe_blog.user')),
+            ],
+        ),
+    ]
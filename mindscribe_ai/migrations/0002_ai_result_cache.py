@@ -0,0 +1,57 @@
+# Generated by Django 5.1.7 on 2026-10-18 19:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mindscribe_ai', '0001_initial'),
+        ('minscribe_blog', '0021_versionhistory_deltas'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AIResult',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('cache_key', models.CharField(max_length=64, unique=True)),
+                ('operation', models.CharField(max_length=50)),
+                ('model_name', models.CharField(max_length=100)),
+                ('result', models.JSONField()),
+                ('hits', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('last_accessed', models.DateTimeField(db_index=True)),
+                ('expires_at', models.DateTimeField(db_index=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='contentanalysis',
+            name='content_hash',
+            field=models.CharField(blank=True, default='', max_length=64),
+        ),
+        migrations.AlterField(
+            model_name='contentanalysis',
+            name='keywords',
+            field=models.JSONField(blank=True, default=list),
+        ),
+        migrations.AlterField(
+            model_name='contentanalysis',
+            name='readability_score',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='contentanalysis',
+            name='relevance_score',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='contentanalysis',
+            name='seo_score',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='contentanalysis',
+            index=models.Index(fields=['post', 'content_hash'], name='analysis_post_hash_idx'),
+        ),
+    ]
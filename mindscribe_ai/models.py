@@ -1,5 +1,5 @@
 from django.db import models
-from ..minscribe_blog.models import User, Post
+from minscribe_blog.models import User, Post
 # Create your models here.
 class ContentSuggestion(models.Model):
     suggestion_id = models.AutoField(primary_key=True)
@@ -16,11 +16,48 @@ class ContentSuggestion(models.Model):
 class ContentAnalysis(models.Model):
     analysis_id = models.AutoField(primary_key=True)
     post = models.ForeignKey(Post, on_delete=models.CASCADE)
-    readability_score = models.FloatField()
-    seo_score = models.FloatField()
-    relevance_score = models.FloatField()
-    keywords = models.JSONField()
+    # Hash of the normalized content that was analyzed; an analysis is reused
+    # for as long as the post content hashes the same
+    content_hash = models.CharField(max_length=64, blank=True, default='')
+    # Scores come from the local content analyzer (readability.py); only the
+    # suggestions text comes from the AI service
+    readability_score = models.FloatField(null=True, blank=True)
+    seo_score = models.FloatField(null=True, blank=True)
+    relevance_score = models.FloatField(null=True, blank=True)
+    keywords = models.JSONField(default=list, blank=True)
     suggestions = models.TextField()
     
+    class Meta:
+        indexes = [
+            models.Index(fields=['post', 'content_hash'], name='analysis_post_hash_idx'),
+        ]
+    
+    def __str__(self):
+        return f"Analysis for {self.post.title}"
+    
+class AIResult(models.Model):
+    """A cached response of the AI service, see mindscribe_ai.cache."""
+    cache_key = models.CharField(max_length=64, unique=True)
+    operation = models.CharField(max_length=50)
+    model_name = models.CharField(max_length=100)
+    result = models.JSONField()
+    hits = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    last_accessed = models.DateTimeField(db_index=True)
+    expires_at = models.DateTimeField(db_index=True)
+    
+    def __str__(self):
+        return f"{self.operation} result {self.cache_key[:12]}"
+    
+class EnrichmentCheckpoint(models.Model):
+    """Progress of a post enrichment pass, so an interrupted run resumes."""
+    job = models.CharField(max_length=50, unique=True)
+    last_post_id = models.IntegerField(default=0)
+    processed = models.PositiveIntegerField(default=0)
+    failed = models.PositiveIntegerField(default=0)
+    started_at = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    
     def __str__(self):
-        return f"Analysis for {self.post.title}"
\ No newline at end of file
+        return f"{self.job} at post {self.last_post_id}"
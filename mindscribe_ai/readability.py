@@ -0,0 +1,257 @@
+from collections import Counter
+from django.db import transaction
+from functools import lru_cache
+from minscribe_blog.models import Post
+from minscribe_blog.search import tokenize
+from typing import Iterable, List, Optional, Sequence
+from .cache import content_hash
+from .models import ContentAnalysis
+import io
+import re
+
+WORD_RE = re.compile(r"[A-Za-z]+(?:'[A-Za-z]+)?|\d+(?:[.,]\d+)*")
+SENTENCE_END_RE = re.compile(r"[.!?]+(?=\s|$)")
+LINK_RE = re.compile(r"(!?)\[([^\]]*)\]\(\s*<?([^)\s>]+)")
+HEADING_RE = re.compile(r"^\s{0,3}(#{1,6})\s+(.*?)\s*#*\s*$")
+SETEXT_RE = re.compile(r"^\s{0,3}(=+|-+)\s*$")
+LIST_ITEM_RE = re.compile(r"^\s*(?:[-*+]|\d+[.)])\s+")
+VOWEL_GROUP_RE = re.compile(r"[aeiouy]+")
+
+@lru_cache(maxsize=50000)
+def syllables(word: str) -> int:
+    """Vowel-group estimate of a word's syllables, as Flesch formulas expect."""
+    word = word.lower()
+    count = len(VOWEL_GROUP_RE.findall(word))
+    if word.endswith('e') and not word.endswith(('le', 'ee')) and count > 1:
+        count -= 1
+    return max(count, 1)
+
+def _clamp(value: float) -> float:
+    return round(max(0.0, min(100.0, value)), 1)
+
+class ContentAnalyzer:
+    """
+    Local readability, SEO and relevance scores for post markdown.
+
+    One pass over the lines gathers everything the scores need: words,
+    syllables and sentences for Flesch reading ease; headings (ATX and
+    setext); links and images; and keyword occurrences. Fenced code is
+    skipped. Scores are 0-100. The AI service is left with only the
+    qualitative suggestions.
+    """
+
+    KEYWORD_COUNT = 8
+    TARGET_WORDS = 600
+    WORDS_PER_HEADING = 350
+    DENSITY_RANGE = (0.005, 0.025)
+
+    def analyze(self, markdown: str, title: str = '', keywords: Optional[Sequence[str]] = None) -> dict:
+        keywords = [keyword.strip().lower() for keyword in (keywords or []) if keyword.strip()]
+        # Keywords match whole terms, tokenized like the body: "go" is not found in "good"
+        keyword_terms = {keyword: tuple(tokenize(keyword)) for keyword in keywords}
+        phrases = {keyword: parts for keyword, parts in keyword_terms.items() if len(parts) > 1}
+        words = sentences = syllable_count = 0
+        headings = []
+        links = internal_links = external_links = images = images_without_alt = 0
+        terms = Counter()
+        keyword_hits = Counter()
+        in_code = False
+        open_sentence = False
+        previous = ''
+
+        for line in io.StringIO(markdown or ''):
+            line = line.rstrip('\n')
+            if line.lstrip().startswith(('```', '~~~')):
+                in_code = not in_code
+                continue
+            if in_code:
+                continue
+
+            stripped = line.strip()
+            if not stripped:
+                sentences += open_sentence
+                open_sentence = False
+                previous = ''
+                continue
+
+            # Underlined heading: the text line before was already counted as body
+            if previous and SETEXT_RE.match(line):
+                headings.append(previous.lower())
+                sentences += open_sentence
+                open_sentence = False
+                previous = ''
+                continue
+
+            heading = HEADING_RE.match(line)
+            if heading:
+                headings.append(heading.group(2).lower())
+                text = heading.group(2)
+            else:
+                text = line
+
+            for image, label, url in LINK_RE.findall(text):
+                if image:
+                    images += 1
+                    images_without_alt += not label.strip()
+                else:
+                    links += 1
+                    if url.startswith(('http://', 'https://', '//')):
+                        external_links += 1
+                    else:
+                        internal_links += 1
+            text = LINK_RE.sub(lambda match: '' if match.group(1) else match.group(2), text)
+
+            line_words = WORD_RE.findall(text)
+            if not line_words:
+                continue
+            words += len(line_words)
+            syllable_count += sum(syllables(word) for word in line_words if word[0].isalpha())
+            line_terms = tokenize(text)
+            terms.update(line_terms)
+            # Single-term keywords are read off `terms` at the end
+            for keyword, phrase in phrases.items():
+                keyword_hits[keyword] += sum(
+                    1 for start in range(len(line_terms) - len(phrase) + 1)
+                    if tuple(line_terms[start:start + len(phrase)]) == phrase
+                )
+
+            # Headings and list items end a sentence even without punctuation
+            if heading or LIST_ITEM_RE.match(line):
+                sentences += open_sentence + 1
+                open_sentence = False
+            else:
+                # A sentence left open on the line before ends at this line's first stop
+                ends = list(SENTENCE_END_RE.finditer(text))
+                sentences += len(ends)
+                open_sentence = bool(WORD_RE.search(text[ends[-1].end():])) if ends else True
+            previous = stripped if not heading else ''
+
+        sentences += open_sentence
+
+        if not keywords:
+            keywords = [term for term, _ in terms.most_common(self.KEYWORD_COUNT)]
+            keyword_hits = Counter({keyword: terms[keyword] for keyword in keywords})
+        else:
+            for keyword, parts in keyword_terms.items():
+                if len(parts) == 1:
+                    keyword_hits[keyword] = terms[parts[0]]
+
+        metrics = {
+            'words': words,
+            'sentences': sentences,
+            'syllables': syllable_count,
+            'headings': len(headings),
+            'links': links,
+            'internal_links': internal_links,
+            'external_links': external_links,
+            'images': images,
+            'images_without_alt': images_without_alt,
+            'keywords': keywords,
+            'keyword_density': {keyword: round(keyword_hits[keyword] / words, 4) if words else 0.0 for keyword in keywords},
+        }
+        metrics['readability_score'] = self._readability(words, sentences, syllable_count)
+        metrics['seo_score'] = self._seo(metrics, title, headings)
+        metrics['relevance_score'] = self._relevance(title, terms, keywords, keyword_hits)
+        return metrics
+
+    def _readability(self, words: int, sentences: int, syllable_count: int) -> float:
+        """Flesch reading ease: higher is easier, 60-70 is plain English."""
+        if not words:
+            return 0.0
+        return _clamp(206.835 - 1.015 * words / max(sentences, 1) - 84.6 * syllable_count / words)
+
+    def _seo(self, metrics: dict, title: str, headings: List[str]) -> float:
+        words = metrics['words']
+        score = 20 * min(words / self.TARGET_WORDS, 1)
+
+        if headings:
+            score += 8
+            if words / len(headings) <= self.WORDS_PER_HEADING:
+                score += 7
+
+        if metrics['keywords']:
+            primary = metrics['keywords'][0]
+            density = metrics['keyword_density'][primary]
+            low, high = self.DENSITY_RANGE
+            if low <= density <= high:
+                score += 20
+            elif density < low:
+                score += 20 * density / low
+            elif density <= 2 * high:
+                # Past the range reads as keyword stuffing; far past it earns nothing
+                score += 10
+            if primary in title.lower():
+                score += 10
+            if any(primary in heading for heading in headings):
+                score += 5
+
+        if metrics['links']:
+            score += 10
+            if metrics['internal_links'] and metrics['external_links']:
+                score += 5
+
+        if metrics['images']:
+            score += 10 * (1 - metrics['images_without_alt'] / metrics['images'])
+        else:
+            score += 5
+
+        if 30 <= len(title) <= 65:
+            score += 5
+        return _clamp(score)
+
+    def _relevance(self, title: str, terms: Counter, keywords: List[str], keyword_hits: Counter) -> float:
+        """How much of the title and the keywords the body actually covers."""
+        if not terms:
+            return 0.0
+        title_terms = set(tokenize(title))
+        title_coverage = sum(1 for term in title_terms if terms[term]) / len(title_terms) if title_terms else 1.0
+        keyword_coverage = sum(1 for keyword in keywords if keyword_hits[keyword]) / len(keywords) if keywords else 0.0
+        return _clamp(50 * title_coverage + 50 * keyword_coverage)
+
+    def analyze_post(self, post: Post) -> dict:
+        keywords = [keyword for keyword in (post.ai_keywords or '').split(',') if keyword.strip()]
+        return self.analyze(post.markdown_content, post.title, keywords)
+
+    def analyze_posts(self, batch_size: int = 500, post_ids: Optional[Iterable[int]] = None) -> int:
+        """
+        Score every post (or just `post_ids`) into the ContentAnalysis for its
+        current content, creating one without suggestions where none exists.
+        Returns the number of posts scored.
+        """
+        queryset = Post.objects.order_by('post_id')
+        if post_ids is not None:
+            queryset = queryset.filter(post_id__in=list(post_ids))
+
+        last_id = 0
+        scored = 0
+        while True:
+            posts = list(queryset.filter(post_id__gt=last_id).only('post_id', 'title', 'content', 'markdown_content', 'ai_keywords')[:batch_size])
+            if not posts:
+                return scored
+            self._save({post.post_id: (content_hash(post.content), self.analyze_post(post)) for post in posts})
+            last_id = posts[-1].post_id
+            scored += len(posts)
+
+    @transaction.atomic
+    def _save(self, results: dict) -> None:
+        current = {}
+        analyses = ContentAnalysis.objects.filter(post_id__in=results.keys()).order_by('analysis_id').defer('suggestions')
+        for analysis in analyses:
+            if analysis.content_hash == results[analysis.post_id][0]:
+                current[analysis.post_id] = analysis
+
+        created = []
+        for post_id, (digest, metrics) in results.items():
+            analysis = current.get(post_id) or ContentAnalysis(post_id=post_id, content_hash=digest, suggestions='')
+            analysis.readability_score = metrics['readability_score']
+            analysis.seo_score = metrics['seo_score']
+            analysis.relevance_score = metrics['relevance_score']
+            analysis.keywords = metrics['keywords']
+            if analysis.pk is None:
+                created.append(analysis)
+
+        fields = ['readability_score', 'seo_score', 'relevance_score', 'keywords']
+        ContentAnalysis.objects.bulk_update(list(current.values()), fields, batch_size=500)
+        ContentAnalysis.objects.bulk_create(created, batch_size=500)
+
+content_analyzer = ContentAnalyzer()
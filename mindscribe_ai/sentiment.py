@@ -0,0 +1,193 @@
+from django.conf import settings
+from django.db import transaction
+from django.utils.html import strip_tags
+from minscribe_blog.models import Post, Comments
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+import re
+
+TOKEN_RE = re.compile(r"[a-z]+(?:'[a-z]+)?")
+CLAUSE_RE = re.compile(r"[.!?;]+")
+
+# Word weights on a -3..3 scale; SENTIMENT_LEXICON can point at a file of
+# "word<TAB>weight" lines that extends or overrides them
+LEXICON = {
+    'amazing': 3, 'awesome': 3, 'excellent': 3, 'fantastic': 3, 'outstanding': 3, 'superb': 3,
+    'wonderful': 3, 'brilliant': 3, 'love': 3, 'loved': 3, 'perfect': 3, 'best': 3,
+    'great': 2, 'good': 2, 'nice': 2, 'happy': 2, 'enjoy': 2, 'enjoyed': 2, 'helpful': 2,
+    'useful': 2, 'insightful': 2, 'informative': 2, 'impressive': 2, 'recommend': 2, 'beautiful': 2,
+    'thanks': 2, 'thank': 2, 'like': 1, 'liked': 1, 'clear': 1, 'easy': 1, 'interesting': 1,
+    'fine': 1, 'agree': 1, 'benefit': 1, 'success': 2, 'fast': 1, 'fun': 2, 'glad': 2, 'well': 1,
+    'awful': -3, 'terrible': -3, 'horrible': -3, 'worst': -3, 'hate': -3, 'hated': -3,
+    'disgusting': -3, 'useless': -3, 'garbage': -3, 'pathetic': -3,
+    'bad': -2, 'poor': -2, 'wrong': -2, 'broken': -2, 'boring': -2, 'confusing': -2, 'sad': -2,
+    'annoying': -2, 'disappointed': -2, 'disappointing': -2, 'misleading': -2, 'fail': -2,
+    'failed': -2, 'failure': -2, 'stupid': -2, 'waste': -2, 'angry': -2, 'spam': -2,
+    'difficult': -1, 'hard': -1, 'problem': -1, 'problems': -1, 'slow': -1, 'issue': -1,
+    'unclear': -1, 'disagree': -1, 'bug': -1, 'bugs': -1, 'outdated': -1, 'meh': -1,
+}
+NEGATORS = frozenset("""
+    not no never none nobody nothing neither nor without cannot can't don't doesn't didn't
+    isn't wasn't aren't weren't won't wouldn't shouldn't couldn't hasn't haven't hardly
+""".split())
+INTENSIFIERS = {'very': 1.5, 'really': 1.5, 'extremely': 2.0, 'so': 1.3, 'super': 1.5, 'totally': 1.5,
+                'slightly': 0.5, 'somewhat': 0.7, 'barely': 0.5}
+
+class SentimentScorer:
+    """
+    Lexicon sentiment scoring, vectorized over batches of documents.
+
+    The lexicon is compiled into a term index and weight arrays once. A batch
+    is tokenized into one flat array of term ids with the document and
+    clause each token belongs to; negation (a negator within the previous
+    `negation_window` tokens of the same clause flips and damps a word) and
+    intensifiers are array shifts, and per-document sums are a single
+    bincount. Scores are normalised into -1..1 like VADER's compound score.
+    """
+
+    NEGATION_FACTOR = -0.74
+    NORMALIZATION = 15.0
+    THRESHOLD = 0.05
+
+    def __init__(self, lexicon: Optional[Dict[str, float]] = None, negation_window: int = 3) -> None:
+        self.negation_window = negation_window
+        self.compile(lexicon if lexicon is not None else self.load_lexicon())
+
+    @staticmethod
+    def load_lexicon() -> Dict[str, float]:
+        lexicon = dict(LEXICON)
+        path = getattr(settings, 'SENTIMENT_LEXICON', None)
+        if path:
+            with open(path, encoding='utf-8') as lexicon_file:
+                for line in lexicon_file:
+                    word, _, weight = line.strip().partition('\t')
+                    if word and weight:
+                        lexicon[word.lower()] = float(weight.split('\t')[0])
+        return lexicon
+
+    def compile(self, lexicon: Dict[str, float]) -> None:
+        terms = sorted(set(lexicon) | NEGATORS | set(INTENSIFIERS))
+        self.vocabulary = {term: index for index, term in enumerate(terms)}
+        # Unknown tokens map to the extra last slot, which is neutral everywhere
+        self.weights = np.zeros(len(terms) + 1, dtype=np.float32)
+        self.negators = np.zeros(len(terms) + 1, dtype=bool)
+        self.boosts = np.ones(len(terms) + 1, dtype=np.float32)
+        for term, weight in lexicon.items():
+            self.weights[self.vocabulary[term]] = weight
+        for term in NEGATORS:
+            self.negators[self.vocabulary[term]] = True
+        for term, boost in INTENSIFIERS.items():
+            self.boosts[self.vocabulary[term]] = boost
+
+    def score_batch(self, texts: List[str]) -> np.ndarray:
+        """Compound score in -1..1 for every text."""
+        unknown = len(self.weights) - 1
+        ids, docs, clauses = [], [], []
+        clause = 0
+        for doc, text in enumerate(texts):
+            # Negators and intensifiers reach no further than their clause
+            for part in CLAUSE_RE.split(strip_tags(text or '').lower()):
+                tokens = TOKEN_RE.findall(part)
+                ids.extend(self.vocabulary.get(token, unknown) for token in tokens)
+                docs.extend([doc] * len(tokens))
+                clauses.extend([clause] * len(tokens))
+                clause += 1
+        if not ids:
+            return np.zeros(len(texts), dtype=np.float32)
+
+        ids = np.asarray(ids, dtype=np.int64)
+        docs = np.asarray(docs, dtype=np.int64)
+        clauses = np.asarray(clauses, dtype=np.int64)
+        values = self.weights[ids]
+
+        # Intensifiers scale the word right after them
+        boost = np.ones_like(values)
+        boost[1:] = np.where(clauses[1:] == clauses[:-1], self.boosts[ids[:-1]], 1)
+        values *= boost
+
+        negated = np.zeros(len(ids), dtype=bool)
+        is_negator = self.negators[ids]
+        for shift in range(1, self.negation_window + 1):
+            negated[shift:] |= is_negator[:-shift] & (clauses[shift:] == clauses[:-shift])
+        values = np.where(negated, values * self.NEGATION_FACTOR, values)
+
+        totals = np.bincount(docs, weights=values, minlength=len(texts))
+        return (totals / np.sqrt(totals * totals + self.NORMALIZATION)).astype(np.float32)
+
+    def label(self, score: float) -> str:
+        if score >= self.THRESHOLD:
+            return 'positive'
+        if score <= -self.THRESHOLD:
+            return 'negative'
+        return 'neutral'
+
+    def score(self, text: str) -> Tuple[float, str]:
+        value = float(self.score_batch([text])[0])
+        return value, self.label(value)
+
+    # Storage
+
+    def rescore_post(self, post: Post) -> bool:
+        """Store the post's label if it changed; True when a row was written."""
+        _, label = self.score(f"{post.title}\n{post.content}")
+        if label == post.ai_sentiment:
+            return False
+        post.ai_sentiment = label
+        Post.objects.filter(post_id=post.post_id).update(ai_sentiment=label)
+        return True
+
+    def rescore_comment(self, comment: Comments) -> bool:
+        """Store the comment's label and score if they changed; True when a row was written."""
+        value, label = self.score(comment.content)
+        if label == comment.sentiment and comment.sentiment_score is not None and abs(comment.sentiment_score - value) < 1e-6:
+            return False
+        comment.sentiment, comment.sentiment_score = label, value
+        Comments.objects.filter(comment_id=comment.comment_id).update(sentiment=label, sentiment_score=value)
+        return True
+
+    def score_posts(self, batch_size: int = 2000, missing_only: bool = False) -> int:
+        queryset = Post.objects.order_by('post_id')
+        if missing_only:
+            queryset = queryset.filter(ai_sentiment='')
+        updated = 0
+        for rows in self._batches(queryset, 'post_id', ('title', 'content'), batch_size):
+            scores = self.score_batch([f"{title}\n{content}" for _, title, content in rows])
+            with transaction.atomic():
+                Post.objects.bulk_update(
+                    [Post(post_id=row[0], ai_sentiment=self.label(value)) for row, value in zip(rows, scores)],
+                    ['ai_sentiment'],
+                    batch_size=500
+                )
+            updated += len(rows)
+        return updated
+
+    def score_comments(self, batch_size: int = 2000, missing_only: bool = False) -> int:
+        queryset = Comments.objects.order_by('comment_id')
+        if missing_only:
+            queryset = queryset.filter(sentiment='')
+        updated = 0
+        for rows in self._batches(queryset, 'comment_id', ('content',), batch_size):
+            scores = self.score_batch([content for _, content in rows])
+            with transaction.atomic():
+                Comments.objects.bulk_update(
+                    [
+                        Comments(comment_id=row[0], sentiment=self.label(value), sentiment_score=float(value))
+                        for row, value in zip(rows, scores)
+                    ],
+                    ['sentiment', 'sentiment_score'],
+                    batch_size=500
+                )
+            updated += len(rows)
+        return updated
+
+    @staticmethod
+    def _batches(queryset, key: str, fields: tuple, batch_size: int):
+        last_id = 0
+        while True:
+            rows = list(queryset.filter(**{f'{key}__gt': last_id}).values_list(key, *fields)[:batch_size])
+            if not rows:
+                return
+            yield rows
+            last_id = rows[-1][0]
+
+sentiment_scorer = SentimentScorer()
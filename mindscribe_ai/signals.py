@@ -0,0 +1,16 @@
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+from minscribe_blog.models import Post, Comments
+from minscribe_blog.signals import _touches
+from .sentiment import sentiment_scorer
+
+# Sentiment signals: rescore only when the scored text changed
+@receiver(post_save, sender=Post)
+def rescore_post_sentiment(sender, instance, update_fields=None, **kwargs):
+    if _touches(update_fields, {'title', 'content', 'markdown_content'}):
+        sentiment_scorer.rescore_post(instance)
+
+@receiver(post_save, sender=Comments)
+def rescore_comment_sentiment(sender, instance, update_fields=None, **kwargs):
+    if _touches(update_fields, {'content'}):
+        sentiment_scorer.rescore_comment(instance)
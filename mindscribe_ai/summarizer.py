@@ -0,0 +1,124 @@
+from concurrent.futures import ProcessPoolExecutor
+from django.conf import settings
+from django.db import transaction
+from django.utils.html import strip_tags
+from minscribe_blog.models import Post
+from minscribe_blog.search import tokenize
+from typing import Iterable, List, Optional
+import django
+import numpy as np
+import os
+import re
+
+SENTENCE_RE = re.compile(r'(?<=[.!?])\s+')
+# Block boundaries become spaces, or "</p><p>" would glue two sentences together
+BLOCK_TAG_RE = re.compile(r'</?(?:p|div|br|li|ul|ol|h[1-6]|blockquote|pre|table|tr|td|th)\b[^>]*>', re.IGNORECASE)
+
+def plain_text(content: str) -> str:
+    """Post content without markup, with whitespace collapsed."""
+    return ' '.join(strip_tags(BLOCK_TAG_RE.sub(' ', content or '')).split())
+
+class TextRankSummarizer:
+    """
+    Extractive summaries with TextRank.
+
+    Sentences are nodes, weighted by word overlap normalised by sentence
+    length (|Si ∩ Sj| / (log|Si| + log|Sj|)); the summary is the highest
+    ranked sentences in their original order. The similarity matrix is one
+    matrix product over a binary sentence-term matrix, and only the first
+    `sentence_cap` sentences are ranked, so cost per post is bounded no
+    matter how long it is.
+    """
+
+    def __init__(self, max_sentences: int = 3, max_length: int = 300, sentence_cap: Optional[int] = None,
+                 damping: float = 0.85, iterations: int = 50, tolerance: float = 1e-4) -> None:
+        self.max_sentences = max_sentences
+        self.max_length = max_length
+        self.sentence_cap = sentence_cap or getattr(settings, 'SUMMARY_SENTENCE_CAP', 200)
+        self.damping = damping
+        self.iterations = iterations
+        self.tolerance = tolerance
+
+    def summarize(self, content: str) -> str:
+        sentences = [sentence for sentence in SENTENCE_RE.split(plain_text(content)) if sentence][:self.sentence_cap]
+        if len(sentences) <= self.max_sentences:
+            return self._join(sentences)
+
+        chosen = np.argsort(-self.rank(sentences), kind='stable')[:self.max_sentences]
+        return self._join([sentences[index] for index in sorted(chosen)])
+
+    def rank(self, sentences: List[str]) -> np.ndarray:
+        """TextRank score of every sentence."""
+        vocabulary = {}
+        rows, columns = [], []
+        for row, sentence in enumerate(sentences):
+            for term in set(tokenize(sentence)):
+                rows.append(row)
+                columns.append(vocabulary.setdefault(term, len(vocabulary)))
+
+        count = len(sentences)
+        terms = np.zeros((count, max(len(vocabulary), 1)), dtype=np.float32)
+        terms[rows, columns] = 1
+
+        overlap = terms @ terms.T
+        log_length = np.log(np.maximum(terms.sum(axis=1), 1))
+        norm = log_length[:, np.newaxis] + log_length[np.newaxis, :]
+        weights = np.divide(overlap, norm, out=np.zeros_like(overlap), where=norm > 0)
+        np.fill_diagonal(weights, 0)
+
+        # Row-normalise into transition probabilities; isolated sentences link nowhere
+        out_weight = weights.sum(axis=1, keepdims=True)
+        transitions = np.divide(weights, out_weight, out=np.zeros_like(weights), where=out_weight > 0)
+
+        scores = np.full(count, 1 / count, dtype=np.float32)
+        for _ in range(self.iterations):
+            updated = (1 - self.damping) / count + self.damping * (transitions.T @ scores)
+            if np.abs(updated - scores).sum() < self.tolerance:
+                return updated
+            scores = updated
+        return scores
+
+    def _join(self, sentences: List[str]) -> str:
+        summary = ''
+        for sentence in sentences:
+            if summary and len(summary) + len(sentence) + 1 > self.max_length:
+                break
+            summary = f"{summary} {sentence}".strip()
+        return summary[:self.max_length]
+
+    def summarize_posts(self, batch_size: int = 500, workers: Optional[int] = None,
+                        post_ids: Optional[Iterable[int]] = None, missing_only: bool = False) -> int:
+        """
+        Fill Post.ai_summary for every post (or just `post_ids`, or only posts
+        without one), summarizing across a pool of `workers` processes.
+        Returns the number of posts updated.
+        """
+        queryset = Post.objects.order_by('post_id')
+        if post_ids is not None:
+            queryset = queryset.filter(post_id__in=list(post_ids))
+        if missing_only:
+            queryset = queryset.filter(ai_summary='')
+
+        workers = workers or os.cpu_count() or 1
+        last_id = 0
+        updated = 0
+        # Workers set Django up themselves in case the platform spawns rather than forks
+        with ProcessPoolExecutor(max_workers=workers, initializer=django.setup) as executor:
+            while True:
+                rows = list(queryset.filter(post_id__gt=last_id).values_list('post_id', 'content')[:batch_size])
+                if not rows:
+                    return updated
+
+                contents = [content for _, content in rows]
+                chunksize = max(1, len(rows) // (4 * workers))
+                summaries = executor.map(self.summarize, contents, chunksize=chunksize)
+                with transaction.atomic():
+                    Post.objects.bulk_update(
+                        [Post(post_id=post_id, ai_summary=summary) for (post_id, _), summary in zip(rows, summaries)],
+                        ['ai_summary'],
+                        batch_size=500
+                    )
+                last_id = rows[-1][0]
+                updated += len(rows)
+
+summarizer = TextRankSummarizer()
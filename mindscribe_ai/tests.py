@@ -1,3 +1,329 @@
-from django.test import TestCase
+from django.db import connection
+from django.db.models import F
+from django.test import SimpleTestCase, TestCase
+from django.test.utils import CaptureQueriesContext
+from minscribe_blog.models import Post, User
+from .cache import content_hash
+from .client import AIClient
+from .enrichment import EnrichmentJob
+from .exceptions import AIServiceError
+from .fake_server import FakeAIServer
+from .keywords import KeywordExtractor
+from .models import EnrichmentCheckpoint
+from .readability import ContentAnalyzer, syllables
+from .sentiment import SentimentScorer
+from .summarizer import TextRankSummarizer, plain_text
+import asyncio
+import threading
 
-# Create your tests here.
+MESSAGES = [{'role': 'user', 'content': 'Say something about connection pools'}]
+
+def make_post(title='A post', content='<p>Some content</p>', **fields):
+    author, _ = User.objects.get_or_create(username='ada', defaults={'email': 'ada@example.com', 'password': 'x'})
+    return Post.objects.create(author_id=author, title=title, content=content, status='published', **fields)
+
+class AIClientTests(SimpleTestCase):
+    """AIClient against FakeAIServer, served from a loop of its own like a remote API."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server_loop = asyncio.new_event_loop()
+        cls.server_thread = threading.Thread(target=cls.server_loop.run_forever, daemon=True)
+        cls.server_thread.start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server_loop.call_soon_threadsafe(cls.server_loop.stop)
+        cls.server_thread.join()
+        cls.server_loop.close()
+        super().tearDownClass()
+
+    def serve(self, **options):
+        server = FakeAIServer(**options)
+        url = asyncio.run_coroutine_threadsafe(server.start(), self.server_loop).result()
+        self.addCleanup(lambda: asyncio.run_coroutine_threadsafe(server.stop(), self.server_loop).result())
+        return server, url
+
+    def make_client(self, url, **options):
+        options = {'backoff': 0.001, 'max_backoff': 0.01, **options}
+        client = AIClient(url, **options)
+        self.addCleanup(client.close)
+        return client
+
+    def test_retries_failures_until_success(self):
+        server, url = self.serve(fail_first=2)
+        client = self.make_client(url, max_retries=3)
+
+        reply = asyncio.run(client.chat(MESSAGES, model='fake'))
+
+        self.assertTrue(reply.startswith('[fake:'))
+        self.assertEqual(server.requests, 3)
+
+    def test_gives_up_after_max_retries(self):
+        server, url = self.serve(fail_first=10)
+        client = self.make_client(url, max_retries=2)
+
+        with self.assertRaises(AIServiceError) as raised:
+            asyncio.run(client.chat(MESSAGES, model='fake'))
+
+        self.assertEqual(raised.exception.status_code, 503)
+        self.assertEqual(server.requests, 3)
+
+    def test_timeouts_are_retried(self):
+        server, url = self.serve(latency=0.5)
+        client = self.make_client(url, timeout=0.05, max_retries=1)
+
+        with self.assertRaises(AIServiceError):
+            asyncio.run(client.chat(MESSAGES, model='fake'))
+
+        self.assertEqual(server.requests, 2)
+
+    def test_semaphore_bounds_requests_in_flight(self):
+        server, url = self.serve(latency=0.05)
+        client = self.make_client(url, max_concurrency=2)
+
+        async def burst():
+            return await asyncio.gather(*[client.chat(MESSAGES, model='fake') for _ in range(6)])
+
+        self.assertEqual(len(asyncio.run(burst())), 6)
+        self.assertEqual(server.requests, 6)
+        self.assertEqual(server.max_in_flight, 2)
+
+    def test_fail_first_counts_arrivals_under_concurrency(self):
+        server, url = self.serve(fail_first=3, latency=0.05)
+        client = self.make_client(url, max_retries=0)
+
+        async def burst():
+            return await asyncio.gather(*[client.chat(MESSAGES, model='fake') for _ in range(6)], return_exceptions=True)
+
+        results = asyncio.run(burst())
+        self.assertEqual(sum(isinstance(result, AIServiceError) for result in results), 3)
+
+    def test_event_loops_share_one_pool(self):
+        server, url = self.serve()
+        client = self.make_client(url)
+
+        # Each asyncio.run is a fresh loop, as with async views under WSGI
+        asyncio.run(client.chat(MESSAGES, model='fake'))
+        session = client._session
+        asyncio.run(client.chat(MESSAGES, model='fake'))
+
+        self.assertIs(client._session, session)
+        self.assertFalse(session.closed)
+        client.close()
+        self.assertTrue(session.closed)
+
+class RecordingBackend:
+    """Enrichment backend that records the posts it is asked about."""
+
+    def __init__(self, fail=()):
+        self.titles = []
+        self.fail = set(fail)
+
+    async def enrich(self, title, content):
+        self.titles.append(title)
+        if title in self.fail:
+            raise AIServiceError("backend down")
+        return {'summary': f'About {title}', 'keywords': ['one', 'two'], 'sentiment': 'neutral'}
+
+class EnrichmentJobTests(TestCase):
+    """Only changed posts are enriched, and an interrupted pass resumes from its checkpoint."""
+
+    def setUp(self):
+        self.posts = [make_post(title=f'Post {i}') for i in range(5)]
+
+    def test_post_hash_matches_the_result_cache(self):
+        post = self.posts[0]
+        self.assertEqual(post.content_hash, content_hash(post.content))
+
+        # Whitespace-only edits are not content changes
+        post.content = post.content + '  \r\n'
+        post.save()
+        self.assertEqual(post.content_hash, content_hash('<p>Some content</p>'))
+
+    def test_resumes_after_the_last_written_batch(self):
+        backend = RecordingBackend()
+        job = EnrichmentJob(backend, batch_size=2)
+
+        checkpoint = job.run(limit=2)
+        self.assertIsNone(checkpoint.finished_at)
+        self.assertEqual(checkpoint.last_post_id, self.posts[1].pk)
+
+        # A new job picks up where the interrupted one stopped
+        checkpoint = EnrichmentJob(backend, batch_size=2).run()
+        self.assertIsNotNone(checkpoint.finished_at)
+        self.assertEqual(backend.titles, [post.title for post in self.posts])
+        self.assertEqual(checkpoint.processed, 5)
+        self.assertFalse(Post.objects.exclude(ai_enriched_hash=F('content_hash')).exists())
+        self.assertEqual(Post.objects.get(pk=self.posts[3].pk).ai_summary, 'About Post 3')
+
+    def test_next_pass_only_enriches_changed_and_failed_posts(self):
+        with self.assertLogs('mindscribe_ai.enrichment', 'ERROR'):
+            EnrichmentJob(RecordingBackend(fail={'Post 2'})).run()
+        self.assertEqual(EnrichmentCheckpoint.objects.get().failed, 1)
+
+        edited = self.posts[4]
+        edited.content = '<p>Rewritten</p>'
+        edited.save()
+        backend = RecordingBackend()
+        checkpoint = EnrichmentJob(backend).run()
+
+        self.assertEqual(backend.titles, ['Post 2', 'Post 4'])
+        self.assertEqual((checkpoint.processed, checkpoint.failed), (2, 0))
+
+class KeywordExtractorTests(TestCase):
+    """TF-IDF keywords favour what sets a post apart from the rest of the corpus."""
+
+    def setUp(self):
+        self.posts = [
+            make_post(title='Sourdough starter', content='<p>Python sourdough starter, flour, water and more flour in 2024</p>'),
+            make_post(title='Asyncio loops', content='<p>Python asyncio event loops, tasks and coroutines</p>'),
+            make_post(title='Django ORM', content='<p>Python django queries and select related</p>'),
+            make_post(title='Generators', content='<p>Python generators yield lazily</p>'),
+        ]
+        self.extractor = KeywordExtractor(top_k=3)
+
+    def test_common_terms_and_numbers_are_not_keywords(self):
+        statistics = self.extractor.statistics()
+        keywords = self.extractor.extract_text('Sourdough starter', 'Python sourdough starter, flour, water and more flour in 2024', statistics)
+
+        self.assertEqual(keywords, ['sourdough', 'starter', 'flour'])
+        self.assertEqual(statistics.idf[statistics.vocabulary['python']], 0)
+
+    def test_run_matches_extracting_one_post_at_a_time(self):
+        self.assertEqual(self.extractor.run(batch_size=3), 4)
+
+        statistics = self.extractor.statistics()
+        for post in Post.objects.filter(pk__in=[post.pk for post in self.posts]):
+            expected = self.extractor.extract_text(post.title, post.markdown_content, statistics)
+            self.assertEqual(post.ai_keywords, ', '.join(expected))
+
+class TextRankSummarizerTests(SimpleTestCase):
+    """Summaries are the most central sentences, in their original order."""
+
+    CONTENT = (
+        '<p>Python generators yield values lazily.</p><p>My cat sleeps all afternoon.</p>'
+        '<p>Generators in Python save memory by yielding values.</p><p>Lazy values make Python generators cheap.</p>'
+    )
+
+    def test_paragraphs_are_separate_sentences(self):
+        self.assertEqual(plain_text('<p>One.</p><p>Two <b>bold</b>.</p>'), 'One. Two bold.')
+
+    def test_off_topic_sentences_rank_last(self):
+        scores = TextRankSummarizer().rank([
+            'Python generators yield values lazily.',
+            'My cat sleeps all afternoon.',
+            'Generators in Python save memory by yielding values.',
+        ])
+
+        self.assertEqual(scores.argmin(), 1)
+        self.assertAlmostEqual(float(scores[0]), float(scores[2]), places=5)
+
+    def test_summary_keeps_document_order(self):
+        summary = TextRankSummarizer(max_sentences=2).summarize(self.CONTENT)
+
+        self.assertEqual(summary, 'Python generators yield values lazily. Generators in Python save memory by yielding values.')
+
+    def test_length_and_sentence_caps(self):
+        self.assertEqual(TextRankSummarizer(max_length=50).summarize(self.CONTENT), 'Python generators yield values lazily.')
+        # Only the first two sentences are ranked
+        self.assertEqual(TextRankSummarizer(sentence_cap=2).summarize(self.CONTENT), 'Python generators yield values lazily. My cat sleeps all afternoon.')
+
+class SentimentScorerTests(SimpleTestCase):
+    """Negators within the window flip a word; intensifiers scale the next one."""
+
+    def setUp(self):
+        self.scorer = SentimentScorer(lexicon={'good': 2, 'bad': -2})
+
+    def test_negation_flips_and_damps(self):
+        good = self.scorer.score_batch(['good'])[0]
+        not_good = self.scorer.score_batch(['not good'])[0]
+
+        self.assertLess(not_good, 0)
+        self.assertLess(abs(not_good), good)
+        self.assertEqual(self.scorer.score("This isn't bad at all")[1], 'positive')
+
+    def test_negation_window(self):
+        self.assertEqual(self.scorer.score('not one two good')[1], 'negative')
+        self.assertEqual(self.scorer.score('not one two three good')[1], 'positive')
+        # Nor does negation carry into the next sentence
+        self.assertEqual(self.scorer.score('Not now. Bad')[1], 'negative')
+
+    def test_negation_and_intensifiers_stop_at_the_document(self):
+        # The first text ends in a negator and an intensifier; neither reaches the second
+        scores = self.scorer.score_batch(['good, not', 'good', 'so', 'good'])
+        self.assertAlmostEqual(float(scores[1]), float(scores[3]))
+
+    def test_intensifiers_scale_the_next_word(self):
+        self.assertGreater(self.scorer.score_batch(['very good'])[0], self.scorer.score_batch(['good'])[0])
+        self.assertLess(self.scorer.score_batch(['slightly good'])[0], self.scorer.score_batch(['good'])[0])
+
+class SentimentSignalTests(TestCase):
+    """Posts are rescored only when the scored text changes, and only written when the label does."""
+
+    def sentiment_updates(self, save):
+        with CaptureQueriesContext(connection) as queries:
+            save()
+        return [query['sql'] for query in queries if 'SET "ai_sentiment"' in query['sql']]
+
+    def test_new_posts_are_labelled(self):
+        post = make_post(title='Release notes', content='<p>The upgrade was not good. Really terrible and confusing.</p>')
+        self.assertEqual(Post.objects.get(pk=post.pk).ai_sentiment, 'negative')
+
+    def test_other_fields_and_unchanged_labels_skip_the_update(self):
+        post = make_post(title='Great post', content='<p>Helpful and clear.</p>')
+
+        post.views = 10
+        self.assertEqual(self.sentiment_updates(lambda: post.save(update_fields=['views'])), [])
+
+        post.content = '<p>Helpful, clear and useful.</p>'
+        self.assertEqual(self.sentiment_updates(post.save), [])
+
+        post.content = '<p>Useless and wrong.</p>'
+        self.assertEqual(len(self.sentiment_updates(post.save)), 1)
+        self.assertEqual(Post.objects.get(pk=post.pk).ai_sentiment, 'negative')
+
+class ContentAnalyzerTests(SimpleTestCase):
+    """One pass over post markdown yields Flesch, structure and whole-term keyword counts."""
+
+    MARKDOWN = (
+        "# Getting started with Go\n"
+        "\n"
+        "Go is good. Golang ships a good toolchain\n"
+        "that spans two lines.\n"
+        "\n"
+        "- first item\n"
+        "- second item\n"
+        "\n"
+        "```python\n"
+        "ignored code. More code.\n"
+        "```\n"
+        "\n"
+        "A [guide](/docs) and [spec](https://go.dev) with ![](diagram.png). "
+        "The sourdough starter and a sourdough loaf need a starter.\n"
+    )
+
+    def setUp(self):
+        self.metrics = ContentAnalyzer().analyze(self.MARKDOWN, 'Getting started with Go', ['Go', 'sourdough starter'])
+
+    def test_syllables(self):
+        self.assertEqual([syllables(word) for word in ('cat', 'table', 'make', 'reading', 'free')], [1, 2, 1, 2, 1])
+
+    def test_counts_skip_code_and_end_sentences_at_structure(self):
+        metrics = self.metrics
+        self.assertEqual((metrics['words'], metrics['sentences'], metrics['syllables']), (35, 7, 47))
+        self.assertEqual(metrics['headings'], 1)
+        self.assertEqual((metrics['links'], metrics['internal_links'], metrics['external_links']), (2, 1, 1))
+        self.assertEqual((metrics['images'], metrics['images_without_alt']), (1, 1))
+
+    def test_flesch_reading_ease(self):
+        # 206.835 - 1.015 * 35 / 7 - 84.6 * 47 / 35
+        self.assertEqual(self.metrics['readability_score'], 88.2)
+        self.assertEqual(ContentAnalyzer().analyze('The cat sat on the mat.')['readability_score'], 100.0)
+        self.assertEqual(ContentAnalyzer().analyze('')['readability_score'], 0.0)
+
+    def test_keywords_match_whole_terms(self):
+        # "go" is not counted inside "good" or "golang", nor the phrase in "sourdough loaf"
+        self.assertEqual(self.metrics['keyword_density'], {'go': round(2 / 35, 4), 'sourdough starter': round(1 / 35, 4)})
+        self.assertEqual(self.metrics['relevance_score'], 100.0)
@@ -1,37 +1,90 @@
-from django.shortcuts import render
-from rest_framework.decorators import api_view, permission_classes
-from rest_framework.permissions import IsAuthenticated
-from .ai_service import AIContentService
-from django.http import JsonResponse
+from asgiref.sync import sync_to_async
+from django.http import Http404, JsonResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_POST
+from functools import wraps
+from minscribe_blog.models import CognitiveProfile, Post
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from .ai_service import ai_service
+from .exceptions import AIServiceError
+from .readability import content_analyzer
+import json
+
+def _authenticate(request):
+    try:
+        result = JWTAuthentication().authenticate(request)
+    except AuthenticationFailed:
+        return None
+    return result[0] if result else None
+
+def ai_endpoint(view):
+    """
+    Wrap an async AI view: JWT authentication, a JSON body in
+    `request.data`, and AI backend failures returned as JSON errors.
+
+    The views are async so a slow completion awaits on the event loop
+    instead of holding a worker thread. Only the Authorization header is
+    accepted, never the session cookie, which is what makes csrf_exempt safe.
+    """
+    @csrf_exempt
+    @require_POST
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        user = await sync_to_async(_authenticate)(request)
+        if user is None or not user.is_authenticated:
+            return JsonResponse({'detail': 'Authentication credentials were not provided.'}, status=401)
+        request.user = user
+
+        try:
+            request.data = json.loads(request.body or b'{}')
+        except ValueError:
+            return JsonResponse({'error': 'Invalid JSON body'}, status=400)
+
+        try:
+            return await view(request, *args, **kwargs)
+        except AIServiceError as e:
+            return JsonResponse({'error': e.message}, status=e.status_code)
+    return wrapper
 
 # Create your views here.
-class ContentAssistantView:
-    ai_service = AIContentService()
+@ai_endpoint
+async def get_topic_suggestion(request):
+    user_interests = await CognitiveProfile.objects.filter(user_id=request.user.pk).values_list('interest_vectors', flat=True).afirst()
+    trending_topics = await sync_to_async(ai_service.get_trending_topics)(user_interests)
     
-    @api_view(['POST'])
-    @permission_classes([IsAuthenticated])
-    def get_topic_suggestion(self, request):
-        user_interests = request.user.cognitive_profile.interest_vectors
-        trending_topics = ContentAssistantView.ai_service.get_trending_topics(user_interests)
-        
-        suggestions = ContentAssistantView.ai_service.generate_topic_suggestions(user_interests, trending_topics)
-        
-        return JsonResponse({'suggestions': suggestions})
+    suggestions = await ai_service.agenerate_topic_suggestions(user_interests, trending_topics)
     
-    @api_view(['POST'])
-    @permission_classes([IsAuthenticated])
-    def analyze_content(self, request):
-        content = request.data.get('content', '')
-        analysis = ContentAssistantView.ai_service.analyze_content(content)
+    return JsonResponse({'suggestions': suggestions})
 
-        return JsonResponse({'analysis': analysis})
+@ai_endpoint
+async def analyze_content(request):
+    post_id = request.data.get('post_id')
+    if post_id:
+        # Stored analyses are reused while the post content is unchanged
+        post = await Post.objects.filter(pk=post_id).afirst()
+        if post is None:
+            raise Http404("No Post matches the given query.")
+        analysis = await ai_service.aanalyze_post(post)
+        return JsonResponse({
+            'analysis': analysis.suggestions,
+            'analysis_id': analysis.analysis_id,
+            'readability_score': analysis.readability_score,
+            'seo_score': analysis.seo_score,
+            'relevance_score': analysis.relevance_score,
+        })
+    
+    content = request.data.get('content', '')
+    metrics = content_analyzer.analyze(content)
+    analysis = await ai_service.aanalyze_content(content, metrics)
+
+    return JsonResponse({'analysis': analysis, 'metrics': metrics})
+
+@ai_endpoint
+async def improve_content(request):
+    content = request.data.get('content', '')
+    style_guide = request.data.get('style_guide', 'default')
+    
+    improved_content = await ai_service.aimprove_content(content, style_guide)
     
-    @api_view(['POST'])
-    @permission_classes([IsAuthenticated])
-    def improve_content(self, request):
-        content = request.data.get('content', '')
-        style_guide = request.data.get('style_guide', 'default')
-        
-        improved_content = ContentAssistantView.ai_service.improve_content(content, style_guide)
-        
-        return JsonResponse({'improved_content': improved_content})
\ No newline at end of file
+    return JsonResponse({'improved_content': improved_content})
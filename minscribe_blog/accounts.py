@@ -0,0 +1,15 @@
+from typing import Optional
+from .models import User
+
+def blog_user(account) -> Optional[User]:
+    """
+    The minscribe_blog User behind an authenticated django.contrib.auth
+    account, matched on username. None for anonymous requests and for
+    accounts without a blog user. The result is memoized on the account,
+    which lives as long as the request.
+    """
+    if account is None or not account.is_authenticated:
+        return None
+    if '_blog_user' not in account.__dict__:
+        account._blog_user = User.objects.filter(username=account.get_username()).first()
+    return account._blog_user
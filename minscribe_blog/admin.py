@@ -2,6 +2,7 @@ from django.contrib import admin
 from .models import User, Post, Comments, Tag, PostTag, Category, PostCategory, CognitiveProfile, VersionHistory, Collaboration
 from django.db import models
 from tinymce.widgets import TinyMCE
+from .search import search_index
 # Register your models here.
 @admin.register(User)
 class UserAdmin(admin.ModelAdmin):
@@ -28,6 +29,12 @@ class PostAdmin(admin.ModelAdmin):
     search_fields = ['title', 'content']
     actions = ['make_published']
     
+    def get_search_results(self, request, queryset, search_term):
+        # Use the inverted index instead of icontains scans over post bodies
+        if not search_term:
+            return queryset, False
+        return queryset.filter(post_id__in=search_index.search_ids(search_term, 'post')), False
+    
     def save_model(self, request, obj, form, change):
         if not change:
             obj.author_id = request.user
@@ -45,6 +52,11 @@ class CommentAdmin(admin.ModelAdmin):
     list_filter = ('publication_date',)
     search_fields = ('content',)
     readonly_fields = ('publication_date', 'last_edited', 'likes', 'dislikes')
+    
+    def get_search_results(self, request, queryset, search_term):
+        if not search_term:
+            return queryset, False
+        return queryset.filter(comment_id__in=search_index.search_ids(search_term, 'comment')), False
 
 @admin.register(Tag)
 class TagAdmin(admin.ModelAdmin):
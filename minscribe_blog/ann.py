@@ -0,0 +1,272 @@
+from contextlib import contextmanager
+from django.conf import settings
+from pathlib import Path
+from typing import Iterable, List, Optional, Tuple
+from .models import Post
+from .vectors import VECTOR_DIM, post_vector
+import logging
+import numpy as np
+import os
+import shutil
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:  # Windows: writers in one process are still serialised
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+class PostANNIndex:
+    """
+    Inverted-file (IVF) approximate nearest-neighbour index over post vectors.
+
+    build() clusters the vectors with spherical k-means into about sqrt(n)
+    lists and stores the rows sorted by list, so every list is one contiguous
+    slice. A query scores only the `nprobe` lists whose centroids are closest,
+    plus the tail of rows inserted since the build.
+
+    Arrays live in .npy files opened with mmap_mode, so every worker shares
+    one copy through the page cache. Each build writes a fresh generation
+    directory and atomically repoints CURRENT at it; readers notice and
+    reopen. Saving a post appends its new vector to the tail and retires its
+    old row in place, under a file lock; the tail is folded into the lists by
+    the next build.
+    """
+
+    # meta.npy slots
+    COUNT, BUILT, CAPACITY = 0, 1, 2
+
+    def __init__(self, path: Optional[str] = None, nprobe: Optional[int] = None, dim: int = VECTOR_DIM) -> None:
+        self.path = Path(path or getattr(settings, 'ANN_INDEX_DIR', Path(settings.BASE_DIR) / 'ann_index'))
+        self.nprobe = nprobe or getattr(settings, 'ANN_INDEX_NPROBE', 8)
+        self.dim = dim
+        self._lock = threading.Lock()
+        self._current = None
+        self._arrays = None
+
+    # Files
+
+    def _generation(self) -> Optional[Tuple[str, int]]:
+        try:
+            pointer = self.path / 'CURRENT'
+            return pointer.read_text().strip(), pointer.stat().st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    def _load(self, directory: Path, mode: str) -> dict:
+        return {name: np.load(directory / f'{name}.npy', mmap_mode=mode) for name in ('meta', 'centroids', 'offsets', 'ids', 'vectors')}
+
+    def _open(self) -> Optional[dict]:
+        """Read-only views of the current generation, reopened after a rebuild."""
+        current = self._generation()
+        if current is None:
+            return None
+        with self._lock:
+            if current != self._current:
+                self._arrays = self._load(self.path / current[0], 'r')
+                self._current = current
+            return self._arrays
+
+    @contextmanager
+    def _writing(self):
+        """Exclusive access across processes while inserting or rebuilding."""
+        self.path.mkdir(parents=True, exist_ok=True)
+        with self._lock, open(self.path / 'lock', 'a') as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    # Building
+
+    def _kmeans(self, vectors: np.ndarray, clusters: int, iterations: int = 10, sample: int = 50000) -> np.ndarray:
+        rng = np.random.default_rng(0)
+        if len(vectors) > sample:
+            vectors = vectors[rng.choice(len(vectors), sample, replace=False)]
+        centroids = vectors[rng.choice(len(vectors), clusters, replace=False)].copy()
+        for _ in range(iterations):
+            assignment = self._assign(vectors, centroids)
+            order = np.argsort(assignment, kind='stable')
+            members, starts = np.unique(assignment[order], return_index=True)
+            # Clusters left empty keep their previous centroid
+            centroids[members] = np.add.reduceat(vectors[order], starts, axis=0)
+            centroids /= np.maximum(np.linalg.norm(centroids, axis=1, keepdims=True), 1e-12)
+        return centroids
+
+    @staticmethod
+    def _assign(vectors: np.ndarray, centroids: np.ndarray, block: int = 8192) -> np.ndarray:
+        return np.concatenate([
+            np.argmax(vectors[start:start + block] @ centroids.T, axis=1)
+            for start in range(0, len(vectors), block)
+        ]) if len(vectors) else np.empty(0, dtype=np.int64)
+
+    def build(self, ids: np.ndarray, vectors: np.ndarray, lists: Optional[int] = None) -> int:
+        """Replace the index with these unit vectors. Returns the number indexed."""
+        keep = vectors.any(axis=1)
+        ids, vectors = ids[keep].astype(np.int64), np.ascontiguousarray(vectors[keep], dtype=np.float32)
+        count = len(ids)
+        lists = max(1, min(lists or int(np.sqrt(count)), count))
+
+        if count:
+            centroids = self._kmeans(vectors, lists)
+            assignment = self._assign(vectors, centroids)
+        else:
+            centroids = np.zeros((1, self.dim), dtype=np.float32)
+            assignment = np.empty(0, dtype=np.int64)
+        order = np.argsort(assignment, kind='stable')
+        offsets = np.searchsorted(assignment[order], np.arange(len(centroids) + 1)).astype(np.int64)
+
+        # Room for inserts until the next build
+        capacity = count + max(1024, count // 4)
+        all_ids = np.full(capacity, -1, dtype=np.int64)
+        all_ids[:count] = ids[order]
+        all_vectors = np.zeros((capacity, self.dim), dtype=np.float32)
+        all_vectors[:count] = vectors[order]
+
+        with self._writing():
+            name = f'gen-{time.time_ns()}'
+            directory = self.path / name
+            directory.mkdir()
+            np.save(directory / 'meta.npy', np.array([count, count, capacity], dtype=np.int64))
+            np.save(directory / 'centroids.npy', centroids)
+            np.save(directory / 'offsets.npy', offsets)
+            np.save(directory / 'ids.npy', all_ids)
+            np.save(directory / 'vectors.npy', all_vectors)
+
+            pointer = self.path / 'CURRENT.tmp'
+            pointer.write_text(name)
+            os.replace(pointer, self.path / 'CURRENT')
+
+            # Processes still mapping an old generation keep reading it until they reopen
+            for old in self.path.glob('gen-*'):
+                if old.name != name:
+                    shutil.rmtree(old, ignore_errors=True)
+        logger.info(f"Built post ANN index: {count} posts in {len(centroids)} lists")
+        return count
+
+    def build_from_posts(self, lists: Optional[int] = None) -> int:
+        rows = Post.objects.filter(status='published').values_list('post_id', 'title', 'ai_keywords', 'markdown_content')
+        ids, vectors = [], []
+        for post_id, title, keywords, markdown in rows.iterator(chunk_size=2000):
+            ids.append(post_id)
+            vectors.append(post_vector(title, keywords, markdown, self.dim))
+        matrix = np.asarray(vectors, dtype=np.float32).reshape(-1, self.dim)
+        return self.build(np.asarray(ids, dtype=np.int64), matrix, lists)
+
+    # Incremental updates
+
+    def add(self, post_id: int, vector: np.ndarray) -> bool:
+        """Index a post's new vector, retiring its old one. False when there is no room or no index."""
+        # Until an index is built there is nothing to update: no files, no lock
+        if self._generation() is None:
+            return False
+        with self._writing():
+            current = self._generation()
+            if current is None:
+                return False
+            arrays = self._load(self.path / current[0], 'r+')
+            meta, ids = arrays['meta'], arrays['ids']
+            count = int(meta[self.COUNT])
+            ids[:count][ids[:count] == post_id] = -1
+
+            if not vector.any():
+                ids.flush()
+                return True
+            if count >= meta[self.CAPACITY]:
+                ids.flush()
+                logger.warning(f"Post ANN index is full; post {post_id} is missing until the next build")
+                return False
+
+            arrays['vectors'][count] = vector
+            arrays['vectors'].flush()
+            ids[count] = post_id
+            ids.flush()
+            # Publish the row last, so readers never see it half written
+            meta[self.COUNT] = count + 1
+            meta.flush()
+            return True
+
+    def add_post(self, post: Post) -> bool:
+        return self.add(post.post_id, post_vector(post.title, post.ai_keywords, post.markdown_content, self.dim))
+
+    def remove(self, post_id: int) -> None:
+        self.add(post_id, np.zeros(self.dim, dtype=np.float32))
+
+    def refresh(self, post_ids: Iterable[int]) -> int:
+        """
+        Re-index posts changed by bulk writes, which skip the Post signals,
+        under one lock. Returns the number of rows appended.
+        """
+        post_ids = list(post_ids)
+        if not post_ids or self._generation() is None:
+            return 0
+        rows = Post.objects.filter(post_id__in=post_ids, status='published').values_list('post_id', 'title', 'ai_keywords', 'markdown_content')
+        vectors = [(post_id, post_vector(title, keywords, markdown, self.dim)) for post_id, title, keywords, markdown in rows]
+
+        with self._writing():
+            current = self._generation()
+            if current is None:
+                return 0
+            arrays = self._load(self.path / current[0], 'r+')
+            meta, ids = arrays['meta'], arrays['ids']
+            count = start = int(meta[self.COUNT])
+            ids[:count][np.isin(ids[:count], post_ids)] = -1
+
+            for post_id, vector in vectors:
+                if not vector.any():
+                    continue
+                if count >= meta[self.CAPACITY]:
+                    logger.warning(f"Post ANN index is full; post {post_id} and later ones are missing until the next build")
+                    break
+                arrays['vectors'][count] = vector
+                ids[count] = post_id
+                count += 1
+            arrays['vectors'].flush()
+            ids.flush()
+            # Publish the rows last, so readers never see them half written
+            meta[self.COUNT] = count
+            meta.flush()
+            return count - start
+
+    # Queries
+
+    def search(self, vector: np.ndarray, k: int = 5, exclude: Optional[int] = None) -> List[Tuple[int, float]]:
+        """Approximate top-k (post_id, cosine) matches for a unit vector; unrelated (cosine <= 0) rows are left out."""
+        arrays = self._open()
+        if arrays is None or not vector.any():
+            return []
+        meta, offsets, ids, vectors = arrays['meta'], arrays['offsets'], arrays['ids'], arrays['vectors']
+        count, built = int(meta[self.COUNT]), int(meta[self.BUILT])
+
+        centroid_scores = arrays['centroids'] @ vector
+        nprobe = min(self.nprobe, len(centroid_scores))
+        probed = np.argpartition(-centroid_scores, nprobe - 1)[:nprobe]
+        rows = np.concatenate([np.arange(offsets[c], offsets[c + 1]) for c in probed] + [np.arange(built, count)])
+        if not len(rows):
+            return []
+
+        candidates = ids[rows]
+        scores = vectors[rows] @ vector
+        scores[(candidates < 0) | (candidates == exclude)] = -np.inf
+
+        k = min(k, len(rows))
+        best = np.argpartition(-scores, k - 1)[:k]
+        best = best[np.argsort(-scores[best], kind='stable')]
+        return [(int(candidates[i]), float(scores[i])) for i in best if scores[i] > 0]
+
+    def related(self, post: Post, k: int = 5) -> List[Tuple[int, float]]:
+        vector = post_vector(post.title, post.ai_keywords, post.markdown_content, self.dim)
+        return self.search(vector, k, exclude=post.post_id)
+
+    def related_posts(self, post: Post, k: int = 5) -> List[Post]:
+        """Related published posts, best first, loaded with one query."""
+        matches = self.related(post, k)
+        posts = Post.objects.filter(post_id__in=[post_id for post_id, _ in matches], status='published').only('post_id', 'slug', 'title', 'ai_summary').in_bulk()
+        return [posts[post_id] for post_id, _ in matches if post_id in posts]
+
+post_ann_index = PostANNIndex()
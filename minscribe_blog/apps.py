@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class MinscribeBlogConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'minscribe_blog'
+
+    def ready(self):
+        # Register the model signal receivers
+        from . import signals  # noqa: F401
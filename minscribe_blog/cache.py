@@ -0,0 +1,80 @@
+from django.conf import settings
+from django.core.cache import cache
+from typing import Callable
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+class PostRenderCache:
+    """
+    Render-once cache for the article on post detail pages.
+
+    Entries are keyed by post_id, last_edited and a per-post generation
+    number. An edit moves last_edited forward and the Post signals bump the
+    generation, so a stale page can never be looked up again after a change.
+    """
+
+    KEY_PREFIX = 'post_render'
+
+    def __init__(self, timeout: int = None) -> None:
+        self.timeout = timeout if timeout is not None else getattr(settings, 'POST_RENDER_CACHE_TIMEOUT', 60 * 60)
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+    def _generation_key(self, post_id: int) -> str:
+        return f"{self.KEY_PREFIX}:gen:{post_id}"
+
+    def _render_key(self, post) -> str:
+        generation_key = self._generation_key(post.pk)
+        generation = cache.get(generation_key)
+        if generation is None:
+            # Seed from the clock so a lost generation never maps back onto
+            # entries rendered under an earlier one.
+            cache.add(generation_key, time.time_ns(), None)
+            generation = cache.get(generation_key)
+        edited = int(post.last_edited.timestamp() * 1_000_000) if post.last_edited else 0
+        return f"{self.KEY_PREFIX}:{post.pk}:{edited}:{generation}"
+
+    def get_or_render(self, post, render: Callable[[], str]) -> str:
+        """Return the cached HTML for the post, rendering it on a miss."""
+        key = self._render_key(post)
+        html = cache.get(key)
+
+        if html is not None:
+            self._record(hit=True)
+            return html
+
+        self._record(hit=False)
+        html = render()
+        cache.set(key, html, self.timeout)
+        return html
+
+    def invalidate(self, post_id: int) -> None:
+        """Retire every cached render of the post by bumping its generation."""
+        key = self._generation_key(post_id)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, time.time_ns(), None)
+
+    def _record(self, hit: bool) -> None:
+        with self._lock:
+            if hit:
+                self._hits += 1
+            else:
+                self._misses += 1
+
+    def stats(self) -> dict:
+        """Hit/miss counters for this process."""
+        with self._lock:
+            total = self._hits + self._misses
+            return {
+                'hits': self._hits,
+                'misses': self._misses,
+                'hit_rate': (self._hits / total) if total else 0.0,
+            }
+
+post_render_cache = PostRenderCache()
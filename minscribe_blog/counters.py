@@ -0,0 +1,243 @@
+from collections import defaultdict
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, close_old_connections, models, transaction
+from django.db.models import Case, F, Sum, Value, When
+from django.db.models.functions import Coalesce
+from .models import Post, PollChoice, PollChoiceVoteShard
+from .stats import author_stats
+import atexit
+import logging
+import random
+import threading
+
+logger = logging.getLogger(__name__)
+
+class CounterBuffer:
+    """
+    Write-behind accumulator for one integer column.
+
+    Increments are coalesced per primary key in memory and written with a
+    single `UPDATE ... SET field = field + CASE pk WHEN ... END` per batch,
+    either every `flush_interval` seconds or as soon as `max_pending` rows are
+    waiting. At most one interval (or `max_pending` rows) of increments can be
+    lost if the process dies without running its exit handlers.
+
+    `on_flush`, if given, is called with each written batch ({pk: amount})
+    inside the same transaction, so derived totals stay in step.
+    """
+
+    BATCH_SIZE = 500  # rows per UPDATE statement
+
+    def __init__(self, model, field: str, flush_interval: float = 5.0, max_pending: int = 1000, on_flush=None) -> None:
+        self.model = model
+        self.field = field
+        self.on_flush = on_flush
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self._pending = defaultdict(int)
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def incr(self, pk: int, amount: int = 1) -> None:
+        """Queue an increment; it reaches the database on the next flush."""
+        with self._lock:
+            self._pending[pk] += amount
+            should_flush = len(self._pending) >= self.max_pending
+            if self._thread is None:
+                self._start()
+
+        if should_flush:
+            self.flush()
+
+    def pending(self) -> dict:
+        with self._lock:
+            return dict(self._pending)
+
+    def flush(self) -> int:
+        """Write every pending increment. Returns the number of rows updated."""
+        with self._flush_lock:
+            with self._lock:
+                pending, self._pending = self._pending, defaultdict(int)
+
+            if not pending:
+                return 0
+
+            updated = 0
+            # Sorted keys give every worker the same lock order
+            keys = sorted(pending)
+            for start in range(0, len(keys), self.BATCH_SIZE):
+                batch = keys[start:start + self.BATCH_SIZE]
+                try:
+                    updated += self._write({pk: pending[pk] for pk in batch})
+                except Exception:
+                    logger.exception(f"Failed to flush {self.model.__name__}.{self.field} counters; requeueing")
+                    self._requeue({pk: pending[pk] for pk in keys[start:]})
+                    break
+            return updated
+
+    def _write(self, increments: dict) -> int:
+        delta = Case(
+            *[When(pk=pk, then=Value(amount)) for pk, amount in increments.items()],
+            default=Value(0),
+            output_field=models.IntegerField()
+        )
+        with transaction.atomic():
+            updated = self.model.objects.filter(pk__in=increments.keys()).update(**{self.field: F(self.field) + delta})
+            if self.on_flush is not None:
+                self.on_flush(increments)
+        return updated
+
+    def _requeue(self, increments: dict) -> None:
+        with self._lock:
+            for pk, amount in increments.items():
+                self._pending[pk] += amount
+
+    def _start(self) -> None:
+        self._thread = threading.Thread(target=self._run, name=f"{self.field}-counter-flush", daemon=True)
+        self._thread.start()
+        atexit.register(self.stop)
+
+    def _run(self) -> None:
+        while not self._stopped.wait(self.flush_interval):
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("Counter flush thread error")
+            finally:
+                # This thread lives outside the request cycle, so apply
+                # CONN_MAX_AGE to its connection by hand
+                close_old_connections()
+
+    def stop(self) -> None:
+        """Stop the flush thread and write whatever is still pending."""
+        self._stopped.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=self.flush_interval)
+        self.flush()
+
+view_counter = CounterBuffer(
+    Post,
+    'views',
+    flush_interval=getattr(settings, 'VIEW_COUNT_FLUSH_INTERVAL', 5.0),
+    max_pending=getattr(settings, 'VIEW_COUNT_MAX_PENDING', 1000),
+    on_flush=lambda increments: author_stats.apply_post_increments('views', increments),
+)
+
+class PostCounterService:
+    """
+    Like/dislike counters for posts.
+
+    Every increment is an atomic `SET likes = likes + n` on the one column, so
+    concurrent clicks are never lost and the post body is never re-saved. With
+    `buffered=True` increments are coalesced per post in memory first and
+    flushed through a CounterBuffer.
+    """
+
+    FIELDS = ('likes', 'dislikes')
+
+    def __init__(self, buffered: bool = False, flush_interval: float = 1.0, max_pending: int = 1000) -> None:
+        self.buffered = buffered
+        self._buffers = {
+            field: CounterBuffer(
+                Post,
+                field,
+                flush_interval=flush_interval,
+                max_pending=max_pending,
+                on_flush=lambda increments, field=field: author_stats.apply_post_increments(field, increments),
+            )
+            for field in self.FIELDS
+        }
+
+    def increment(self, post_id: int, field: str, amount: int = 1) -> None:
+        if field not in self.FIELDS:
+            raise ValueError(f"Unknown post counter: {field}")
+
+        if self.buffered:
+            self._buffers[field].incr(post_id, amount)
+            return
+
+        with transaction.atomic():
+            Post.objects.filter(pk=post_id).update(**{field: F(field) + amount})
+            author_stats.apply_post_increments(field, {post_id: amount})
+
+    def like(self, post_id: int) -> None:
+        self.increment(post_id, 'likes')
+
+    def dislike(self, post_id: int) -> None:
+        self.increment(post_id, 'dislikes')
+
+    def flush(self) -> int:
+        return sum(buffer.flush() for buffer in self._buffers.values())
+
+post_counters = PostCounterService(
+    buffered=getattr(settings, 'POST_COUNTER_BUFFERED', False),
+    flush_interval=getattr(settings, 'POST_COUNTER_FLUSH_INTERVAL', 1.0),
+)
+
+class ShardedVoteCounter:
+    """
+    Poll vote counter sharded over PollChoiceVoteShard rows.
+
+    Each vote increments one of `shards` rows picked at random, so voters on a
+    hot choice spread their row locks instead of queueing on one row. Totals
+    are summed on read and cached for `results_timeout` seconds per poll.
+    PollChoice.votes is kept as the baseline recorded before sharding.
+    """
+
+    CACHE_PREFIX = 'poll_results'
+
+    def __init__(self, shards: int = 16, results_timeout: int = 2) -> None:
+        self.shards = shards
+        self.results_timeout = results_timeout
+
+    def vote(self, choice_id: int) -> None:
+        shard = random.randrange(self.shards)
+        updated = PollChoiceVoteShard.objects.filter(choice_id=choice_id, shard=shard).update(votes=F('votes') + 1)
+        if updated:
+            return
+
+        # First vote on this shard: create it, or fall back to the update if
+        # another voter created it first
+        try:
+            with transaction.atomic():
+                PollChoiceVoteShard.objects.create(choice_id=choice_id, shard=shard, votes=1)
+        except IntegrityError:
+            PollChoiceVoteShard.objects.filter(choice_id=choice_id, shard=shard).update(votes=F('votes') + 1)
+
+    def results(self, poll_id: int) -> dict:
+        """Vote totals and percentages for every choice of a poll."""
+        key = f"{self.CACHE_PREFIX}:{poll_id}"
+        results = cache.get(key)
+        if results is not None:
+            return results
+
+        choices = list(
+            PollChoice.objects
+            .filter(poll_id=poll_id)
+            .annotate(total=F('votes') + Coalesce(Sum('vote_shards__votes'), 0))
+            .order_by('choice_id')
+            .values('choice_id', 'choice_text', 'total')
+        )
+        total_votes = sum(choice['total'] for choice in choices)
+        results = {
+            'total_votes': total_votes,
+            'choices': [
+                {
+                    'choice_id': choice['choice_id'],
+                    'choice_text': choice['choice_text'],
+                    'votes': choice['total'],
+                    'percentage': round(100 * choice['total'] / total_votes, 1) if total_votes else 0.0,
+                }
+                for choice in choices
+            ],
+        }
+        cache.set(key, results, self.results_timeout)
+        return results
+
+poll_votes = ShardedVoteCounter(
+    shards=getattr(settings, 'POLL_VOTE_SHARDS', 16),
+    results_timeout=getattr(settings, 'POLL_RESULTS_CACHE_TIMEOUT', 2),
+)
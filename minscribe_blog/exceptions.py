@@ -3,4 +3,13 @@ class QuizSubmissionError(Exception):
     def __init__(self, message, status_code=400):
         self.message = message
         self.status_code = status_code
-        super().__init__(self.message)
\ No newline at end of file
+        super().__init__(self.message)
+        
+class EditConflict(Exception):
+    """Raised when a patch is based on a version that is no longer current."""
+    def __init__(self, message, current_version, server_patch=None, status_code=409):
+        self.message = message
+        self.current_version = current_version
+        self.server_patch = server_patch
+        self.status_code = status_code
+        super().__init__(self.message)
@@ -1,4 +1,5 @@
 from django import forms
+from django.conf import settings
 from tinymce.widgets import TinyMCE
 from .models import Post, User, Comments, CognitiveProfile, CollaborationInvite
 
@@ -82,6 +83,19 @@ class CognitiveProfileForm(forms.ModelForm):
             'cognitive_profile': forms.Textarea(attrs={'class': 'form-control'}),
             'social_interactions': forms.Textarea(attrs={'class': 'form-control'})
         }
+        help_texts = {
+            'interest_vectors': 'A list of interests, a {"interest": weight} mapping or a list of numbers.'
+        }
+        
+    def clean_interest_vectors(self):
+        interests = self.cleaned_data.get('interest_vectors')
+        # Dense vectors are stored as given, so they must fit the vector space
+        if isinstance(interests, list) and interests and all(isinstance(value, (int, float)) and not isinstance(value, bool) for value in interests):
+            if len(interests) != settings.INTEREST_VECTOR_DIM:
+                raise forms.ValidationError(f"A numeric interest vector must have {settings.INTEREST_VECTOR_DIM} values.")
+        elif not isinstance(interests, (list, dict, str)):
+            raise forms.ValidationError("Interests must be a list, a mapping or text.")
+        return interests
 
 # A form for updating user profile details with the email being unique across users.
 class UserUpdateForm(forms.ModelForm):
@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from markdownify import markdownify as md
+from minscribe_blog.models import Post
+from minscribe_blog.rendering import render_markdown
+
+class Command(BaseCommand):
+    help = "Fill Post.rendered_html for existing rows, a chunk at a time."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=500, help='Number of posts converted per transaction')
+        parser.add_argument('--all', action='store_true', help='Re-render posts that already have rendered_html')
+
+    def handle(self, *args, **options):
+        chunk_size = options['chunk_size']
+        qs = Post.objects.order_by('post_id').only('post_id', 'content', 'markdown_content', 'rendered_html')
+        if not options['all']:
+            qs = qs.filter(rendered_html='')
+
+        last_id = 0
+        total = 0
+        while True:
+            # Walk the table by primary key so every chunk is an index range scan
+            chunk = list(qs.filter(post_id__gt=last_id)[:chunk_size])
+            if not chunk:
+                break
+
+            for post in chunk:
+                if not post.markdown_content:
+                    post.markdown_content = md(post.content)
+                post.rendered_html = render_markdown(post.markdown_content)
+
+            with transaction.atomic():
+                Post.objects.bulk_update(chunk, ['markdown_content', 'rendered_html'])
+
+            last_id = chunk[-1].post_id
+            total += len(chunk)
+            self.stdout.write(f"Rendered {total} posts (last post_id {last_id})")
+
+        self.stdout.write(self.style.SUCCESS(f"Backfilled rendered HTML for {total} posts"))
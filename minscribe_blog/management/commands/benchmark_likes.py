@@ -0,0 +1,71 @@
+from concurrent.futures import ThreadPoolExecutor
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from minscribe_blog.counters import PostCounterService
+from minscribe_blog.models import Post
+from minscribe_blog.stats import author_stats
+import threading
+import time
+
+class Command(BaseCommand):
+    help = (
+        "Measure like throughput with many concurrent likers hitting one post. The likes go to a "
+        "scratch draft by the same author, deleted afterwards, so real likes are never touched."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('post_id', type=int, help='Post whose author owns the scratch post')
+        parser.add_argument('--likers', type=int, default=100, help='Number of concurrent likers')
+        parser.add_argument('--clicks', type=int, default=20, help='Likes sent by each liker')
+        parser.add_argument('--mode', choices=['naive', 'atomic', 'buffered'], default='atomic',
+                            help='naive: read-modify-write save(); atomic: F() update; buffered: coalesced in memory')
+
+    def handle(self, *args, **options):
+        post_id = options['post_id']
+        likers = options['likers']
+        clicks = options['clicks']
+        mode = options['mode']
+
+        try:
+            author_id = Post.objects.values_list('author_id', flat=True).get(pk=post_id)
+        except Post.DoesNotExist:
+            raise CommandError(f"Post {post_id} does not exist")
+
+        scratch = Post.objects.create(author_id_id=author_id, title='benchmark_likes scratch post', content='', status='draft')
+        try:
+            self.benchmark(scratch.post_id, likers, clicks, mode)
+        finally:
+            scratch.delete()
+            # Naive saves bypass the author totals, so recount rather than trust the increments
+            author_stats.recompute(author_id)
+
+    def benchmark(self, post_id, likers, clicks, mode):
+        service = PostCounterService(buffered=(mode == 'buffered'))
+        start_barrier = threading.Barrier(likers)
+
+        def like_repeatedly(_):
+            start_barrier.wait()
+            try:
+                for _ in range(clicks):
+                    if mode == 'naive':
+                        post = Post.objects.get(pk=post_id)
+                        post.likes += 1
+                        post.save()
+                    else:
+                        service.like(post_id)
+            finally:
+                connection.close()
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=likers) as pool:
+            list(pool.map(like_repeatedly, range(likers)))
+        service.flush()
+        elapsed = time.perf_counter() - started
+
+        expected = likers * clicks
+        recorded = Post.objects.values_list('likes', flat=True).get(pk=post_id)
+
+        self.stdout.write(
+            f"{mode}: {expected} likes from {likers} likers in {elapsed:.2f}s "
+            f"({expected / elapsed:.0f} likes/s), recorded {recorded}, lost {expected - recorded}"
+        )
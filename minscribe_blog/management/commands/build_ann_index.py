@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+from minscribe_blog.ann import post_ann_index
+import time
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild the related-posts ANN index from every published post. Run it "
+        "periodically to fold posts saved since the last build into the lists."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lists', type=int, default=None, help='Number of IVF lists (default: sqrt of the post count)')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        count = post_ann_index.build_from_posts(lists=options['lists'])
+        self.stdout.write(f"Indexed {count} posts in {time.perf_counter() - started:.1f}s at {post_ann_index.path}")
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+from minscribe_blog.models import VersionHistory
+from minscribe_blog.versioning import version_store
+
+class Command(BaseCommand):
+    help = "Rewrite full-text post versions as deltas between periodic snapshots."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--post', type=int, action='append', dest='posts', help='Only compact this post (repeatable)')
+
+    def handle(self, *args, **options):
+        post_ids = options['posts'] or (
+            VersionHistory.objects
+            .filter(is_snapshot=True)
+            .order_by('post_id')
+            .values_list('post_id', flat=True)
+            .distinct()
+        )
+
+        total = 0
+        for post_id in post_ids:
+            changed = version_store.compact(post_id)
+            if changed:
+                self.stdout.write(f"Post {post_id}: {changed} versions rewritten as deltas")
+            total += changed
+
+        self.stdout.write(self.style.SUCCESS(f"Compacted {total} versions"))
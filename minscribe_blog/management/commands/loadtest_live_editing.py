@@ -0,0 +1,154 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from minscribe_blog.models import Collaboration, Post, User, VersionHistory
+from minscribe_blog.realtime import edit_sessions, edit_socket
+from minscribe_blog.versioning import apply_delta, diff
+from rest_framework_simplejwt.tokens import AccessToken
+import asyncio
+import json
+import statistics
+import time
+
+class Command(BaseCommand):
+    help = (
+        "Drive the live editing WebSocket handler in-process with many editors "
+        "rewriting their own line of one scratch post, then check nothing was lost."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--editors', type=int, default=50, help='Number of concurrent editors')
+        parser.add_argument('--edits', type=int, default=20, help='Patches sent by each editor')
+        parser.add_argument('--flush-interval', type=float, default=None, help='Seconds between saves (default: REALTIME_FLUSH_INTERVAL)')
+        parser.add_argument('--keep', action='store_true', help='Keep the scratch post and editors afterwards')
+
+    def handle(self, *args, **options):
+        editors = options['editors']
+        edits = options['edits']
+        if options['flush_interval'] is not None:
+            edit_sessions.flush_interval = options['flush_interval']
+
+        users = [
+            User.objects.get_or_create(
+                username=f'loadtest-editor-{i}',
+                defaults={'email': f'loadtest-editor-{i}@example.com', 'password': '!'}
+            )[0]
+            for i in range(editors)
+        ]
+        # Sockets authenticate the auth account and map it to the blog user by username
+        accounts = [get_user_model().objects.get_or_create(username=user.username)[0] for user in users]
+        post = Post.objects.create(
+            title='Live editing load test',
+            content=''.join(f'editor-{i}: -\n' for i in range(editors)),
+            author_id=users[0],
+        )
+        Collaboration.objects.bulk_create([Collaboration(post=post, user=user, role='editor') for user in users])
+
+        try:
+            stats = asyncio.run(self._run(post.post_id, accounts, edits))
+            content = Post.objects.values_list('content', flat=True).get(pk=post.pk)
+            expected = ''.join(f'editor-{i}: {edits - 1}\n' for i in range(editors))
+            versions = VersionHistory.objects.filter(post=post).count()
+        finally:
+            if not options['keep']:
+                post.delete()
+                User.objects.filter(pk__in=[user.pk for user in users]).delete()
+                get_user_model().objects.filter(pk__in=[account.pk for account in accounts]).delete()
+
+        patches = editors * edits
+        latencies = sorted(stats['latencies'])
+        self.stdout.write(
+            f"{editors} editors sent {patches} patches in {stats['elapsed']:.2f}s "
+            f"({patches / stats['elapsed']:.0f} patches/s); "
+            f"ack latency p50 {statistics.median(latencies) * 1000:.1f}ms, "
+            f"p95 {latencies[int(len(latencies) * 0.95) - 1] * 1000:.1f}ms; "
+            f"{stats['conflicts']} conflicts, {stats['resyncs']} resyncs; "
+            f"{versions} stored versions"
+        )
+        if content == expected:
+            self.stdout.write(self.style.SUCCESS("Saved content matches every editor's last edit"))
+        else:
+            self.stdout.write(self.style.ERROR("Saved content does not match the editors' last edits"))
+
+    async def _run(self, post_id, accounts, edits):
+        stats = {'latencies': [], 'conflicts': 0, 'resyncs': 0}
+        start = asyncio.Event()
+        ready = []
+
+        async def editor(index, account):
+            token = AccessToken.for_user(account)
+            scope = {'type': 'websocket', 'path': f'/ws/posts/{post_id}/edit/', 'query_string': f'token={token}'.encode()}
+            to_server, to_client = asyncio.Queue(), asyncio.Queue()
+            handler = asyncio.create_task(edit_socket(scope, to_server.get, to_client.put))
+
+            await to_server.put({'type': 'websocket.connect'})
+            accepted = await to_client.get()
+            if accepted['type'] != 'websocket.accept':
+                raise RuntimeError(f"Editor {index} was refused: {accepted}")
+            init = json.loads((await to_client.get())['text'])
+            text, revision, pending = init['content'], init['revision'], {}
+
+            def catch_up():
+                nonlocal text, revision
+                while revision + 1 in pending:
+                    revision += 1
+                    text = apply_delta(text, pending.pop(revision))
+
+            async def reply():
+                # Other editors' patches arrive interleaved with our replies
+                while True:
+                    message = json.loads((await to_client.get())['text'])
+                    if message['type'] == 'patch':
+                        pending[message['revision']] = message['patch']
+                    elif message['type'] != 'saved':
+                        return message
+
+            async def wait_for(target):
+                # Our own patch only lands once the ones before it have arrived
+                while revision < target:
+                    message = json.loads((await to_client.get())['text'])
+                    if message['type'] == 'patch':
+                        pending[message['revision']] = message['patch']
+                        catch_up()
+
+            ready.append(index)
+            await start.wait()
+            for edit in range(edits):
+                sent = time.perf_counter()
+                while True:
+                    lines = text.splitlines(keepends=True)
+                    lines[index] = f'editor-{index}: {edit}\n'
+                    patch = diff(text, ''.join(lines))
+                    await to_server.put({'type': 'websocket.receive', 'text': json.dumps({'type': 'patch', 'revision': revision, 'patch': patch})})
+                    message = await reply()
+                    if message['type'] == 'ack':
+                        pending[message['revision']] = message.get('patch', patch)
+                        catch_up()
+                        await wait_for(message['revision'])
+                        break
+                    if message['type'] == 'conflict':
+                        stats['conflicts'] += 1
+                        pending.update({number: ops for number, ops in message['patches']})
+                        catch_up()
+                    elif message['type'] == 'resync':
+                        stats['resyncs'] += 1
+                        text, revision = message['content'], message['revision']
+                        pending = {number: ops for number, ops in pending.items() if number > revision}
+                    else:
+                        raise RuntimeError(f"Editor {index} got {message}")
+                stats['latencies'].append(time.perf_counter() - sent)
+
+            await to_server.put({'type': 'websocket.disconnect', 'code': 1000})
+            await handler
+
+        tasks = [asyncio.create_task(editor(index, account)) for index, account in enumerate(accounts)]
+        while len(ready) < len(accounts):
+            await asyncio.sleep(0.01)
+            for task in tasks:
+                if task.done():
+                    task.result()
+
+        started = time.perf_counter()
+        start.set()
+        await asyncio.gather(*tasks)
+        stats['elapsed'] = time.perf_counter() - started
+        return stats
@@ -0,0 +1,9 @@
+from django.core.management.base import BaseCommand
+from minscribe_blog.stats import author_stats
+
+class Command(BaseCommand):
+    help = "Recompute every AuthorStats row from the posts table."
+
+    def handle(self, *args, **options):
+        count = author_stats.rebuild()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt stats for {count} authors"))
@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+from minscribe_blog.search import search_index
+
+class Command(BaseCommand):
+    help = "Rebuild the post and comment search index from scratch."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=500, help='Number of objects indexed per batch')
+
+    def handle(self, *args, **options):
+        posts, comments = search_index.rebuild(chunk_size=options['chunk_size'])
+        self.stdout.write(self.style.SUCCESS(f"Indexed {posts} posts and {comments} comments"))
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+from minscribe_blog.recommendations import RecommendationEngine
+import time
+
+class Command(BaseCommand):
+    help = "Recompute every reader's post recommendations from their interest vectors."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--k', type=int, default=None, help='Recommendations per reader (default: RECOMMENDATIONS_PER_USER)')
+        parser.add_argument('--block-size', type=int, default=256, help='Readers scored per matrix multiply')
+        parser.add_argument('--user', type=int, action='append', dest='user_ids', help='Only this reader (repeatable)')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        engine = RecommendationEngine(k=options['k'], block_size=options['block_size'])
+        written = engine.recompute(user_ids=options['user_ids'])
+        self.stdout.write(f"Wrote {written} recommendations in {time.perf_counter() - started:.1f}s")
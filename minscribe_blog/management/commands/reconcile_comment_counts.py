@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, F
+from minscribe_blog.models import Post
+
+class Command(BaseCommand):
+    help = "Fix Post.comment_count values that have drifted from the real number of comments."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='Number of posts written per UPDATE batch')
+        parser.add_argument('--dry-run', action='store_true', help='Report drifted posts without fixing them')
+
+    def handle(self, *args, **options):
+        # One grouped query finds every post whose stored count is wrong
+        drifted = list(
+            Post.objects
+            .annotate(actual=Count('comments'))
+            .exclude(comment_count=F('actual'))
+            .only('post_id', 'comment_count')
+        )
+
+        for post in drifted:
+            self.stdout.write(f"Post {post.post_id}: stored {post.comment_count}, actual {post.actual}")
+            post.comment_count = post.actual
+
+        if drifted and not options['dry_run']:
+            with transaction.atomic():
+                Post.objects.bulk_update(drifted, ['comment_count'], batch_size=options['batch_size'])
+
+        verb = "Found" if options['dry_run'] else "Fixed"
+        self.stdout.write(self.style.SUCCESS(f"{verb} {len(drifted)} posts with a drifted comment count"))
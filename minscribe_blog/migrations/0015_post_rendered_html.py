@@ -0,0 +1,18 @@
+# Generated by Django 5.1.7 on 2026-10-18 19:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('minscribe_blog', '0014_versionhistory'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='rendered_html',
+            field=models.TextField(blank=True),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.1.7 on 2026-10-18 19:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('minscribe_blog', '0015_post_rendered_html'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='comments',
+            index=models.Index(fields=['post_id', '-publication_date', '-comment_id'], name='comment_post_pubdate_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['-publication_date', '-post_id'], name='post_pubdate_id_idx'),
+        ),
+    ]
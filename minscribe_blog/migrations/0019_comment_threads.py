@@ -0,0 +1,68 @@
+# Generated by Django 5.1.7 on 2026-10-18 19:13
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def path_segment(comment_id):
+    digits = '0123456789abcdefghijklmnopqrstuvwxyz'
+    encoded = ''
+    while comment_id:
+        comment_id, remainder = divmod(comment_id, 36)
+        encoded = digits[remainder] + encoded
+    return encoded.rjust(7, '0')
+
+
+def backfill_thread_roots(apps, schema_editor):
+    # Existing comments have no parent, so each one becomes its own thread
+    Comments = apps.get_model('minscribe_blog', 'Comments')
+    last_id = 0
+    while True:
+        chunk = list(Comments.objects.filter(comment_id__gt=last_id).order_by('comment_id').only('comment_id')[:1000])
+        if not chunk:
+            break
+        for comment in chunk:
+            comment.path = path_segment(comment.comment_id)
+            comment.thread_root_id = comment.comment_id
+            comment.depth = 0
+        Comments.objects.bulk_update(chunk, ['path', 'thread_root', 'depth'])
+        last_id = chunk[-1].comment_id
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('minscribe_blog', '0018_pollchoicevoteshard'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comments',
+            name='depth',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='comments',
+            name='parent',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='replies', to='minscribe_blog.comments'),
+        ),
+        migrations.AddField(
+            model_name='comments',
+            name='path',
+            field=models.CharField(blank=True, max_length=224),
+        ),
+        migrations.AddField(
+            model_name='comments',
+            name='thread_root',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='thread_comments', to='minscribe_blog.comments'),
+        ),
+        migrations.AddIndex(
+            model_name='comments',
+            index=models.Index(fields=['post_id', 'depth', '-publication_date', '-comment_id'], name='comment_post_thread_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='comments',
+            index=models.Index(fields=['thread_root', 'path'], name='comment_thread_path_idx'),
+        ),
+        migrations.RunPython(backfill_thread_roots, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 5.1.7 on 2026-10-18 19:14
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Sum
+from django.db.models.functions import Coalesce
+
+
+def backfill_author_stats(apps, schema_editor):
+    Post = apps.get_model('minscribe_blog', 'Post')
+    AuthorStats = apps.get_model('minscribe_blog', 'AuthorStats')
+    totals = Post.objects.values('author_id').annotate(
+        post_count=Count('post_id'),
+        total_likes=Coalesce(Sum('likes'), 0),
+        total_views=Coalesce(Sum('views'), 0),
+    )
+    AuthorStats.objects.bulk_create([
+        AuthorStats(
+            author_id=row['author_id'],
+            post_count=row['post_count'],
+            total_likes=row['total_likes'],
+            total_views=row['total_views'],
+        )
+        for row in totals
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('minscribe_blog', '0019_comment_threads'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AuthorStats',
+            fields=[
+                ('author', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='minscribe_blog.user')),
+                ('post_count', models.IntegerField(default=0)),
+                ('total_likes', models.IntegerField(default=0)),
+                ('total_views', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name_plural': 'Author stats',
+            },
+        ),
+        migrations.RunPython(backfill_author_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,90 @@
+# Generated by Django 5.1.7 on 2026-10-18 19:16
+
+from django.db import migrations, models
+from django.utils.dateparse import parse_datetime
+
+
+def move_json_history(apps, schema_editor):
+    """
+    Move every Post.version_history entry into VersionHistory rows.
+
+    Existing rows are renumbered 1..n per post (keeping their order) so the
+    new (post, version_number) constraint holds; JSON entries follow them.
+    Converted rows are stored as full snapshots; run `compact_versions`
+    afterwards to rewrite them as deltas.
+    """
+    Post = apps.get_model('minscribe_blog', 'Post')
+    User = apps.get_model('minscribe_blog', 'User')
+    VersionHistory = apps.get_model('minscribe_blog', 'VersionHistory')
+
+    users = {}
+    for post in Post.objects.only('post_id', 'author_id', 'version_history').iterator(chunk_size=200):
+        existing = list(VersionHistory.objects.filter(post_id=post.post_id).order_by('version_number', 'timestamp', 'id'))
+        for number, version in enumerate(existing, start=1):
+            version.version_number = number
+        VersionHistory.objects.bulk_update(existing, ['version_number'])
+
+        entries = post.version_history or []
+        if not entries:
+            continue
+
+        rows = []
+        timestamps = []
+        for number, entry in enumerate(entries, start=len(existing) + 1):
+            username = entry.get('user')
+            if username not in users:
+                users[username] = User.objects.filter(username=username).values_list('user_id', flat=True).first()
+            rows.append(VersionHistory(
+                post_id=post.post_id,
+                user_id=users[username] or post.author_id_id,
+                content=entry.get('content') or '',
+                is_snapshot=True,
+                reason=f"Collaborative edit ({entry.get('role', 'editor')})",
+                version_number=number,
+            ))
+            timestamps.append(parse_datetime(entry.get('timestamp') or ''))
+
+        VersionHistory.objects.bulk_create(rows)
+
+        # auto_now_add overrode the original edit times on insert
+        restored = []
+        for version in VersionHistory.objects.filter(post_id=post.post_id, version_number__gt=len(existing)).order_by('version_number'):
+            timestamp = timestamps[version.version_number - len(existing) - 1]
+            if timestamp is not None:
+                version.timestamp = timestamp
+                restored.append(version)
+        VersionHistory.objects.bulk_update(restored, ['timestamp'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('minscribe_blog', '0020_authorstats'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='versionhistory',
+            name='delta',
+            field=models.JSONField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='versionhistory',
+            name='is_snapshot',
+            field=models.BooleanField(default=True),
+        ),
+        migrations.AlterField(
+            model_name='versionhistory',
+            name='content',
+            field=models.TextField(blank=True),
+        ),
+        migrations.RunPython(move_json_history, migrations.RunPython.noop),
+        migrations.AlterUniqueTogether(
+            name='versionhistory',
+            unique_together={('post', 'version_number')},
+        ),
+        migrations.RemoveField(
+            model_name='post',
+            name='version_history',
+        ),
+    ]
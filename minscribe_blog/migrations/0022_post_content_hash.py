@@ -0,0 +1,38 @@
+# Generated by Django 5.1.7 on 2026-10-18 19:27
+
+from django.db import migrations, models
+
+
+def hash_existing_content(apps, schema_editor):
+    # Must match what Post.save() stores, or every post would look changed
+    from mindscribe_ai.cache import content_hash
+    Post = apps.get_model('minscribe_blog', 'Post')
+    batch = []
+    for post in Post.objects.only('post_id', 'content').iterator(chunk_size=500):
+        post.content_hash = content_hash(post.content)
+        batch.append(post)
+        if len(batch) >= 500:
+            Post.objects.bulk_update(batch, ['content_hash'])
+            batch = []
+    Post.objects.bulk_update(batch, ['content_hash'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('minscribe_blog', '0021_versionhistory_deltas'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='ai_enriched_hash',
+            field=models.CharField(blank=True, max_length=64),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='content_hash',
+            field=models.CharField(blank=True, max_length=64),
+        ),
+        migrations.RunPython(hash_existing_content, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.1.7 on 2026-10-18 19:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('minscribe_blog', '0022_post_content_hash'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comments',
+            name='sentiment',
+            field=models.CharField(blank=True, max_length=20),
+        ),
+        migrations.AddField(
+            model_name='comments',
+            name='sentiment_score',
+            field=models.FloatField(blank=True, null=True),
+        ),
+    ]
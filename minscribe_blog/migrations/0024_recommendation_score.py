@@ -0,0 +1,22 @@
+# Generated by Django 5.1.7 on 2026-10-18 19:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('minscribe_blog', '0023_comments_sentiment'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recommendation',
+            name='score',
+            field=models.FloatField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='recommendation',
+            index=models.Index(fields=['user_id', 'algorithm_used', '-score'], name='recommendation_user_score_idx'),
+        ),
+    ]
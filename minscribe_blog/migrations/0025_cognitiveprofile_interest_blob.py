@@ -0,0 +1,101 @@
+# Generated by Django 5.1.7 on 2026-10-18 19:37
+
+from collections.abc import Mapping
+from django.conf import settings
+from django.db import migrations, models
+import hashlib
+import numpy as np
+import re
+
+
+# Frozen copy of minscribe_blog.vectors.interest_vector at VECTOR_VERSION 1,
+# so later changes to the live code cannot change what this migration packs.
+# Rows packed here are stamped version 1; if the live version moves on they
+# are re-derived from their JSON at read time.
+VECTOR_VERSION = 1
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+MAX_TERM_LENGTH = 64
+STOP_WORDS = frozenset("""
+    a an and are as at be but by for from has have he her his i if in into is it its
+    of on or our she so that the their them then there these they this to was we were
+    what when where which who will with you your
+""".split())
+
+
+def tokenize(text):
+    if not text:
+        return []
+    return [
+        token[:MAX_TERM_LENGTH]
+        for token in TOKEN_RE.findall(text.lower())
+        if len(token) > 1 and token not in STOP_WORDS
+    ]
+
+
+def term_vector(weights, dim):
+    vector = np.zeros(dim, dtype=np.float32)
+    for term, weight in weights.items():
+        for token in tokenize(term):
+            digest = int.from_bytes(hashlib.blake2b(token.encode('utf-8'), digest_size=8).digest(), 'little')
+            vector[digest % dim] += (1.0 if digest >> 63 else -1.0) * weight
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm > 0 else vector
+
+
+def keyword_weights(keywords):
+    return {keyword: 1 / (1 + rank * 0.25) for rank, keyword in enumerate(keywords)}
+
+
+def interest_vector(interests, dim):
+    if isinstance(interests, Mapping):
+        weights = {}
+        for term, weight in interests.items():
+            try:
+                weights[str(term)] = float(weight)
+            except (TypeError, ValueError):
+                continue
+        return term_vector(weights, dim)
+    if isinstance(interests, (list, tuple)) and interests:
+        if all(isinstance(value, (int, float)) and not isinstance(value, bool) for value in interests):
+            if len(interests) != dim:
+                return np.zeros(dim, dtype=np.float32)
+            vector = np.asarray(interests, dtype=np.float32)
+            norm = np.linalg.norm(vector)
+            return vector / norm if norm > 0 else vector
+        return term_vector(keyword_weights(str(term) for term in interests), dim)
+    if isinstance(interests, str):
+        return term_vector(keyword_weights(term.strip() for term in interests.split(',')), dim)
+    return np.zeros(dim, dtype=np.float32)
+
+
+def pack_existing_interests(apps, schema_editor):
+    dim = getattr(settings, 'INTEREST_VECTOR_DIM', 256)
+    CognitiveProfile = apps.get_model('minscribe_blog', 'CognitiveProfile')
+    batch = []
+    for profile in CognitiveProfile.objects.only('cognitive_profile_id', 'interest_vectors').iterator(chunk_size=500):
+        vector = interest_vector(profile.interest_vectors, dim)
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('minscribe_blog', '0024_recommendation_score'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cognitiveprofile',
+            name='interest_blob',
+            field=models.BinaryField(blank=True, default=bytes),
+        ),
+        migrations.AddField(
+            model_name='cognitiveprofile',
+            name='interest_dim',
+            field=models.PositiveSmallIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='cognitiveprofile',
+            name='interest_version',
+            field=models.PositiveSmallIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(pack_existing_interests, migrations.RunPython.noop),
+    ]
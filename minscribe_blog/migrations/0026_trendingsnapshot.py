@@ -0,0 +1,26 @@
+# Generated by Django 5.1.7 on 2026-10-18 19:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('minscribe_blog', '0025_cognitiveprofile_interest_blob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TrendingSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('topic', models.CharField(max_length=100)),
+                ('bucket', models.DateTimeField()),
+                ('count', models.FloatField(default=0)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['bucket'], name='trending_bucket_idx')],
+                'unique_together': {('topic', 'bucket')},
+            },
+        ),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 5.1.7 on 2026-10-18 20:21
+
+from django.db import migrations, models
+from django.utils.text import slugify
+
+
+def slug_existing_posts(apps, schema_editor):
+    # Same scheme as Post.unique_slug(), oldest post keeping the bare slug
+    Post = apps.get_model('minscribe_blog', 'Post')
+    taken = set()
+    batch = []
+    for post in Post.objects.only('post_id', 'title').order_by('post_id').iterator(chunk_size=500):
+        base = slugify(post.title)[:200].strip('-') or 'post'
+        slug, number = base, 2
+        while slug in taken:
+            slug, number = f'{base}-{number}', number + 1
+        taken.add(slug)
+        post.slug = slug
+        batch.append(post)
+        if len(batch) >= 500:
+            Post.objects.bulk_update(batch, ['slug'])
+            batch = []
+    Post.objects.bulk_update(batch, ['slug'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('minscribe_blog', '0026_trendingsnapshot'),
+    ]
+
+    operations = [
+        # Added without the unique constraint, which every existing row's
+        # empty default would violate, then filled in and made unique
+        migrations.AddField(
+            model_name='post',
+            name='slug',
+            field=models.SlugField(blank=True, max_length=220),
+        ),
+        migrations.RunPython(slug_existing_posts, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='post',
+            name='slug',
+            field=models.SlugField(blank=True, max_length=220, unique=True),
+        ),
+    ]
@@ -1,9 +1,12 @@
 from django.db import models
 from django.core.exceptions import ValidationError
 from django.utils import timezone
+from django.utils.text import slugify
 from django.conf import settings
 from markdownify import markdownify as md
 from tinymce.models import HTMLField
+from .rendering import render_markdown
+import numpy as np
 # Create your models here.
 
 def validate_image_size(value):
@@ -39,13 +42,30 @@ ensures old profile pictures are deleted when updated.
         except User.DoesNotExist:
             pass
         super(User, self).save(*args, **kwargs)
+        
+class AuthorStats(models.Model):
+    # Kept up to date incrementally by stats.AuthorStatsService
+    author = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name='stats')
+    post_count = models.IntegerField(default=0)
+    total_likes = models.IntegerField(default=0)
+    total_views = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        verbose_name_plural = 'Author stats'
+    
+    def __str__(self):
+        return f"Stats for {self.author}"
     
 class Post(models.Model):
     post_id = models.AutoField(primary_key=True, null=False)
     author_id = models.ForeignKey(User, on_delete=models.CASCADE, null=False)
     title = models.CharField(max_length=200, null=False)
+    # URL key of the post pages, derived from the title on first save
+    slug = models.SlugField(max_length=220, unique=True, blank=True)
     content = HTMLField(null=False)
     markdown_content = models.TextField(blank=True)
+    rendered_html = models.TextField(blank=True)
     publication_date = models.DateTimeField(auto_now_add=True, null=False)
     last_edited = models.DateTimeField(auto_now=True, null=False)
     likes = models.IntegerField(default=0, null=False)
@@ -59,19 +79,52 @@ class Post(models.Model):
     ai_keywords = models.TextField(blank=True)
     ai_sentiment = models.CharField(max_length=20, blank=True)
     ai_translation = models.TextField(blank=True)
+    # mindscribe_ai.cache.content_hash() of content, and of the content the
+    # ai_* fields were derived from; posts where the two differ are due for
+    # enrichment
+    content_hash = models.CharField(max_length=64, blank=True)
+    ai_enriched_hash = models.CharField(max_length=64, blank=True)
     has_poll = models.BooleanField(default=False)
     has_quiz = models.BooleanField(default=False)
     has_livestream = models.BooleanField(default=False)
     collaborators = models.ManyToManyField(User, through='Collaboration', related_name='collaborative_posts')
     original_author = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, related_name='original_posts')
     is_collaborative = models.BooleanField(default=False)
-    version_history = models.JSONField(default=list)
     created_at = models.DateTimeField(auto_now_add=True)
     
+    class Meta:
+        indexes = [
+            # Backs keyset pagination of the post list
+            models.Index(fields=['-publication_date', '-post_id'], name='post_pubdate_id_idx'),
+        ]
+    
     def save(self, *args, **kwargs):
-        self.markdown_content = md(self.content)
+        # Convert and sanitize once at write time so reads never touch markdown.
+        # Saves limited to other columns (counters, flags) skip the conversion.
+        update_fields = kwargs.get('update_fields')
+        if not self.slug and update_fields is None:
+            self.slug = self.unique_slug(self.title)
+        if update_fields is None or 'content' in update_fields:
+            self.markdown_content = md(self.content)
+            self.rendered_html = render_markdown(self.markdown_content)
+            # The same hash the AI result cache and ContentAnalysis use, so
+            # enrichment and caching agree on what counts as a change
+            from mindscribe_ai.cache import content_hash
+            self.content_hash = content_hash(self.content)
+            if update_fields is not None:
+                kwargs['update_fields'] = set(update_fields) | {'markdown_content', 'rendered_html', 'content_hash'}
         super().save(*args, **kwargs)
     
+    @classmethod
+    def unique_slug(cls, title: str) -> str:
+        """Slug of the title, numbered when another post already has it."""
+        base = slugify(title)[:200].strip('-') or 'post'
+        taken = set(cls.objects.filter(slug__startswith=base).values_list('slug', flat=True))
+        slug, number = base, 2
+        while slug in taken:
+            slug, number = f'{base}-{number}', number + 1
+        return slug
+    
     def __str__(self):
         return self.title
 
@@ -104,6 +157,18 @@ class PostCategory(models.Model):
     def __str__(self):
         return f"{self.post_id} - {self.category_id}"
     
+PATH_SEGMENT_LENGTH = 7
+MAX_THREAD_DEPTH = 32
+
+def path_segment(comment_id):
+    """Fixed-width base36 encoding of a comment id for materialized paths."""
+    digits = '0123456789abcdefghijklmnopqrstuvwxyz'
+    encoded = ''
+    while comment_id:
+        comment_id, remainder = divmod(comment_id, 36)
+        encoded = digits[remainder] + encoded
+    return encoded.rjust(PATH_SEGMENT_LENGTH, '0')
+
 class Comments(models.Model):
     comment_id = models.AutoField(primary_key=True, null=False)
     post_id = models.ForeignKey(Post, on_delete=models.CASCADE, null=False)
@@ -115,10 +180,45 @@ class Comments(models.Model):
     dislikes = models.IntegerField(default=0, null=False)
     moderation_flagged = models.BooleanField(default=False, null=False)
     moderation_reason = models.TextField(blank=True)
+    parent = models.ForeignKey('self', on_delete=models.CASCADE, null=True, blank=True, related_name='replies')
+    # Materialized path: one fixed-width segment per ancestor, so a subtree is
+    # a prefix match and sorting by path yields depth-first thread order
+    thread_root = models.ForeignKey('self', on_delete=models.CASCADE, null=True, blank=True, related_name='thread_comments')
+    path = models.CharField(max_length=PATH_SEGMENT_LENGTH * MAX_THREAD_DEPTH, blank=True)
+    depth = models.PositiveSmallIntegerField(default=0)
+    # Lexicon sentiment, rescored whenever the content changes
+    sentiment = models.CharField(max_length=20, blank=True)
+    sentiment_score = models.FloatField(null=True, blank=True)
     
     class Meta:
         verbose_name = 'Comment'
         verbose_name_plural = 'Comments'
+        indexes = [
+            # Backs keyset pagination of a post's comments
+            models.Index(fields=['post_id', '-publication_date', '-comment_id'], name='comment_post_pubdate_id_idx'),
+            # Backs paging through a post's top-level threads
+            models.Index(fields=['post_id', 'depth', '-publication_date', '-comment_id'], name='comment_post_thread_idx'),
+            # Loads a whole thread, or a subtree by path prefix, in path order
+            models.Index(fields=['thread_root', 'path'], name='comment_thread_path_idx'),
+        ]
+
+    def save(self, *args, **kwargs):
+        creating = self._state.adding
+        if creating and self.parent_id:
+            parent = self.parent
+            if parent.depth + 1 >= MAX_THREAD_DEPTH:
+                raise ValidationError(f"Replies cannot be nested more than {MAX_THREAD_DEPTH} levels deep")
+            self.depth = parent.depth + 1
+            self.thread_root_id = parent.thread_root_id or parent.pk
+        super().save(*args, **kwargs)
+        
+        if creating:
+            # The path ends with this comment's own id, known only after insert
+            prefix = self.parent.path if self.parent_id else ''
+            self.path = prefix + path_segment(self.pk)
+            if not self.parent_id:
+                self.thread_root_id = self.pk
+            Comments.objects.filter(pk=self.pk).update(path=self.path, thread_root=self.thread_root_id, depth=self.depth)
 
     def __str__(self):
         return f"{self.author_id} - {self.post_id}"
@@ -134,11 +234,42 @@ class CognitiveProfile(models.Model):
     cognitive_profile_id = models.AutoField(primary_key=True, null=False)
     user_id = models.ForeignKey(User, on_delete=models.CASCADE, null=False)
     interest_vectors = models.JSONField(null=False)
+    # interest_vectors packed as little-endian float32 on save, so batch jobs
+    # load vectors without parsing JSON. Stale once interest_version or
+    # interest_dim stop matching minscribe_blog.vectors
+    interest_blob = models.BinaryField(default=bytes, blank=True, editable=False)
+    interest_dim = models.PositiveSmallIntegerField(default=0, editable=False)
+    interest_version = models.PositiveSmallIntegerField(default=0, editable=False)
     learning_style = models.CharField(max_length=50, null=False, choices=LEARNING_STYLE_CHOICES)
     content_preferences = models.JSONField(null=False)
     cognitive_profile = models.JSONField(null=False)
     social_interactions = models.JSONField(null=False)
     
+    def save(self, *args, **kwargs):
+        # Saves limited to other columns skip the packing
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or 'interest_vectors' in update_fields:
+            self.pack_interests()
+            if update_fields is not None:
+                kwargs['update_fields'] = set(update_fields) | {'interest_blob', 'interest_dim', 'interest_version'}
+        super().save(*args, **kwargs)
+    
+    def pack_interests(self):
+        # vectors imports the search index, which imports this module
+        from .vectors import VECTOR_VERSION, interest_vector
+        vector = interest_vector(self.interest_vectors)
+        self.interest_blob = vector.astype('<f4').tobytes()
+        self.interest_dim = len(vector)
+        self.interest_version = VECTOR_VERSION
+    
+    @property
+    def interest_array(self) -> np.ndarray:
+        """Read-only float32 view of the packed interests, repacked first when stale."""
+        from .vectors import VECTOR_DIM, VECTOR_VERSION
+        if self.interest_version != VECTOR_VERSION or self.interest_dim != VECTOR_DIM:
+            self.pack_interests()
+        return np.frombuffer(self.interest_blob, dtype='<f4')
+    
     def __str__(self):
         return f"{self.user_id} - {self.learning_style}"
     
@@ -150,6 +281,13 @@ class Recommendation(models.Model):
     recommendation_date = models.DateTimeField(auto_now_add=True, null=False)
     recommendation_reason = models.TextField(blank=True)
     algorithm_used = models.CharField(max_length=50, null=False)
+    score = models.FloatField(default=0)
+    
+    class Meta:
+        indexes = [
+            # Backs reading a user's precomputed recommendations best first
+            models.Index(fields=['user_id', 'algorithm_used', '-score'], name='recommendation_user_score_idx'),
+        ]
     
     def __str__(self):
         return f"{self.user_id} - {self.post_id}"
@@ -174,6 +312,35 @@ class PollChoice(models.Model):
     def __str__(self):
         return self.choice_text
     
+class PollChoiceVoteShard(models.Model):
+    # Votes for one choice are spread over several rows so concurrent voters
+    # do not all wait on the same row lock; the total is the sum of the shards
+    choice = models.ForeignKey(PollChoice, on_delete=models.CASCADE, related_name='vote_shards')
+    shard = models.PositiveSmallIntegerField()
+    votes = models.IntegerField(default=0)
+    
+    class Meta:
+        unique_together = ('choice', 'shard')
+        
+    def __str__(self):
+        return f"{self.choice} - shard {self.shard}"
+    
+class TrendingSnapshot(models.Model):
+    # Weighted activity (views, likes, comments) per topic per time bucket,
+    # merged from every worker by trending.TrendingTopics
+    topic = models.CharField(max_length=100)
+    bucket = models.DateTimeField()
+    count = models.FloatField(default=0)
+    
+    class Meta:
+        unique_together = ('topic', 'bucket')
+        indexes = [
+            models.Index(fields=['bucket'], name='trending_bucket_idx'),
+        ]
+        
+    def __str__(self):
+        return f"{self.topic} @ {self.bucket}"
+    
 class Quiz(models.Model):
     quiz_id = models.AutoField(primary_key=True)
     post_id = models.ForeignKey(Post, on_delete=models.CASCADE)
@@ -268,10 +435,46 @@ class CollaborationHistory(models.Model):
 class VersionHistory(models.Model):
     post = models.ForeignKey(Post, on_delete=models.CASCADE)
     user = models.ForeignKey(User, on_delete=models.CASCADE)
-    content = models.TextField()
+    # Snapshots hold the full text in `content`; other versions hold a diff
+    # against the previous version in `delta` (see versioning.py)
+    content = models.TextField(blank=True)
+    is_snapshot = models.BooleanField(default=True)
+    delta = models.JSONField(null=True, blank=True)
     timestamp = models.DateTimeField(auto_now_add=True)
     reason = models.TextField(blank=True)
     version_number = models.IntegerField()
     
+    class Meta:
+        unique_together = ('post', 'version_number')
+    
+    def __str__(self):
+        return f"Version {self.id} of {self.post.title} by {self.user.username} on {self.timestamp}"
+    
+class SearchDocument(models.Model):
+    DOC_TYPE_CHOICES = [
+        ('post', 'Post'),
+        ('comment', 'Comment'),
+    ]
+    
+    doc_type = models.CharField(max_length=10, choices=DOC_TYPE_CHOICES)
+    object_id = models.IntegerField()
+    length = models.IntegerField(default=0)
+    indexed_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        unique_together = ('doc_type', 'object_id')
+        
+    def __str__(self):
+        return f"{self.doc_type} {self.object_id}"
+    
+class SearchPosting(models.Model):
+    term = models.CharField(max_length=64)
+    document = models.ForeignKey(SearchDocument, on_delete=models.CASCADE, related_name='postings')
+    frequency = models.IntegerField()
+    
+    class Meta:
+        # Leading on term, so this also serves as the term lookup index
+        unique_together = ('term', 'document')
+        
     def __str__(self):
-        return f"Version {self.id} of {self.post.title} by {self.user.username} on {self.timestamp}"
\ No newline at end of file
+        return f"{self.term} - {self.document}"
@@ -0,0 +1,75 @@
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+import base64
+import json
+
+class KeysetPagination(BasePagination):
+    """
+    Opaque-cursor pagination over a (timestamp, primary key) pair, newest first.
+
+    Each page is fetched with a range condition on the composite index rather
+    than an OFFSET, so deep pages cost the same as the first one.
+    """
+
+    page_size = 20
+    max_page_size = 100
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def __init__(self, ordering=('publication_date', 'pk'), page_size=None):
+        self.ordering = ordering
+        if page_size is not None:
+            self.page_size = page_size
+        self.next_cursor = None
+
+    def encode_cursor(self, obj) -> str:
+        time_field, key_field = self.ordering
+        position = [getattr(obj, time_field).isoformat(), getattr(obj, key_field)]
+        return base64.urlsafe_b64encode(json.dumps(position).encode()).decode()
+
+    def decode_cursor(self, cursor: str):
+        try:
+            timestamp, key = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+            position = parse_datetime(timestamp)
+        except (TypeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+        if position is None:
+            raise NotFound(self.invalid_cursor_message)
+        return position, key
+
+    def get_page_size(self, params) -> int:
+        try:
+            size = int(params.get(self.page_size_query_param, self.page_size))
+        except (TypeError, ValueError):
+            return self.page_size
+        return max(1, min(size, self.max_page_size))
+
+    def paginate_queryset(self, queryset, request, view=None):
+        params = getattr(request, 'query_params', request.GET)
+        page_size = self.get_page_size(params)
+        time_field, key_field = self.ordering
+
+        queryset = queryset.order_by(f'-{time_field}', f'-{key_field}')
+        cursor = params.get(self.cursor_query_param)
+        if cursor:
+            position, key = self.decode_cursor(cursor)
+            queryset = queryset.filter(
+                Q(**{f'{time_field}__lt': position}) |
+                Q(**{time_field: position, f'{key_field}__lt': key})
+            )
+
+        # Fetch one extra row to learn whether another page exists
+        rows = list(queryset[:page_size + 1])
+        page = rows[:page_size]
+        self.next_cursor = self.encode_cursor(page[-1]) if len(rows) > page_size else None
+        return page
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next_cursor': self.next_cursor,
+            'results': data,
+        })
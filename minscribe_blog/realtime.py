@@ -0,0 +1,344 @@
+from asgiref.sync import sync_to_async
+from collections import defaultdict, deque
+from django.conf import settings
+from django.db import transaction
+from django.utils.module_loading import import_string
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+from rest_framework_simplejwt.tokens import AccessToken
+from typing import Optional, Tuple
+from urllib.parse import parse_qs
+from .accounts import blog_user
+from .models import CollaborationHistory, Post, User
+from .roles import collaboration_roles
+from .versioning import apply_delta, diff, rebase, version_store
+import asyncio
+import json
+import logging
+import re
+
+logger = logging.getLogger(__name__)
+
+class InProcessPubSub:
+    """
+    Fan-out of messages to the subscribers of a group within this process.
+
+    This is the local stand-in for a shared channel layer: with several
+    worker processes, point REALTIME_PUBSUB at a class with the same
+    subscribe/unsubscribe/publish methods backed by a shared broker.
+    Subscriber queues are bounded; a subscriber that falls `queue_size`
+    messages behind is told to resync instead of growing without limit.
+    """
+
+    def __init__(self, queue_size: int = 256) -> None:
+        self.queue_size = queue_size
+        self._groups = defaultdict(set)
+
+    def subscribe(self, group: str) -> asyncio.Queue:
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        self._groups[group].add(queue)
+        return queue
+
+    def unsubscribe(self, group: str, queue: asyncio.Queue) -> None:
+        subscribers = self._groups.get(group)
+        if subscribers is None:
+            return
+        subscribers.discard(queue)
+        if not subscribers:
+            del self._groups[group]
+
+    async def publish(self, group: str, message: dict, exclude: Optional[asyncio.Queue] = None) -> None:
+        for queue in list(self._groups.get(group, ())):
+            if queue is exclude:
+                continue
+            try:
+                queue.put_nowait(message)
+            except asyncio.QueueFull:
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait({'type': 'resync'})
+
+class EditSession:
+    """
+    Live editing state of one post, shared by every connected collaborator.
+
+    Patches use the versioning.diff() format and are applied to the
+    in-memory text under a lock, each one bumping `revision`. Accepted patches
+    are broadcast to the other collaborators immediately, while the post and
+    VersionHistory are written at most once per `flush_interval`, so a burst
+    of keystrokes becomes one stored version. Edits saved outside the session
+    in the meantime (PATCH, forms, admin) are merged rather than overwritten:
+    the session's changes are rebased onto them and they reach the
+    collaborators as a patch. Where the two overlap the outside edit wins.
+    """
+
+    def __init__(self, post_id: int, pubsub, flush_interval: float = 2.0, history_size: int = 200) -> None:
+        self.post_id = post_id
+        self.group = f"post-edit-{post_id}"
+        self.pubsub = pubsub
+        self.flush_interval = flush_interval
+        self.text = ''
+        self.revision = 0
+        self.version = 0
+        self.connections = 0
+        self._recent = deque(maxlen=history_size)  # (revision, patch) for rebasing clients
+        self._saved_text = ''
+        self._editors = set()
+        self._last_editor = None
+        self._lock = asyncio.Lock()
+        self._flush_lock = asyncio.Lock()
+        self._loaded = False
+        self._flush_task = None
+
+    async def join(self, user: User) -> dict:
+        async with self._lock:
+            if not self._loaded:
+                self.version, self.text = await sync_to_async(self._load)(user)
+                self._saved_text = self.text
+                self._loaded = True
+            if self._flush_task is None or self._flush_task.done():
+                self._flush_task = asyncio.create_task(self._flush_periodically())
+            self.connections += 1
+            return {'type': 'init', 'revision': self.revision, 'version': self.version, 'content': self.text}
+
+    async def leave(self) -> bool:
+        """Drop a connection; returns True once the last one has gone."""
+        async with self._lock:
+            self.connections -= 1
+            if self.connections > 0:
+                return False
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+        await self.flush()
+        return True
+
+    async def apply(self, user: User, base_revision: int, patch: list, sender: asyncio.Queue) -> dict:
+        async with self._lock:
+            rebased = False
+            if base_revision != self.revision:
+                missed = [[revision, ops] for revision, ops in self._recent if revision > base_revision]
+                if base_revision > self.revision or len(missed) != self.revision - base_revision:
+                    return {'type': 'resync', 'revision': self.revision, 'content': self.text}
+                # Patches that touch other lines than the ones missed are moved
+                # past them here; the client only has to rebase real overlaps
+                try:
+                    for _, ops in missed:
+                        patch = rebase(patch, ops)
+                except (ValueError, TypeError):
+                    return {'type': 'conflict', 'revision': self.revision, 'patches': missed}
+                rebased = True
+
+            try:
+                self.text = apply_delta(self.text, patch)
+            except (ValueError, TypeError):
+                return {'type': 'error', 'message': 'Patch does not apply to the base revision'}
+
+            self.revision += 1
+            self._recent.append((self.revision, patch))
+            self._editors.add(user.pk)
+            self._last_editor = user
+            message = {'type': 'patch', 'revision': self.revision, 'patch': patch, 'user': user.username}
+            await self.pubsub.publish(self.group, message, exclude=sender)
+            if rebased:
+                return {'type': 'ack', 'revision': self.revision, 'patch': patch}
+            return {'type': 'ack', 'revision': self.revision}
+
+    async def flush(self) -> None:
+        async with self._flush_lock:
+            async with self._lock:
+                if self.text == self._saved_text or self._last_editor is None:
+                    return
+                text, editor, editors = self.text, self._last_editor, sorted(self._editors)
+                revision = self.revision
+                self._editors = set()
+
+            version, stored = await sync_to_async(self._persist)(self._saved_text, text, editor, editors, revision)
+            async with self._lock:
+                if stored != text:
+                    await self._merge_external(revision, text, stored)
+                self._saved_text = stored
+                self.version = version
+            await self.pubsub.publish(self.group, {'type': 'saved', 'version': version, 'revision': revision})
+
+    async def _merge_external(self, base_revision: int, base_text: str, stored: str) -> None:
+        """Bring the live text, last seen as `base_text` at `base_revision`, up to the stored text. Call with the lock held."""
+        patch = diff(base_text, stored)
+        missed = [ops for revision, ops in self._recent if revision > base_revision]
+        try:
+            if len(missed) != self.revision - base_revision:
+                raise ValueError("Patches since the flush are no longer held")
+            for ops in missed:
+                patch = rebase(patch, ops)
+            self.text = apply_delta(self.text, patch)
+        except (ValueError, TypeError):
+            # Live edits made during the flush overlap the outside edit; the stored text wins
+            logger.warning(f"Live edits to post {self.post_id} overlap an outside edit; resyncing")
+            self.text = stored
+            self.revision += 1
+            self._recent.clear()
+            await self.pubsub.publish(self.group, {'type': 'resync'})
+            return
+
+        self.revision += 1
+        self._recent.append((self.revision, patch))
+        await self.pubsub.publish(self.group, {'type': 'patch', 'revision': self.revision, 'patch': patch, 'user': None})
+
+    async def _flush_periodically(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+            except Exception:
+                logger.exception(f"Failed to save live edits to post {self.post_id}")
+
+    def _load(self, user: User):
+        post = Post.objects.get(pk=self.post_id)
+        return version_store.current(post, user)
+
+    @transaction.atomic
+    def _persist(self, saved_text: str, text: str, editor: User, editors: list, revision: int) -> Tuple[int, str]:
+        """
+        Store the session's edits since `saved_text` on top of what the post
+        holds now. Returns the version number and the stored text, which
+        differs from `text` when an outside edit was merged in or, when the
+        two overlap, kept instead.
+        """
+        post = Post.objects.select_for_update().get(pk=self.post_id)
+        # current() also records content saved without a version
+        latest, stored = version_store.current(post, editor)
+        delta = diff(saved_text, text)
+        if stored != saved_text:
+            try:
+                delta = rebase(delta, diff(saved_text, stored))
+            except ValueError:
+                logger.warning(f"Live edits to post {self.post_id} overlap an outside edit; keeping the outside edit")
+                return latest, stored
+            text = apply_delta(stored, delta)
+        version = version_store.record(post, editor, text, reason='Live edit session', delta=delta)
+
+        post.content = text
+        post.save(update_fields=['content', 'last_edited'])
+
+        CollaborationHistory.objects.create(
+            post=post,
+            user=editor,
+            action='edited_content',
+            details={'version': version.version_number, 'revision': revision, 'editors': editors}
+        )
+        return version.version_number, text
+
+class EditSessionManager:
+    """Registry of live sessions, one per post with at least one connection."""
+
+    def __init__(self, pubsub=None, flush_interval: float = 2.0) -> None:
+        self.pubsub = pubsub if pubsub is not None else InProcessPubSub()
+        self.flush_interval = flush_interval
+        self._sessions = {}
+
+    def get(self, post_id: int) -> EditSession:
+        session = self._sessions.get(post_id)
+        if session is None:
+            session = self._sessions[post_id] = EditSession(post_id, self.pubsub, self.flush_interval)
+        return session
+
+    async def release(self, session: EditSession) -> None:
+        if await session.leave() and self._sessions.get(session.post_id) is session and not session.connections:
+            del self._sessions[session.post_id]
+
+edit_sessions = EditSessionManager(
+    pubsub=import_string(getattr(settings, 'REALTIME_PUBSUB', 'minscribe_blog.realtime.InProcessPubSub'))(),
+    flush_interval=getattr(settings, 'REALTIME_FLUSH_INTERVAL', 2.0),
+)
+
+EDIT_PATH = re.compile(r'^/ws/posts/(?P<post_id>\d+)/edit/$')
+
+def authenticate(token: str, post_id: int):
+    """Resolve a JWT access token to the blog user and their role on the post."""
+    try:
+        account = JWTAuthentication().get_user(AccessToken(token))
+    except (TokenError, InvalidToken, AuthenticationFailed):
+        return None, None
+
+    user = blog_user(account)
+    role = collaboration_roles.role_of(post_id, user.pk) if user is not None else None
+    if role is None:
+        return None, None
+    return user, role
+
+async def edit_socket(scope, receive, send) -> None:
+    """
+    ASGI WebSocket handler for /ws/posts/<post_id>/edit/?token=<jwt>.
+
+    Clients receive an `init` message with the text and revision, then send
+    {"type": "patch", "revision": n, "patch": [...]} and get back `ack` (with
+    the rewritten patch if it had to be moved past newer ones), `conflict`
+    (with the overlapping patches they missed) or `resync`.
+    Other collaborators' patches and `saved` notices arrive as they happen.
+    The role is checked again before every patch, so a collaborator who is
+    downgraded gets errors and one who is removed is disconnected.
+    """
+    event = await receive()
+    if event['type'] != 'websocket.connect':
+        return
+
+    match = EDIT_PATH.match(scope.get('path', ''))
+    token = parse_qs(scope.get('query_string', b'').decode()).get('token', [''])[0]
+    user = None
+    if match is not None and token:
+        post_id = int(match['post_id'])
+        user, _ = await sync_to_async(authenticate)(token, post_id)
+    if user is None:
+        await send({'type': 'websocket.close', 'code': 4403})
+        return
+
+    await send({'type': 'websocket.accept'})
+    session = edit_sessions.get(post_id)
+    queue = edit_sessions.pubsub.subscribe(session.group)
+    try:
+        await send({'type': 'websocket.send', 'text': json.dumps(await session.join(user))})
+    except Exception:
+        edit_sessions.pubsub.unsubscribe(session.group, queue)
+        raise
+
+    async def forward_broadcasts():
+        while True:
+            message = await queue.get()
+            if message['type'] == 'resync':
+                message = {'type': 'resync', 'revision': session.revision, 'content': session.text}
+            await send({'type': 'websocket.send', 'text': json.dumps(message)})
+
+    async def handle_messages():
+        while True:
+            event = await receive()
+            if event['type'] == 'websocket.disconnect':
+                return
+            if event['type'] != 'websocket.receive':
+                continue
+
+            try:
+                message = json.loads(event.get('text') or event.get('bytes') or '')
+                base_revision = int(message['revision'])
+                patch = message['patch']
+            except (ValueError, TypeError, KeyError):
+                reply = {'type': 'error', 'message': 'Expected {"type": "patch", "revision": n, "patch": [...]}'}
+            else:
+                # Roles can change while the socket is open; the Collaboration
+                # signals drop the cached role, so this sees the change
+                role = await sync_to_async(collaboration_roles.role_of)(post_id, user.pk)
+                if role is None:
+                    await send({'type': 'websocket.close', 'code': 4403})
+                    return
+                if not collaboration_roles.can_edit(role):
+                    reply = {'type': 'error', 'message': 'Insufficient permissions'}
+                else:
+                    reply = await session.apply(user, base_revision, patch, queue)
+            await send({'type': 'websocket.send', 'text': json.dumps(reply)})
+
+    forwarder = asyncio.create_task(forward_broadcasts())
+    try:
+        await handle_messages()
+    finally:
+        forwarder.cancel()
+        edit_sessions.pubsub.unsubscribe(session.group, queue)
+        await edit_sessions.release(session)
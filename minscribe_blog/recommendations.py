@@ -0,0 +1,108 @@
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from typing import Iterable, Optional, Tuple
+from .models import Post, Recommendation
+from .vectors import VECTOR_DIM, load_interest_vectors, post_vector
+import logging
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+class RecommendationEngine:
+    """
+    Precomputed post recommendations from reader interests.
+
+    Published posts and reader profiles are loaded once into contiguous
+    float32 matrices of unit vectors, so cosine similarity is a plain matrix
+    product. Readers are scored `block_size` at a time against every post
+    (one BLAS call per block, memory bounded by block_size x posts), their
+    own posts are masked out and the top `k` per reader are picked with
+    argpartition. Each block's Recommendation rows replace the previous ones
+    for those readers in one transaction.
+    """
+
+    ALGORITHM = 'interest-cosine'
+
+    def __init__(self, k: Optional[int] = None, block_size: int = 256, dim: int = VECTOR_DIM) -> None:
+        self.k = k or getattr(settings, 'RECOMMENDATIONS_PER_USER', 10)
+        self.block_size = block_size
+        self.dim = dim
+
+    def load_posts(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """(post ids, author ids, post vectors) of every published post."""
+        rows = Post.objects.filter(status='published').order_by('post_id').values_list('post_id', 'author_id', 'title', 'ai_keywords', 'markdown_content')
+        count = rows.count()
+        ids = np.empty(count, dtype=np.int64)
+        authors = np.empty(count, dtype=np.int64)
+        vectors = np.empty((count, self.dim), dtype=np.float32)
+        filled = 0
+        for post_id, author_id, title, keywords, markdown in rows.iterator(chunk_size=5000):
+            if filled == count:
+                break
+            ids[filled], authors[filled] = post_id, author_id
+            # Same vector as the related-posts index, body terms standing in for missing keywords
+            vectors[filled] = post_vector(title, keywords, markdown, self.dim)
+            filled += 1
+        return ids[:filled], authors[:filled], vectors[:filled]
+
+    def load_users(self, user_ids: Optional[Iterable[int]] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """(user ids, interest vectors) of readers with a non-empty profile."""
+        return load_interest_vectors(user_ids, self.dim)
+
+    def top_k(self, users: np.ndarray, user_ids: np.ndarray, posts: np.ndarray, authors: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Column indices and scores of the best posts for a block of users, best first."""
+        scores = users @ posts.T
+        # Readers are never recommended their own posts
+        scores[user_ids[:, np.newaxis] == authors[np.newaxis, :]] = -np.inf
+
+        k = min(self.k, scores.shape[1])
+        if k < scores.shape[1]:
+            best = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        else:
+            best = np.broadcast_to(np.arange(k), (len(scores), k))
+        best_scores = np.take_along_axis(scores, best, axis=1)
+        order = np.argsort(-best_scores, axis=1, kind='stable')
+        return np.take_along_axis(best, order, axis=1), np.take_along_axis(best_scores, order, axis=1)
+
+    def recompute(self, user_ids: Optional[Iterable[int]] = None) -> int:
+        """Rebuild recommendations for every reader (or just `user_ids`). Returns rows written."""
+        started = timezone.now()
+        post_ids, authors, posts = self.load_posts()
+        ids, users = self.load_users(user_ids)
+        logger.info(f"Scoring {len(ids)} readers against {len(post_ids)} posts")
+
+        written = 0
+        for start in range(0, len(ids), self.block_size):
+            block_ids = ids[start:start + self.block_size]
+            if len(post_ids):
+                columns, scores = self.top_k(users[start:start + self.block_size], block_ids, posts, authors)
+            else:
+                columns = scores = np.empty((len(block_ids), 0))
+            written += self._save(block_ids, post_ids, columns, scores)
+
+        if user_ids is None:
+            # Rows older than this run belong to readers who no longer have interests
+            Recommendation.objects.filter(algorithm_used=self.ALGORITHM, recommendation_date__lt=started).delete()
+        return written
+
+    @transaction.atomic
+    def _save(self, user_ids: np.ndarray, post_ids: np.ndarray, columns: np.ndarray, scores: np.ndarray) -> int:
+        Recommendation.objects.filter(algorithm_used=self.ALGORITHM, user_id__in=user_ids.tolist()).delete()
+        rows = [
+            Recommendation(
+                user_id_id=int(user_id),
+                post_id_id=int(post_ids[column]),
+                recommendation_type='post',
+                recommendation_reason='Matches your interests',
+                algorithm_used=self.ALGORITHM,
+                score=float(score),
+            )
+            for user_id, user_columns, user_scores in zip(user_ids, columns, scores)
+            for column, score in zip(user_columns, user_scores)
+            if np.isfinite(score) and score > 0
+        ]
+        Recommendation.objects.bulk_create(rows, batch_size=2000)
+        return len(rows)
+
+recommendation_engine = RecommendationEngine()
@@ -0,0 +1,30 @@
+from django.conf import settings
+from functools import lru_cache
+import bleach
+import markdown
+
+def _config() -> dict:
+    return getattr(settings, 'MARKDOWNIFY', {}).get('default', {})
+
+@lru_cache(maxsize=1)
+def _cleaner() -> bleach.Cleaner:
+    """Build the sanitizer once from the MARKDOWNIFY whitelists, with django-markdownify's defaults."""
+    config = _config()
+    return bleach.Cleaner(
+        tags=config.get('WHITELIST_TAGS', bleach.sanitizer.ALLOWED_TAGS),
+        attributes=config.get('WHITELIST_ATTRS', bleach.sanitizer.ALLOWED_ATTRIBUTES),
+        protocols=config.get('WHITELIST_PROTOCOLS', bleach.sanitizer.ALLOWED_PROTOCOLS),
+        strip=config.get('STRIP', True),
+    )
+
+def render_markdown(text: str) -> str:
+    """Convert markdown to sanitized HTML ready to be stored or displayed."""
+    if not text:
+        return ''
+    config = _config()
+    html = markdown.markdown(
+        text,
+        extensions=config.get('MARKDOWN_EXTENSIONS', []),
+        extension_configs=config.get('MARKDOWN_EXTENSION_CONFIGS', {}),
+    )
+    return _cleaner().clean(html)
@@ -0,0 +1,90 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import OuterRef, Subquery
+from django.http import Http404
+from typing import Optional, Tuple
+from .accounts import blog_user
+from .models import Collaboration, Post
+
+class CollaborationRoles:
+    """
+    Resolves a user's collaboration role on a post.
+
+    A lookup returns the post together with the role, annotated on in one
+    query. Results are memoized on the request, so repeated checks in one
+    request are free. Roles are also cached for `timeout` seconds, and the
+    Collaboration signals drop the entry whenever the row changes. A cached
+    role still needs the post itself, which is then loaded without the
+    subquery.
+    """
+
+    CACHE_PREFIX = 'collaboration_role'
+    EDIT_ROLES = ('editor', 'contributor')
+    NO_ROLE = ''  # cached for non-collaborators, since None means a miss
+
+    def __init__(self, timeout: int = 30) -> None:
+        self.timeout = timeout
+
+    def _key(self, post_id: int, user_id: int) -> str:
+        return f"{self.CACHE_PREFIX}:{post_id}:{user_id}"
+
+    def resolve(self, request, post_id: int) -> Tuple[Post, Optional[str]]:
+        """The post and the current user's role on it (None if not a collaborator)."""
+        memo = request.__dict__.setdefault('_collaboration_roles', {})
+        if post_id in memo:
+            return memo[post_id]
+
+        # Collaborations belong to blog users; an account without one has no role
+        user = blog_user(request.user)
+        role = cache.get(self._key(post_id, user.pk)) if user is not None else self.NO_ROLE
+        try:
+            if role is None:
+                post = (
+                    Post.objects
+                    .annotate(collaboration_role=Subquery(
+                        Collaboration.objects.filter(post_id=OuterRef('pk'), user_id=user.pk).values('role')[:1]
+                    ))
+                    .get(pk=post_id)
+                )
+                role = post.collaboration_role or self.NO_ROLE
+                cache.set(self._key(post_id, user.pk), role, self.timeout)
+            else:
+                post = Post.objects.get(pk=post_id)
+        except Post.DoesNotExist:
+            raise Http404("No Post matches the given query.")
+
+        memo[post_id] = (post, role or None)
+        return memo[post_id]
+
+    def role_of(self, post_id: int, user_id: int) -> Optional[str]:
+        """
+        A user's role on a post without loading the post, from the cache or one
+        query (None if not a collaborator). For long-lived connections, which
+        have no request to memoize on and re-check before each edit.
+        """
+        key = self._key(post_id, user_id)
+        role = cache.get(key)
+        if role is None:
+            role = (
+                Collaboration.objects
+                .filter(post_id=post_id, user_id=user_id)
+                .values_list('role', flat=True)
+                .first()
+            ) or self.NO_ROLE
+            cache.set(key, role, self.timeout)
+        return role or None
+
+    def require(self, request, post_id: int) -> Tuple[Post, str]:
+        """Like resolve(), but 404s unless the user collaborates on the post."""
+        post, role = self.resolve(request, post_id)
+        if role is None:
+            raise Http404("No Collaboration matches the given query.")
+        return post, role
+
+    def can_edit(self, role: Optional[str]) -> bool:
+        return role in self.EDIT_ROLES
+
+    def invalidate(self, post_id: int, user_id: int) -> None:
+        cache.delete(self._key(post_id, user_id))
+
+collaboration_roles = CollaborationRoles(timeout=getattr(settings, 'COLLABORATION_ROLE_CACHE_TIMEOUT', 30))
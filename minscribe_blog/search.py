@@ -0,0 +1,162 @@
+from collections import Counter, defaultdict
+from django.db import transaction
+from django.db.models import Avg, Count, QuerySet
+from typing import List, Optional, Tuple
+from .models import Post, Comments, SearchDocument, SearchPosting
+import heapq
+import math
+import re
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+MAX_TERM_LENGTH = 64
+
+STOP_WORDS = frozenset("""
+    a an and are as at be but by for from has have he her his i if in into is it its
+    of on or our she so that the their them then there these they this to was we were
+    what when where which who will with you your
+""".split())
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase, split on anything that is not a letter or digit, drop stop words."""
+    if not text:
+        return []
+    return [
+        token[:MAX_TERM_LENGTH]
+        for token in TOKEN_RE.findall(text.lower())
+        if len(token) > 1 and token not in STOP_WORDS
+    ]
+
+class SearchIndex:
+    """
+    Inverted index over posts and comments, ranked with BM25.
+
+    Each indexed object has one SearchDocument row holding its token count and
+    one SearchPosting row per distinct term holding the term frequency. A query
+    only reads the postings of its own terms.
+    """
+
+    TITLE_WEIGHT = 3  # title tokens count this many times towards term frequency
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75) -> None:
+        self.k1 = k1
+        self.b = b
+
+    # Indexing
+
+    def post_tokens(self, post: Post) -> List[str]:
+        return tokenize(post.title) * self.TITLE_WEIGHT + tokenize(post.markdown_content)
+
+    def comment_tokens(self, comment: Comments) -> List[str]:
+        return tokenize(comment.content)
+
+    def index_post(self, post: Post) -> None:
+        self._index('post', post.post_id, self.post_tokens(post))
+
+    def index_comment(self, comment: Comments) -> None:
+        self._index('comment', comment.comment_id, self.comment_tokens(comment))
+
+    def remove(self, doc_type: str, object_id: int) -> None:
+        SearchDocument.objects.filter(doc_type=doc_type, object_id=object_id).delete()
+
+    @transaction.atomic
+    def _index(self, doc_type: str, object_id: int, tokens: List[str]) -> None:
+        document, _ = SearchDocument.objects.update_or_create(
+            doc_type=doc_type,
+            object_id=object_id,
+            defaults={'length': len(tokens)}
+        )
+        document.postings.all().delete()
+        SearchPosting.objects.bulk_create([
+            SearchPosting(term=term, document=document, frequency=frequency)
+            for term, frequency in Counter(tokens).items()
+        ])
+
+    @transaction.atomic
+    def rebuild(self, chunk_size: int = 500) -> Tuple[int, int]:
+        """
+        Drop and re-create the whole index in one transaction, so searches keep
+        reading the old index until the new one commits and a failure part-way
+        leaves the old one in place. Returns (posts, comments) indexed.
+        """
+        SearchDocument.objects.all().delete()
+        posts = self._bulk_index('post', Post.objects.only('post_id', 'title', 'markdown_content'), 'post_id', self.post_tokens, chunk_size)
+        comments = self._bulk_index('comment', Comments.objects.only('comment_id', 'content'), 'comment_id', self.comment_tokens, chunk_size)
+        return posts, comments
+
+    def _bulk_index(self, doc_type, queryset, key, tokens_for, chunk_size) -> int:
+        last_id = 0
+        total = 0
+        queryset = queryset.order_by(key)
+        while True:
+            chunk = list(queryset.filter(**{f'{key}__gt': last_id})[:chunk_size])
+            if not chunk:
+                return total
+
+            with transaction.atomic():
+                counts = {getattr(obj, key): Counter(tokens_for(obj)) for obj in chunk}
+                documents = SearchDocument.objects.bulk_create([
+                    SearchDocument(doc_type=doc_type, object_id=object_id, length=sum(terms.values()))
+                    for object_id, terms in counts.items()
+                ])
+                # bulk_create does not return primary keys on every backend
+                document_ids = dict(
+                    SearchDocument.objects
+                    .filter(doc_type=doc_type, object_id__in=counts.keys())
+                    .values_list('object_id', 'id')
+                )
+                SearchPosting.objects.bulk_create([
+                    SearchPosting(term=term, document_id=document_ids[object_id], frequency=frequency)
+                    for object_id, terms in counts.items()
+                    for term, frequency in terms.items()
+                ], batch_size=1000)
+
+            last_id = getattr(chunk[-1], key)
+            total += len(documents)
+
+    # Querying
+
+    def search(self, query: str, doc_type: Optional[str] = None, limit: int = 20) -> List[Tuple[str, int, float]]:
+        """Return up to `limit` (doc_type, object_id, score) tuples, best first."""
+        terms = set(tokenize(query))
+        if not terms:
+            return []
+
+        documents = SearchDocument.objects.all()
+        postings = SearchPosting.objects.filter(term__in=terms)
+        if doc_type:
+            documents = documents.filter(doc_type=doc_type)
+            postings = postings.filter(document__doc_type=doc_type)
+
+        stats = documents.aggregate(total=Count('id'), average_length=Avg('length'))
+        total = stats['total'] or 0
+        average_length = stats['average_length'] or 1.0
+        if not total:
+            return []
+
+        rows = list(postings.values_list(
+            'term', 'document__doc_type', 'document__object_id', 'document__length', 'frequency'
+        ))
+        document_frequency = Counter(row[0] for row in rows)
+
+        scores = defaultdict(float)
+        for term, row_type, object_id, length, frequency in rows:
+            df = document_frequency[term]
+            idf = math.log(1 + (total - df + 0.5) / (df + 0.5))
+            norm = self.k1 * (1 - self.b + self.b * length / average_length)
+            scores[(row_type, object_id)] += idf * frequency * (self.k1 + 1) / (frequency + norm)
+
+        best = heapq.nlargest(limit, scores.items(), key=lambda item: item[1])
+        return [(row_type, object_id, score) for (row_type, object_id), score in best]
+
+    def search_ids(self, query: str, doc_type: str) -> QuerySet:
+        """
+        Object ids of every document of one type matching any query term, as a
+        subquery for filtering a queryset. Unranked and uncapped, for the admin.
+        """
+        return (
+            SearchDocument.objects
+            .filter(doc_type=doc_type, postings__term__in=set(tokenize(query)))
+            .values('object_id')
+        )
+
+search_index = SearchIndex()
@@ -8,9 +8,9 @@ from django.contrib.auth.password_validation import validate_password
 from rest_framework.exceptions import ValidationError
 from rest_framework.validators import UniqueValidator
 from rest_framework import serializers
-from .models import User, Poll, PollChoice, QuizQuestion, Quiz, QuizSubmission, Comments, Post
+from .models import User, Poll, PollChoice, QuizQuestion, Quiz, QuizSubmission, Comments, Post, AuthorStats
 from django.contrib.auth import get_user_model
-from django.db.models import Sum
+from .counters import poll_votes
 from django.contrib.auth.hashers import make_password
 
 class UserSerializer(serializers.ModelSerializer):
@@ -78,28 +78,47 @@ class UserRegistrationSerializer(serializers.ModelSerializer):
 class PostSerializer(serializers.ModelSerializer):
     class Meta:
         model = Post
-        fields = ['id', 'title', 'content', 'author', 'publication_date', 'last_edited', 'likes', 'dislikes', 'views', 'comment_count', 'status', 'moderation_flagged', 'moderation_reason', 'ai_summary', 'ai_keywords', 'ai_sentiment', 'ai_translation', 'has_poll', 'has_quiz', 'has_livestream', 'collaborators', 'is_collaborative', 'version_history', 'created_at']
-        read_only_fields = ['comment_count', 'version_history', 'created_at']
+        fields = ['id', 'title', 'content', 'rendered_html', 'author', 'publication_date', 'last_edited', 'likes', 'dislikes', 'views', 'comment_count', 'status', 'moderation_flagged', 'moderation_reason', 'ai_summary', 'ai_keywords', 'ai_sentiment', 'ai_translation', 'has_poll', 'has_quiz', 'has_livestream', 'collaborators', 'is_collaborative', 'created_at']
+        read_only_fields = ['rendered_html', 'comment_count', 'created_at']
+        
+class AuthorPostSerializer(serializers.ModelSerializer):
+    # Trimmed post representation for profile listings; no bodies
+    class Meta:
+        model = Post
+        fields = ['post_id', 'title', 'ai_summary', 'publication_date', 'likes', 'views', 'comment_count']
+        read_only_fields = fields
         
 class AuthorProfileSerializer(serializers.ModelSerializer):
+    """
+    Author totals read from AuthorStats. Querysets should use
+    select_related('stats') so a list of authors costs a single query.
+    """
     total_posts = serializers.SerializerMethodField()
     total_likes = serializers.SerializerMethodField()
-    posts = serializers.SerializerMethodField()
+    total_views = serializers.SerializerMethodField()
     
     class Meta:
         model = User
-        fields = ['id', 'username', 'profile_picture', 'bio', 'total_posts', 'total_likes', 'posts']
-        read_only_fields = ['total_posts', 'total_likes', 'posts']
+        fields = ['user_id', 'username', 'profile_picture', 'bio', 'total_posts', 'total_likes', 'total_views']
+        read_only_fields = ['total_posts', 'total_likes', 'total_views']
+        
+    def _stats(self, obj):
+        try:
+            return obj.stats
+        except AuthorStats.DoesNotExist:
+            return None
         
     def get_total_posts(self, obj):
-        return Post.objects.filter(author=obj).count()
+        stats = self._stats(obj)
+        return stats.post_count if stats else 0
     
     def get_total_likes(self, obj):
-        return Post.objects.filter(author=obj).aggregate(total_likes=Sum('likes'))['total_likes']
+        stats = self._stats(obj)
+        return stats.total_likes if stats else 0
     
-    def get_posts(self, obj):
-        posts = Post.objects.filter(author=obj)
-        return PostSerializer(posts, many=True).data
+    def get_total_views(self, obj):
+        stats = self._stats(obj)
+        return stats.total_views if stats else 0
     
     def create(self, validated_data):
         return User.objects.create_user(**validated_data)   
@@ -110,10 +129,14 @@ class PollChoiceSerializer(serializers.ModelSerializer):
         
 class PollSerializer(serializers.ModelSerializer):
     choices = PollChoiceSerializer(many=True, read_only=True)
+    results = serializers.SerializerMethodField()
 
     class Meta:
         model = Poll
-        fields = ['id', 'question', 'choices', 'created_date', 'end_date', 'is_active']
+        fields = ['id', 'question', 'choices', 'results', 'created_date', 'end_date', 'is_active']
+
+    def get_results(self, obj):
+        return poll_votes.results(obj.poll_id)
 
     def create(self, validated_data):
         choices = validated_data.pop('choices', [])
@@ -153,5 +176,12 @@ class QuizSubmissionSerializer(serializers.Serializer):
 class CommentSerializer(serializers.ModelSerializer):
     class Meta:
         model = Comments
-        fields = ['id', 'post_id', 'author_id', 'content', 'publication_date', 'last_edited', 'likes', 'dislikes', 'moderation_flagged', 'moderation_reason']
-        read_only_fields = ['publication_date', 'last_edited', 'likes', 'dislikes', 'moderation_flagged', 'moderation_reason']
+        fields = ['comment_id', 'post_id', 'author_id', 'parent', 'depth', 'content', 'publication_date', 'last_edited', 'likes', 'dislikes', 'moderation_flagged', 'moderation_reason']
+        read_only_fields = ['depth', 'publication_date', 'last_edited', 'likes', 'dislikes', 'moderation_flagged', 'moderation_reason']
+        
+class CommentThreadSerializer(serializers.BaseSerializer):
+    """Serializes a CommentNode from threads.py with its replies nested."""
+    def to_representation(self, node):
+        data = CommentSerializer(node.comment).data
+        data['replies'] = [self.to_representation(reply) for reply in node.replies]
+        return data
@@ -2,7 +2,14 @@ from django.db.models.signals import pre_save, post_save, pre_delete, post_delet
 from django.dispatch import receiver
 from django.contrib.auth import get_user_model
 from django.utils import timezone
-from .models import Post, User, Comments, CognitiveProfile, Poll, LiveStream, Quiz
+from django.db.models import F
+from .models import Post, PostTag, User, Comments, CognitiveProfile, Poll, LiveStream, Quiz, Collaboration
+from .cache import post_render_cache
+from .search import search_index
+from .stats import author_stats
+from .roles import collaboration_roles
+from .ann import post_ann_index
+from .trending import trending_topics
 import logging
 
 logger = logging.getLogger(__name__)
@@ -25,10 +32,72 @@ def log_model_change(sender, instance, action, created=None):
 def track_post_changes(sender, instance, **kwargs):
     if 'created' in kwargs:
         log_model_change(sender, instance, "save", kwargs.get('created'))
+        post_render_cache.invalidate(instance.post_id)
     elif kwargs.get('signal') == pre_delete:
         log_model_change(sender, instance, "about to be deleted")
     elif kwargs.get('signal') == post_delete:
         log_model_change(sender, instance, "deleted")
+        post_render_cache.invalidate(instance.post_id)
+
+# Author stats signals
+@receiver(post_save, sender=Post)
+def count_author_post(sender, instance, created, **kwargs):
+    if created:
+        author_stats.post_created(instance)
+
+@receiver(pre_delete, sender=Post)
+def uncount_author_post(sender, instance, **kwargs):
+    author_stats.post_deleting(instance)
+    
+SEARCHABLE_POST_FIELDS = {'title', 'content', 'markdown_content'}
+
+def _touches(update_fields, fields):
+    return update_fields is None or bool(fields & set(update_fields))
+
+# Search index signals
+@receiver(post_save, sender=Post)
+def index_post(sender, instance, update_fields=None, **kwargs):
+    if _touches(update_fields, SEARCHABLE_POST_FIELDS):
+        search_index.index_post(instance)
+
+@receiver(post_delete, sender=Post)
+def unindex_post(sender, instance, **kwargs):
+    search_index.remove('post', instance.post_id)
+
+# Trending topic signals: a post's topics are its tags and keywords
+@receiver(post_save, sender=Post)
+def refresh_post_topics(sender, instance, update_fields=None, **kwargs):
+    if _touches(update_fields, {'ai_keywords'}):
+        trending_topics.forget(instance.post_id)
+
+@receiver([post_save, post_delete], sender=PostTag)
+def refresh_tagged_post_topics(sender, instance, **kwargs):
+    trending_topics.forget(instance.post_id_id)
+
+# Related-posts index signals
+RELATED_POST_FIELDS = {'title', 'content', 'markdown_content', 'ai_keywords', 'status'}
+
+@receiver(post_save, sender=Post)
+def index_related_post(sender, instance, update_fields=None, **kwargs):
+    if not _touches(update_fields, RELATED_POST_FIELDS):
+        return
+    if instance.status == 'published':
+        post_ann_index.add_post(instance)
+    else:
+        post_ann_index.remove(instance.post_id)
+
+@receiver(post_delete, sender=Post)
+def unindex_related_post(sender, instance, **kwargs):
+    post_ann_index.remove(instance.post_id)
+
+@receiver(post_save, sender=Comments)
+def index_comment(sender, instance, update_fields=None, **kwargs):
+    if _touches(update_fields, {'content'}):
+        search_index.index_comment(instance)
+
+@receiver(post_delete, sender=Comments)
+def unindex_comment(sender, instance, **kwargs):
+    search_index.remove('comment', instance.comment_id)
         
 # User signals
 @receiver([pre_save, post_save], sender=User)
@@ -43,16 +112,26 @@ def track_user_changes(sender, instance, **kwargs):
 @receiver([post_save], sender=Comments)
 def track_comment_changes(sender, instance, created, **kwargs):
     if created:
-        post = instance.post_id
-        post.comment_count = Comments.objects.filter(post_id=post).count()
-        post.save()
-        logger.info(f"New comment added to post {post.post_id}")
+        # Atomic +1 on the one column; no recount and no full post save
+        Post.objects.filter(pk=instance.post_id_id).update(comment_count=F('comment_count') + 1)
+        trending_topics.record(instance.post_id_id, 'comment')
+        logger.info(f"New comment added to post {instance.post_id_id}")
+        
+@receiver([post_delete], sender=Comments)
+def track_comment_deletions(sender, instance, **kwargs):
+    Post.objects.filter(pk=instance.post_id_id, comment_count__gt=0).update(comment_count=F('comment_count') - 1)
+    logger.info(f"Comment removed from post {instance.post_id_id}")
+        
+# Collaboration signals
+@receiver([post_save, post_delete], sender=Collaboration)
+def invalidate_collaboration_role(sender, instance, **kwargs):
+    collaboration_roles.invalidate(instance.post_id, instance.user_id)
         
 # Cognitive Profile signals
 @receiver([post_save], sender=CognitiveProfile)
 def track_profile_changes(sender, instance, created, **kwargs):
     action = "created" if created else "updated"
-    logger.info(f"Cognitive profile {action}: {instance.id}")
+    logger.info(f"Cognitive profile {action}: {instance.pk}")
     
 # Poll Signals
 @receiver([post_save], sender=Poll)
@@ -0,0 +1,103 @@
+from collections import Counter
+from django.db import models, transaction
+from django.db.models import Case, Count, F, Sum, Value, When
+from django.db.models.functions import Coalesce
+from .models import AuthorStats, Post
+
+class AuthorStatsService:
+    """
+    Incremental maintenance of AuthorStats rows.
+
+    Every change is applied as a relative UPDATE on the affected authors, so
+    reading an author's totals never aggregates over their posts.
+    """
+
+    # Post counter column -> AuthorStats column
+    TOTALS = {
+        'likes': 'total_likes',
+        'views': 'total_views',
+    }
+
+    def post_created(self, post: Post) -> None:
+        stats, created = AuthorStats.objects.get_or_create(
+            author_id=post.author_id_id,
+            defaults={'post_count': 1, 'total_likes': post.likes, 'total_views': post.views}
+        )
+        if not created:
+            AuthorStats.objects.filter(pk=stats.pk).update(
+                post_count=F('post_count') + 1,
+                total_likes=F('total_likes') + post.likes,
+                total_views=F('total_views') + post.views,
+            )
+
+    def post_deleting(self, post: Post) -> None:
+        # Counters are updated in place by other processes, so the instance
+        # may hold stale values; read the stored ones before the row goes
+        counts = Post.objects.filter(pk=post.pk).values('likes', 'views').first()
+        if counts is None:
+            return
+        AuthorStats.objects.filter(author_id=post.author_id_id).update(
+            post_count=F('post_count') - 1,
+            total_likes=F('total_likes') - counts['likes'],
+            total_views=F('total_views') - counts['views'],
+        )
+
+    def apply_post_increments(self, field: str, increments: dict) -> int:
+        """
+        Roll per-post counter increments ({post_id: amount}) up to their authors.
+
+        Costs one query to map posts to authors and one UPDATE for all of them.
+        """
+        column = self.TOTALS.get(field)
+        if column is None or not increments:
+            return 0
+
+        per_author = Counter()
+        for post_id, author_id in Post.objects.filter(pk__in=increments.keys()).values_list('pk', 'author_id'):
+            per_author[author_id] += increments[post_id]
+
+        if not per_author:
+            return 0
+
+        delta = Case(
+            *[When(author_id=author_id, then=Value(amount)) for author_id, amount in per_author.items()],
+            default=Value(0),
+            output_field=models.IntegerField()
+        )
+        return AuthorStats.objects.filter(author_id__in=per_author.keys()).update(**{column: F(column) + delta})
+
+    def recompute(self, author_id: int) -> None:
+        """Recount one author's totals from their posts, e.g. after a write that bypassed the increments."""
+        totals = Post.objects.filter(author_id=author_id).aggregate(
+            post_count=Count('post_id'),
+            total_likes=Coalesce(Sum('likes'), 0),
+            total_views=Coalesce(Sum('views'), 0),
+        )
+        AuthorStats.objects.update_or_create(author_id=author_id, defaults=totals)
+
+    @transaction.atomic
+    def rebuild(self) -> int:
+        """Recompute every author's totals with one grouped query."""
+        totals = (
+            Post.objects
+            .values('author_id')
+            .annotate(
+                post_count=Count('post_id'),
+                total_likes=Coalesce(Sum('likes'), 0),
+                total_views=Coalesce(Sum('views'), 0),
+            )
+        )
+        rows = [
+            AuthorStats(
+                author_id=row['author_id'],
+                post_count=row['post_count'],
+                total_likes=row['total_likes'],
+                total_views=row['total_views'],
+            )
+            for row in totals
+        ]
+        AuthorStats.objects.all().delete()
+        AuthorStats.objects.bulk_create(rows, batch_size=1000)
+        return len(rows)
+
+author_stats = AuthorStatsService()
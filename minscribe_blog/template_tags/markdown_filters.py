@@ -1,9 +1,9 @@
 from django import template
 from django.utils.safestring import mark_safe
-import markdown
+from minscribe_blog.rendering import render_markdown
 
 register = template.Library()
 
 @register.filter(name='markdown')
 def markdown_format(text):
-    return mark_safe(markdown.markdown(text))
\ No newline at end of file
+    return mark_safe(render_markdown(text))
\ No newline at end of file
@@ -0,0 +1,60 @@
+from typing import Iterable, List, Optional
+from .models import Comments
+
+class CommentNode:
+    """A comment together with its already-loaded replies."""
+
+    __slots__ = ('comment', 'replies')
+
+    def __init__(self, comment: Comments) -> None:
+        self.comment = comment
+        self.replies: List['CommentNode'] = []
+
+def build_tree(comments: Iterable[Comments]) -> List[CommentNode]:
+    """
+    Assemble comments into nested nodes in memory.
+
+    Comments must be sorted by path, which guarantees every parent is seen
+    before its replies. Comments whose parent is not in the input become roots
+    of the returned forest, so a subtree can be assembled on its own.
+    """
+    nodes = {}
+    roots = []
+    for comment in comments:
+        node = CommentNode(comment)
+        nodes[comment.comment_id] = node
+        parent = nodes.get(comment.parent_id)
+        if parent is None:
+            roots.append(node)
+        else:
+            parent.replies.append(node)
+    return roots
+
+def load_subtree(comment: Comments, max_depth: Optional[int] = None) -> CommentNode:
+    """Load a comment and its replies down to `max_depth` levels in one query."""
+    qs = Comments.objects.filter(thread_root_id=comment.thread_root_id, path__startswith=comment.path)
+    if max_depth is not None:
+        qs = qs.filter(depth__lte=comment.depth + max_depth)
+    return build_tree(qs.order_by('path'))[0]
+
+def load_threads(roots: List[Comments], max_depth: Optional[int] = None) -> List[CommentNode]:
+    """
+    Attach replies to a page of top-level comments with one query.
+
+    `roots` keep their given order; replies are ordered depth-first.
+    """
+    if not roots:
+        return []
+
+    qs = Comments.objects.filter(thread_root_id__in=[root.comment_id for root in roots], depth__gt=0)
+    if max_depth is not None:
+        qs = qs.filter(depth__lte=max_depth)
+
+    nodes = {root.comment_id: CommentNode(root) for root in roots}
+    for comment in qs.order_by('path'):
+        node = CommentNode(comment)
+        nodes[comment.comment_id] = node
+        parent = nodes.get(comment.parent_id)
+        if parent is not None:
+            parent.replies.append(node)
+    return [nodes[root.comment_id] for root in roots]
@@ -0,0 +1,197 @@
+from collections import OrderedDict, defaultdict
+from datetime import datetime, timezone as dt_timezone
+from django.conf import settings
+from django.db import IntegrityError, close_old_connections, transaction
+from django.db.models import F
+from operator import itemgetter
+from typing import List, Optional, Tuple
+from .models import Post, PostTag, TrendingSnapshot
+import atexit
+import heapq
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+class TrendingTopics:
+    """
+    Sliding-window trending topics over post activity.
+
+    Views, likes and comments on a post count towards its tags and keywords,
+    weighted per event type, in time buckets of `bucket_seconds`. A topic's
+    score is the sum of its bucket counts over the last `window` seconds,
+    each halved every `half_life` seconds of age.
+
+    Counts live in memory. Every `snapshot_interval` seconds the increments
+    recorded since the last snapshot are added to the TrendingSnapshot rows
+    and the window is reloaded from them, so every worker ranks on the
+    activity of all workers and a crash loses at most one interval. Between
+    snapshots an event updates its topics' scores in place with forward
+    decay (weights grow with event time instead of old scores shrinking), so
+    nothing is ever rescaled. top(n) is one heapq.nlargest over the topics.
+    """
+
+    TOPIC_CACHE_SIZE = 10000
+    TOPIC_CACHE_TTL = 300  # seconds; forget() only reaches this process's cache
+    TOPIC_LENGTH = 100
+
+    def __init__(self, weights: Optional[dict] = None, bucket_seconds: int = 3600, window: int = 24 * 3600,
+                 half_life: float = 6 * 3600, snapshot_interval: float = 60.0) -> None:
+        self.weights = weights or {'view': 1.0, 'like': 3.0, 'comment': 5.0}
+        self.bucket_seconds = bucket_seconds
+        self.window = window
+        self.half_life = half_life
+        self.snapshot_interval = snapshot_interval
+        self._scores = defaultdict(float)
+        self._pending = defaultdict(float)
+        self._landmark = time.time()
+        self._loaded = False
+        self._topics = OrderedDict()
+        self._lock = threading.Lock()
+        self._snapshot_lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def _decay(self, bucket: float) -> float:
+        return 2 ** ((bucket - self._landmark) / self.half_life)
+
+    # Topics of a post
+
+    def post_topics(self, post_id: int) -> Tuple[str, ...]:
+        """Tags and keywords of a post, cached per process."""
+        with self._lock:
+            cached = self._topics.get(post_id)
+            if cached is not None and cached[1] > time.monotonic():
+                self._topics.move_to_end(post_id)
+                return cached[0]
+
+        keywords = Post.objects.filter(pk=post_id).values_list('ai_keywords', flat=True).first() or ''
+        tags = PostTag.objects.filter(post_id=post_id).values_list('tag_id__name', flat=True)
+        names = [*tags, *keywords.split(',')]
+        topics = tuple(dict.fromkeys(name.strip().lower()[:self.TOPIC_LENGTH] for name in names if name.strip()))
+
+        with self._lock:
+            self._topics[post_id] = (topics, time.monotonic() + self.TOPIC_CACHE_TTL)
+            self._topics.move_to_end(post_id)
+            if len(self._topics) > self.TOPIC_CACHE_SIZE:
+                self._topics.popitem(last=False)
+        return topics
+
+    def forget(self, post_id: int) -> None:
+        """Drop a post's cached topics after its tags or keywords change."""
+        with self._lock:
+            self._topics.pop(post_id, None)
+
+    # Recording
+
+    def record(self, post_id: int, event: str, amount: float = 1) -> None:
+        weight = self.weights.get(event, 0) * amount
+        if not weight:
+            return
+        topics = self.post_topics(post_id)
+        if not topics:
+            return
+
+        now = time.time()
+        bucket = now - now % self.bucket_seconds
+        with self._lock:
+            decayed = weight * self._decay(bucket)
+            for topic in topics:
+                self._pending[(topic, bucket)] += weight
+                self._scores[topic] += decayed
+            if self._thread is None:
+                self._start()
+
+    # Reading
+
+    def top(self, n: int = 10) -> List[Tuple[str, float]]:
+        """The n hottest topics with their scores, as of now."""
+        if not self._loaded:
+            self.snapshot()
+        with self._lock:
+            now_factor = self._decay(time.time())
+            best = heapq.nlargest(n, self._scores.items(), key=itemgetter(1))
+        return [(topic, score / now_factor) for topic, score in best if score > 0]
+
+    # Snapshots
+
+    def snapshot(self) -> int:
+        """Persist pending counts, then reload the window from every worker's rows."""
+        with self._snapshot_lock:
+            with self._lock:
+                pending, self._pending = self._pending, defaultdict(float)
+
+            try:
+                self._write(pending)
+            except Exception:
+                logger.exception("Failed to snapshot trending topics; requeueing")
+                with self._lock:
+                    for key, amount in pending.items():
+                        self._pending[key] += amount
+                return 0
+
+            self._reload()
+            return len(pending)
+
+    def _write(self, pending: dict) -> None:
+        cutoff = datetime.fromtimestamp(time.time() - self.window, tz=dt_timezone.utc)
+        with transaction.atomic():
+            # Sorted keys give every worker the same lock order
+            for topic, bucket in sorted(pending):
+                amount = pending[(topic, bucket)]
+                when = datetime.fromtimestamp(bucket, tz=dt_timezone.utc)
+                updated = TrendingSnapshot.objects.filter(topic=topic, bucket=when).update(count=F('count') + amount)
+                if updated:
+                    continue
+                try:
+                    with transaction.atomic():
+                        TrendingSnapshot.objects.create(topic=topic, bucket=when, count=amount)
+                except IntegrityError:
+                    TrendingSnapshot.objects.filter(topic=topic, bucket=when).update(count=F('count') + amount)
+            TrendingSnapshot.objects.filter(bucket__lt=cutoff).delete()
+
+    def _reload(self) -> None:
+        landmark = time.time()
+        cutoff = datetime.fromtimestamp(landmark - self.window, tz=dt_timezone.utc)
+        scores = defaultdict(float)
+        rows = TrendingSnapshot.objects.filter(bucket__gte=cutoff).values_list('topic', 'bucket', 'count')
+        for topic, bucket, count in rows.iterator(chunk_size=5000):
+            scores[topic] += count * 2 ** ((bucket.timestamp() - landmark) / self.half_life)
+
+        with self._lock:
+            self._landmark = landmark
+            # Events recorded while the snapshot was being written are not in the rows yet
+            for (topic, bucket), amount in self._pending.items():
+                scores[topic] += amount * self._decay(bucket)
+            self._scores = scores
+            self._loaded = True
+
+    def _start(self) -> None:
+        self._thread = threading.Thread(target=self._run, name="trending-snapshot", daemon=True)
+        self._thread.start()
+        atexit.register(self.stop)
+
+    def _run(self) -> None:
+        while not self._stopped.wait(self.snapshot_interval):
+            try:
+                self.snapshot()
+            except Exception:
+                logger.exception("Trending snapshot thread error")
+            finally:
+                close_old_connections()
+
+    def stop(self) -> None:
+        """Stop the snapshot thread and persist whatever is still pending."""
+        self._stopped.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=self.snapshot_interval)
+        self.snapshot()
+
+trending_topics = TrendingTopics(
+    weights=getattr(settings, 'TRENDING_WEIGHTS', None),
+    bucket_seconds=getattr(settings, 'TRENDING_BUCKET_SECONDS', 3600),
+    window=getattr(settings, 'TRENDING_WINDOW', 24 * 3600),
+    half_life=getattr(settings, 'TRENDING_HALF_LIFE', 6 * 3600),
+    snapshot_interval=getattr(settings, 'TRENDING_SNAPSHOT_INTERVAL', 60.0),
+)
@@ -30,6 +30,10 @@ urlpatterns = [
     path('posts/<slug:slug>/comments/<int:comment_id>/reply/<int:reply_id>/like/', views.CommentView.as_view(), name='like-reply'),
     path('posts/<slug:slug>/comments/<int:comment_id>/reply/<int:reply_id>/dislike/', views.CommentView.as_view(), name='dislike-reply'),
     path('posts/<slug:slug>/comments/<int:comment_id>/reply/<int:reply_id>/report/', views.CommentView.as_view(), name='report-reply'),
+    path('posts/<int:post_id>/threads/', views.CommentView.as_view(), name='comment-threads'),
+    path('comments/<int:comment_id>/thread/', views.CommentView.as_view(), name='comment-thread'),
+    # Editing only: the view's delete() removes the whole post
+    path('posts/<int:post_id>/edit/', views.CollaborativeEditView.as_view(http_method_names=['get', 'post', 'patch']), name='collaborative-edit'),
     path('posts/<slug:slug>/collaborators/', views.CollaborationResponseView.as_view(), name='collaborator-list'),
     path('posts/<slug:slug>/collaborators/create/', views.CollaborativeEditView.as_view(), name='create-collaborator'),
     path('posts/<slug:slug>/collaborators/<int:collaborator_id>/', views.CollaborationResponseView.as_view(), name='collaborator-detail'),
@@ -46,6 +50,8 @@ urlpatterns = [
     path('polls/<int:poll_id>/vote/', views.PollView.as_view(), name='vote-poll'),
     path('quiz/create/', views.QuizView.as_view(), name='create-quiz'),
     path('quiz/<int:quiz_id>/submit/', views.QuizView.as_view(), name='submit-quiz'),
+    path('search/', views.SearchView.as_view(), name='search'),
+    path('recommendations/', views.RecommendationView.as_view(), name='recommendations'),
     path('<slug:slug>/', views.PostView.as_view(), name='post_detail'),
     path('create/', views.PostView.as_view(), name='create_post'),
     path('edit/<slug:slug>/', views.PostView.as_view(), name='edit_post'),
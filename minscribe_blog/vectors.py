@@ -0,0 +1,108 @@
+from collections import Counter
+from django.conf import settings
+from typing import Iterable, Mapping, Optional, Tuple
+from .models import CognitiveProfile
+from .search import tokenize
+import hashlib
+import numpy as np
+
+# Posts and reader interests share one hashed term space: every term lands in
+# a fixed bucket with a fixed sign, so vectors need no shared vocabulary and
+# can be built one object at a time
+VECTOR_DIM = getattr(settings, 'INTEREST_VECTOR_DIM', 256)
+# Bump whenever the way vectors are derived changes; packed profile vectors
+# with another version are re-derived from their JSON
+VECTOR_VERSION = 1
+POST_BODY_TERMS = 8
+
+def _bucket(term: str, dim: int) -> Tuple[int, float]:
+    digest = int.from_bytes(hashlib.blake2b(term.encode('utf-8'), digest_size=8).digest(), 'little')
+    return digest % dim, 1.0 if digest >> 63 else -1.0
+
+def term_vector(weights: Mapping[str, float], dim: int = VECTOR_DIM) -> np.ndarray:
+    """Unit-length float32 vector of weighted terms (zero when there are none)."""
+    vector = np.zeros(dim, dtype=np.float32)
+    for term, weight in weights.items():
+        for token in tokenize(term):
+            index, sign = _bucket(token, dim)
+            vector[index] += sign * weight
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm > 0 else vector
+
+def keyword_weights(keywords: Iterable[str]) -> dict:
+    """Ranked keywords weighted down by rank, the first counting most."""
+    return {keyword: 1 / (1 + rank * 0.25) for rank, keyword in enumerate(keywords)}
+
+def post_vector(title: str, ai_keywords: str, markdown_content: str = '', dim: int = VECTOR_DIM) -> np.ndarray:
+    keywords = [keyword.strip() for keyword in (ai_keywords or '').split(',') if keyword.strip()]
+    if not keywords and markdown_content:
+        # Not enriched yet: stand in the body's most frequent terms
+        counts = Counter(tokenize(markdown_content))
+        keywords = [term for term, _ in sorted(counts.items(), key=lambda item: (-item[1], item[0]))[:POST_BODY_TERMS]]
+    weights = keyword_weights(keywords)
+    # Title terms always count, so posts without keywords still get a vector
+    for token in tokenize(title):
+        weights[token] = weights.get(token, 0) + 0.5
+    return term_vector(weights, dim)
+
+def interest_vector(interests, dim: int = VECTOR_DIM) -> np.ndarray:
+    """
+    Vector for CognitiveProfile.interest_vectors, which may hold a dense list
+    of `dim` numbers, a {term: weight} mapping or a list of interest terms.
+    """
+    if isinstance(interests, Mapping):
+        weights = {}
+        for term, weight in interests.items():
+            try:
+                weights[str(term)] = float(weight)
+            except (TypeError, ValueError):
+                continue
+        return term_vector(weights, dim)
+    if isinstance(interests, (list, tuple)) and interests:
+        if all(isinstance(value, (int, float)) and not isinstance(value, bool) for value in interests):
+            if len(interests) != dim:
+                return np.zeros(dim, dtype=np.float32)
+            vector = np.asarray(interests, dtype=np.float32)
+            norm = np.linalg.norm(vector)
+            return vector / norm if norm > 0 else vector
+        return term_vector(keyword_weights(str(term) for term in interests), dim)
+    if isinstance(interests, str):
+        return term_vector(keyword_weights(term.strip() for term in interests.split(',')), dim)
+    return np.zeros(dim, dtype=np.float32)
+
+def load_interest_vectors(user_ids: Optional[Iterable[int]] = None, dim: int = VECTOR_DIM) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    (user ids, interest matrix) of every reader with interests, the latest
+    profile of a user winning. Packed vectors come from one query and are
+    concatenated into a single buffer read with frombuffer; only profiles
+    packed under another version or dimension are re-derived from JSON.
+    """
+    profiles = CognitiveProfile.objects.order_by('user_id', 'cognitive_profile_id')
+    if user_ids is not None:
+        profiles = profiles.filter(user_id__in=list(user_ids))
+
+    latest = {}
+    rows = profiles.values_list('user_id', 'cognitive_profile_id', 'interest_blob', 'interest_dim', 'interest_version')
+    for user_id, profile_id, blob, blob_dim, version in rows.iterator(chunk_size=5000):
+        latest[user_id] = (profile_id, blob, blob_dim == dim and version == VECTOR_VERSION)
+
+    ids = [user_id for user_id, (_, _, current) in latest.items() if current]
+    matrix = np.frombuffer(b''.join(bytes(latest[user_id][1]) for user_id in ids), dtype='<f4').reshape(len(ids), dim)
+
+    stale = {profile_id: user_id for user_id, (profile_id, _, current) in latest.items() if not current}
+    if stale:
+        profile_ids = list(stale)
+        vectors = []
+        for start in range(0, len(profile_ids), 500):
+            chunk = CognitiveProfile.objects.filter(pk__in=profile_ids[start:start + 500]).values_list('pk', 'interest_vectors')
+            for profile_id, interests in chunk:
+                ids.append(stale[profile_id])
+                vectors.append(interest_vector(interests, dim))
+        matrix = np.vstack([matrix, np.asarray(vectors, dtype=np.float32).reshape(-1, dim)])
+
+    ids = np.asarray(ids, dtype=np.int64)
+    # Profiles without any usable interest have all-zero vectors
+    keep = matrix.any(axis=1)
+    if not keep.all():
+        ids, matrix = ids[keep], matrix[keep]
+    return ids, matrix
@@ -0,0 +1,265 @@
+from difflib import SequenceMatcher
+from django.conf import settings
+from django.db import transaction
+from django.db.models import OuterRef, Subquery
+from typing import List, Optional, Tuple
+from .exceptions import EditConflict
+from .models import Post, User, VersionHistory
+
+def diff(old: str, new: str) -> list:
+    """
+    Line-based delta turning `old` into `new`.
+
+    The delta is a compact JSON-serializable list of operations:
+    ['=', n] keeps n lines, ['-', n] drops n lines and ['+', [lines]] inserts.
+    """
+    old_lines = old.splitlines(keepends=True)
+    new_lines = new.splitlines(keepends=True)
+    ops = []
+    for tag, i1, i2, j1, j2 in SequenceMatcher(None, old_lines, new_lines, autojunk=False).get_opcodes():
+        if tag == 'equal':
+            ops.append(['=', i2 - i1])
+            continue
+        if i2 > i1:
+            ops.append(['-', i2 - i1])
+        if j2 > j1:
+            ops.append(['+', new_lines[j1:j2]])
+    return ops
+
+def validate_delta(ops) -> list:
+    """Check that client-supplied `ops` are a well-formed diff() delta; raises ValueError otherwise."""
+    if not isinstance(ops, list):
+        raise ValueError("A delta is a list of operations")
+    for operation in ops:
+        if not isinstance(operation, list) or len(operation) != 2:
+            raise ValueError("Each delta operation is an [op, value] pair")
+        op, value = operation
+        if op in ('=', '-'):
+            if not isinstance(value, int) or isinstance(value, bool) or value < 0:
+                raise ValueError(f"'{op}' takes a line count")
+        elif op == '+':
+            if not isinstance(value, list) or not all(isinstance(line, str) for line in value):
+                raise ValueError("'+' takes a list of lines")
+        else:
+            raise ValueError(f"Unknown delta operation: {op}")
+    return ops
+
+def apply_delta(old: str, ops: list) -> str:
+    """Apply a delta produced by diff() to `old`."""
+    old_lines = old.splitlines(keepends=True)
+    result = []
+    position = 0
+    for op, value in ops:
+        if op == '=':
+            result.extend(old_lines[position:position + value])
+            position += value
+        elif op == '-':
+            position += value
+        elif op == '+':
+            result.extend(value)
+        else:
+            raise ValueError(f"Unknown delta operation: {op}")
+    if position != len(old_lines):
+        raise ValueError("Delta does not match the base text")
+    return ''.join(result)
+
+def _hunks(ops: list) -> Tuple[list, int]:
+    """Changed ranges of a delta as (start, end, inserted lines), plus the base length."""
+    hunks = []
+    position = 0
+    for op, value in ops:
+        if op == '=':
+            position += value
+        elif op == '-':
+            hunks.append([position, position + value, []])
+            position += value
+        elif op == '+':
+            if hunks and hunks[-1][1] == position and not hunks[-1][2]:
+                hunks[-1][2] = list(value)
+            else:
+                hunks.append([position, position, list(value)])
+        else:
+            raise ValueError(f"Unknown delta operation: {op}")
+    return hunks, position
+
+def rebase(ops: list, onto: list) -> list:
+    """
+    Rewrite `ops` to apply after `onto`, both being deltas against the same text.
+
+    This works when the two deltas change different lines; overlapping
+    changes, or insertions at the same point, raise ValueError.
+    """
+    hunks, length = _hunks(ops)
+    other_hunks, other_length = _hunks(onto)
+    if length != other_length:
+        raise ValueError("Deltas are not against the same text")
+
+    rebased = []
+    for start, end, lines in hunks:
+        shift = 0
+        for other_start, other_end, other_lines in other_hunks:
+            if start < other_end and other_start < end or start == other_start:
+                raise ValueError("Deltas change the same lines")
+            if other_end <= start:
+                shift += len(other_lines) - (other_end - other_start)
+        rebased.append((start + shift, end + shift, lines))
+    new_length = length + sum(len(lines) - (end - start) for start, end, lines in other_hunks)
+
+    result = []
+    position = 0
+    for start, end, lines in rebased:
+        if start > position:
+            result.append(['=', start - position])
+        if end > start:
+            result.append(['-', end - start])
+        if lines:
+            result.append(['+', lines])
+        position = end
+    if new_length > position:
+        result.append(['=', new_length - position])
+    return result
+
+class VersionStore:
+    """
+    Post versions stored as deltas against periodic full snapshots.
+
+    Every `snapshot_interval`-th version (and the first) keeps the full text;
+    the rest keep a diff against the version before them. Rebuilding any
+    version reads at most `snapshot_interval` rows in a single query.
+    """
+
+    def __init__(self, snapshot_interval: int = 20) -> None:
+        self.snapshot_interval = snapshot_interval
+
+    def latest_number(self, post_id: int) -> int:
+        latest = (
+            VersionHistory.objects
+            .filter(post_id=post_id)
+            .order_by('-version_number')
+            .values_list('version_number', flat=True)
+            .first()
+        )
+        return latest or 0
+
+    def content_at(self, post_id: int, version_number: int) -> str:
+        """Rebuild the full text of one version."""
+        nearest_snapshot = (
+            VersionHistory.objects
+            .filter(post_id=OuterRef('post_id'), is_snapshot=True, version_number__lte=version_number)
+            .order_by('-version_number')
+            .values('version_number')[:1]
+        )
+        rows = list(
+            VersionHistory.objects
+            .filter(post_id=post_id, version_number__lte=version_number, version_number__gte=Subquery(nearest_snapshot))
+            .order_by('version_number')
+            .values_list('version_number', 'is_snapshot', 'content', 'delta')
+        )
+        if not rows or rows[-1][0] != version_number:
+            raise VersionHistory.DoesNotExist(f"Post {post_id} has no version {version_number}")
+
+        text = rows[0][2]
+        for _, _, _, delta in rows[1:]:
+            text = apply_delta(text, delta)
+        return text
+
+    def delta_between(self, post_id: int, from_version: int, to_version: int) -> list:
+        """Delta turning one stored version into another."""
+        return diff(self.content_at(post_id, from_version), self.content_at(post_id, to_version))
+
+    @transaction.atomic
+    def record(self, post: Post, user: User, content: str, reason: str = '', delta: Optional[list] = None) -> VersionHistory:
+        """
+        Store `content` as the next version of `post`.
+
+        `delta` may be passed when the caller already holds the diff from the
+        latest version, which saves rebuilding that version.
+        """
+        # Lock the post so concurrent editors get consecutive version numbers
+        Post.objects.select_for_update().filter(pk=post.pk).exists()
+
+        number = self.latest_number(post.pk) + 1
+        version = VersionHistory(post=post, user=user, reason=reason, version_number=number)
+        if number == 1 or number % self.snapshot_interval == 0:
+            version.is_snapshot = True
+            version.content = content
+        else:
+            version.is_snapshot = False
+            version.content = ''
+            version.delta = delta if delta is not None else diff(self.content_at(post.pk, number - 1), content)
+        version.save()
+        return version
+
+    @transaction.atomic
+    def current(self, post: Post, user: User) -> Tuple[int, str]:
+        """
+        Latest version number and text of a post.
+
+        A post edited before it had any history gets its current content
+        recorded as version 1, so patches always have a base to refer to.
+        Post.content stays authoritative: when a form or admin save changed
+        it without recording a version, it is recorded now (under the
+        author) so patches against older versions conflict instead of
+        overwriting that edit.
+        """
+        number = self.latest_number(post.pk)
+        if not number:
+            return self.record(post, user, post.content, reason='Initial version').version_number, post.content
+
+        text = self.content_at(post.pk, number)
+        if text != post.content:
+            version = self.record(post, post.author_id, post.content, reason='Edited outside collaborative editing', delta=diff(text, post.content))
+            return version.version_number, post.content
+        return number, text
+
+    @transaction.atomic
+    def apply_patch(self, post_id: int, user: User, base_version: int, ops: list, reason: str = '') -> Tuple[Post, VersionHistory]:
+        """
+        Apply a delta made against `base_version` and store it as a new version.
+
+        Raises EditConflict when another edit has landed since `base_version`,
+        carrying the delta from the editor's base to the current text so the
+        client can rebase, and ValueError when the delta does not fit the base.
+        """
+        post = Post.objects.select_for_update().get(pk=post_id)
+        latest, text = self.current(post, user)
+        if base_version != latest:
+            server_patch = self.delta_between(post_id, base_version, latest) if 0 < base_version < latest else None
+            raise EditConflict(
+                f"Version {base_version} is stale; the post is at version {latest}",
+                current_version=latest,
+                server_patch=server_patch
+            )
+
+        content = apply_delta(text, ops)
+        version = self.record(post, user, content, reason=reason, delta=ops)
+
+        # Only the body columns are written; Post.save re-renders them
+        post.content = content
+        post.save(update_fields=['content', 'last_edited'])
+        return post, version
+
+    def history(self, post_id: int, limit: Optional[int] = None) -> List[VersionHistory]:
+        """Version metadata, newest first, without the stored text."""
+        qs = VersionHistory.objects.filter(post_id=post_id).defer('content', 'delta').order_by('-version_number')
+        return list(qs[:limit] if limit else qs)
+
+    def compact(self, post_id: int) -> int:
+        """Rewrite full-text versions between snapshot points as deltas."""
+        versions = list(VersionHistory.objects.filter(post_id=post_id).order_by('version_number'))
+        changed = []
+        previous_text = None
+        for version in versions:
+            text = version.content if version.is_snapshot else apply_delta(previous_text, version.delta)
+            keep_snapshot = previous_text is None or version.version_number % self.snapshot_interval == 0
+            if version.is_snapshot and not keep_snapshot:
+                version.is_snapshot = False
+                version.delta = diff(previous_text, text)
+                version.content = ''
+                changed.append(version)
+            previous_text = text
+
+        VersionHistory.objects.bulk_update(changed, ['is_snapshot', 'delta', 'content'], batch_size=500)
+        return len(changed)
+
+version_store = VersionStore(snapshot_interval=getattr(settings, 'VERSION_SNAPSHOT_INTERVAL', 20))
@@ -9,13 +9,25 @@ from django.utils import timezone
 from django.http import JsonResponse
 from django.core.exceptions import PermissionDenied
 from django.db import transaction, models
-from .models import Post, Poll, PollChoice, Quiz, QuizQuestion, User, CollaborationInvite, CollaborationHistory, Collaboration, Comments
+from django.db.models import Q
+from .models import Post, Poll, PollChoice, Quiz, QuizQuestion, User, CollaborationInvite, CollaborationHistory, Collaboration, Comments, Recommendation
 from .forms import PostForm, UserForm, UserUpdateForm, CollaborationInviteForm
 from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib import messages
 from rest_framework.views import APIView
-from .serializers import UserSerializer, CommentSerializer, AuthorProfileSerializer, UserRegistrationSerializer
-from .exceptions import QuizSubmissionError
+from .serializers import UserSerializer, CommentSerializer, CommentThreadSerializer, AuthorProfileSerializer, AuthorPostSerializer, UserRegistrationSerializer
+from .exceptions import QuizSubmissionError, EditConflict
+from .accounts import blog_user
+from .cache import post_render_cache
+from .pagination import KeysetPagination
+from .search import search_index
+from .counters import view_counter, post_counters, poll_votes
+from .threads import load_subtree, load_threads
+from .versioning import validate_delta, version_store
+from .roles import collaboration_roles
+from .recommendations import RecommendationEngine
+from .ann import post_ann_index
+from .trending import trending_topics
 from rest_framework import status, viewsets
 from rest_framework.decorators import api_view, permission_classes, action
 from rest_framework.permissions import AllowAny, IsAuthenticated
@@ -136,15 +148,37 @@ class ProfileViewSet(viewsets.ViewSet):
     
     @action(detail=True, methods=['get'])
     def author_profile(self, request, pk=None):
-        user = get_object_or_404(User, pk=pk)
+        user = get_object_or_404(User.objects.select_related('stats'), pk=pk)
         
-        # Checks if user is an author (has posts)
-        if Post.objects.filter(user=user).exists():
-            serializer = AuthorProfileSerializer(user)
-            return Response(serializer.data, status=status.HTTP_200_OK)
+        # Checks if user is an author (has posts); the stats row came with the user
+        stats = getattr(user, 'stats', None)
+        if stats is not None and stats.post_count > 0:
+            data = AuthorProfileSerializer(user).data
+            
+            # Posts come as a trimmed, cursor-paginated list rather than every full post
+            paginator = KeysetPagination(ordering=('publication_date', 'post_id'))
+            posts = paginator.paginate_queryset(
+                Post.objects.filter(author_id=user).only(*AuthorPostSerializer.Meta.fields),
+                request,
+                view=self
+            )
+            data['posts'] = AuthorPostSerializer(posts, many=True).data
+            data['next_cursor'] = paginator.next_cursor
+            return Response(data, status=status.HTTP_200_OK)
         else:
             return Response({'message': 'User is not an author.'}, status=status.HTTP_404_NOT_FOUND)
     
+    @action(detail=False, methods=['get'])
+    def authors(self, request):
+        # One query per page however many authors it holds
+        paginator = KeysetPagination(ordering=('registration_date', 'user_id'))
+        authors = paginator.paginate_queryset(
+            User.objects.filter(stats__post_count__gt=0).select_related('stats'),
+            request,
+            view=self
+        )
+        return paginator.get_paginated_response(AuthorProfileSerializer(authors, many=True).data)
+    
     @action(detail=True, methods=['get'])    
     def reader_profile(self, pk=None):
         user = get_object_or_404(User, pk=pk)
@@ -167,17 +201,19 @@ class ProfileViewSet(viewsets.ViewSet):
 class PostView(APIView):
     permission_classes = [IsAuthenticated]
     def get_queryset(self, user=None):
-        qs = Post.objects.all().published()
+        # A single OR condition instead of a union, so no DISTINCT is needed
+        visible = Q(status='published')
         if user and user.is_authenticated:
-            user_posts = Post.objects.filter(user=user)
-            qs = (qs | user_posts).distinct()
-        return qs
+            visible |= Q(author_id=user)
+        return Post.objects.filter(visible)
     
     def post_list_view(self, request):
         try:
-            posts = self.get_queryset(user=request.user)
+            paginator = KeysetPagination(ordering=('publication_date', 'post_id'))
+            posts = paginator.paginate_queryset(self.get_queryset(user=request.user), request, view=self)
             context = {
                 'object_list': posts,
+                'next_cursor': paginator.next_cursor,
                 'title': 'Blog Posts'
             }
             return render(request, 'blog/post_list.html', context)
@@ -198,9 +234,21 @@ class PostView(APIView):
                 if not request.user.is_authenticated or post.user != request.user:
                     raise PermissionError("You do not have permission to view this post.")
             
+            # The article only depends on the post, so it is rendered without
+            # the request and shared by every reader until the next edit
+            def render_article():
+                return render_to_string('blog/post_article.html', {'object': post})
+            article = post_render_cache.get_or_render(post, render_article)
+            view_counter.incr(post.post_id)
+            trending_topics.record(post.post_id, 'view')
+
+            # Related posts change with the ANN index and with other posts, not
+            # with this one, so they are looked up per request outside the cache
             context = {
                 'object': post,
-                'title': post.title
+                'title': post.title,
+                'article': article,
+                'related_posts': post_ann_index.related_posts(post)
             }
             return render(request, 'blog/post_detail.html', context)
         except Exception as e:
@@ -280,6 +328,78 @@ class PostView(APIView):
             messages.error(request, f"An error occurred deleting post: {str(e)}")
             return redirect('blog:post_list')
 
+# Protected view
+class SearchView(APIView):
+    permission_classes = [IsAuthenticated]
+    max_limit = 50
+    
+    def get(self, request):
+        query = request.query_params.get('q', '').strip()
+        doc_type = request.query_params.get('type') or None
+        if not query:
+            return Response({'error': 'Search query is required.'}, status=status.HTTP_400_BAD_REQUEST)
+        if doc_type not in (None, 'post', 'comment'):
+            return Response({'error': 'Type must be post or comment.'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        try:
+            limit = min(int(request.query_params.get('limit', 20)), self.max_limit)
+        except ValueError:
+            return Response({'error': 'Limit must be a number.'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        hits = search_index.search(query, doc_type=doc_type, limit=limit)
+        
+        # Load the matched objects with one query per type; hidden posts are dropped
+        post_ids = [object_id for kind, object_id, _ in hits if kind == 'post']
+        comment_ids = [object_id for kind, object_id, _ in hits if kind == 'comment']
+        posts = Post.objects.filter(post_id__in=post_ids, status='published').only('post_id', 'title', 'ai_summary').in_bulk()
+        comments = Comments.objects.filter(comment_id__in=comment_ids, post_id__status='published').only('comment_id', 'post_id', 'content').in_bulk()
+        
+        results = []
+        for kind, object_id, score in hits:
+            if kind == 'post' and object_id in posts:
+                post = posts[object_id]
+                results.append({'type': kind, 'id': object_id, 'score': round(score, 4), 'title': post.title, 'summary': post.ai_summary})
+            elif kind == 'comment' and object_id in comments:
+                comment = comments[object_id]
+                results.append({'type': kind, 'id': object_id, 'score': round(score, 4), 'post_id': comment.post_id_id, 'content': comment.content[:200]})
+        
+        return Response({'query': query, 'results': results}, status=status.HTTP_200_OK)
+
+class RecommendationView(APIView):
+    """The reader's precomputed recommendations (`manage.py recommend_posts`), best first."""
+    permission_classes = [IsAuthenticated]
+    max_limit = 50
+    
+    def get(self, request):
+        try:
+            limit = min(int(request.query_params.get('limit', 10)), self.max_limit)
+        except ValueError:
+            return Response({'error': 'Limit must be a number.'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        # Recommendations belong to blog users; an account without one has none
+        reader = blog_user(request.user)
+        if reader is None:
+            return Response({'results': []}, status=status.HTTP_200_OK)
+        
+        recommendations = (
+            Recommendation.objects
+            .filter(user_id=reader.pk, algorithm_used=RecommendationEngine.ALGORITHM, post_id__status='published')
+            .select_related('post_id')
+            .only('score', 'recommendation_reason', 'post_id__post_id', 'post_id__title', 'post_id__ai_summary')
+            .order_by('-score')[:limit]
+        )
+        results = [
+            {
+                'id': recommendation.post_id.post_id,
+                'title': recommendation.post_id.title,
+                'summary': recommendation.post_id.ai_summary,
+                'score': round(recommendation.score, 4),
+                'reason': recommendation.recommendation_reason,
+            }
+            for recommendation in recommendations
+        ]
+        return Response({'results': results}, status=status.HTTP_200_OK)
+
 # Protected View
 class CommentView(APIView):
     permission_classes = [IsAuthenticated]
@@ -291,10 +411,15 @@ class CommentView(APIView):
             if not comment_text:
                 return Response({'error': 'Comment text is required.'}, status=status.HTTP_400_BAD_REQUEST)
 
+            # Replies name the comment they answer; it must belong to the same post
+            parent = None
+            parent_id = request.data.get('parent_id')
+            if parent_id:
+                parent = get_object_or_404(Comments, pk=parent_id, post_id=post)
+
             # Create a new comment
-            comment = Comments.objects.create(post=post, user=request.user, text=comment_text)
-            comment.save()
-            return Response({'message': 'Comment added successfully.'}, status=status.HTTP_201_CREATED)
+            comment = Comments.objects.create(post_id=post, author_id=request.user, content=comment_text, parent=parent)
+            return Response({'message': 'Comment added successfully.', 'comment_id': comment.comment_id}, status=status.HTTP_201_CREATED)
         except Exception as e:
             return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
         
@@ -366,15 +491,37 @@ class CommentView(APIView):
         except Exception as e:
             return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
     
+    def get(self, request, post_id=None, comment_id=None):
+        # A comment id reads that comment's thread; a post id pages its threads
+        if comment_id is not None:
+            return self.get_thread(request, comment_id)
+        return self.get_comments(request, post_id)
+    
     def get_comments(self, request, post_id):
             try:
                 post = get_object_or_404(Post, pk=post_id)
-                comments = Comments.objects.filter(post=post).order_by('-created_at')
-                serializer = CommentSerializer(comments, many=True)
-                return Response(serializer.data, status=status.HTTP_200_OK)
+                
+                # Pages are made of top-level threads; each page's replies load in one query
+                paginator = KeysetPagination(ordering=('publication_date', 'comment_id'))
+                roots = paginator.paginate_queryset(Comments.objects.filter(post_id=post, depth=0), request, view=self)
+                threads = load_threads(roots, max_depth=self._max_depth(request))
+                serializer = CommentThreadSerializer(threads, many=True)
+                return paginator.get_paginated_response(serializer.data)
             except Exception as e:
                 return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
             
+    def get_thread(self, request, comment_id):
+        try:
+            comment = get_object_or_404(Comments, pk=comment_id)
+            thread = load_subtree(comment, max_depth=self._max_depth(request))
+            return Response(CommentThreadSerializer(thread).data, status=status.HTTP_200_OK)
+        except Exception as e:
+            return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        
+    def _max_depth(self, request):
+        depth = request.query_params.get('depth')
+        return int(depth) if depth and depth.isdigit() else None
+            
 # Protected view
 class PollView(APIView):
     permission_classes = [IsAuthenticated]
@@ -473,9 +620,8 @@ class PollView(APIView):
                     'message': 'Invalid Choice'
                 }, status=status.HTTP_400_BAD_REQUEST)
                 
-            # Record vote
-            selected_choice.votes += 1
-            selected_choice.save()
+            # Record vote on one shard of the choice's counter
+            poll_votes.vote(selected_choice.choice_id)
             
             return JsonResponse({
                 'status': 'success',
@@ -656,10 +802,10 @@ class QuizSubmissionView(APIView):
                         
 class CollaborationInviteView(LoginRequiredMixin, View):
     def post(self, request, post_id):
-        post = get_object_or_404(Post, id=post_id)
-        
+        post, role = collaboration_roles.resolve(request, post_id)
+
         # Check if user has permission to invite collaborators
-        if not (request.user == post.author_id or Collaboration.objects.filter(post=post, user=request.user, role__in=['editor', 'contributor']).exists()):
+        if not (post.author_id_id == request.user.pk or collaboration_roles.can_edit(role)):
             raise PermissionDenied("You do not have permission to invite collaborators.")
         
         if request.method == 'POST':
@@ -728,83 +874,126 @@ class CollaborationResponseView(LoginRequiredMixin, View):
         collaborations = Collaboration.objects.filter(user=request.user)
         return render(request, 'blog/collaborations_all.html', {'collaborations': collaborations})
 
-class CollaborativeEditView(LoginRequiredMixin, View):
+# Protected view: JWT authenticated, like the other JSON endpoints
+class CollaborativeEditView(APIView):
+    permission_classes = [IsAuthenticated]
+
     def post(self, request, post_id):
-        post = get_object_or_404(Post, id=post_id)
-        collaboration = get_object_or_404(Collaboration, post=post, user=request.user)
+        post, role = collaboration_roles.require(request, post_id)
         
-        if collaboration.role in ['editor', 'contributor']:
-            content = request.POST.get('content')
-            
-            # Save version history
-            post.version_history.append({
-                'user': request.user.username,
-                'timestamp': timezone.now().isoformat(),
-                'content': content,
-                'role': collaboration.role
-            })
-            
-            post.content = content
-            post.save()
+        if collaboration_roles.can_edit(role):
+            content = request.data.get('content')
+            if content is None:
+                return JsonResponse({'status': 'error', 'message': 'content is required'}, status=400)
+            editor = blog_user(request.user)
+            
+            with transaction.atomic():
+                # A post without history first gets its pre-edit text recorded,
+                # so this edit can be reverted like any later one
+                version_store.current(post, editor)
+                # Save version history as a delta against the previous version
+                version = version_store.record(
+                    post,
+                    editor,
+                    content,
+                    reason=f"Collaborative edit ({role})"
+                )
+                
+                post.content = content
+                post.save()
             
             CollaborationHistory.objects.create(
                 post=post,
-                user=request.user,
+                user=editor,
                 action='edited_content',
-                details={'version': len(post.version_history)}
+                details={'version': version.version_number}
             )
             
             return JsonResponse({'status': 'success'})
         return JsonResponse({'status': 'error', 'message': 'Insufficient permissions'})
     
+    def get(self, request, post_id):
+        """Current version number and text, the base for subsequent patches."""
+        post, _ = collaboration_roles.require(request, post_id)
+
+        version_number, content = version_store.current(post, blog_user(request.user))
+        return JsonResponse({'version': version_number, 'content': content})
+
+    def patch(self, request, post_id):
+        """
+        Apply a line delta ({'base_version': n, 'patch': [...]}) to the post.
+
+        The patch uses the versioning.diff() format, so the request body and
+        the stored version both scale with the edit rather than the post.
+        """
+        post, role = collaboration_roles.require(request, post_id)
+
+        if not collaboration_roles.can_edit(role):
+            return JsonResponse({'status': 'error', 'message': 'Insufficient permissions'}, status=403)
+
+        try:
+            base_version = int(request.data['base_version'])
+            ops = validate_delta(request.data['patch'])
+        except (ValueError, TypeError, KeyError):
+            return JsonResponse({'status': 'error', 'message': 'base_version and a patch in the diff format are required'}, status=400)
+        editor = blog_user(request.user)
+
+        try:
+            post, version = version_store.apply_patch(
+                post.post_id,
+                editor,
+                base_version,
+                ops,
+                reason=f"Collaborative edit ({role})"
+            )
+        except EditConflict as e:
+            return JsonResponse({
+                'status': 'conflict',
+                'message': e.message,
+                'version': e.current_version,
+                'server_patch': e.server_patch,
+            }, status=e.status_code)
+        except ValueError:
+            return JsonResponse({'status': 'error', 'message': 'Patch does not apply to the base version'}, status=400)
+
+        CollaborationHistory.objects.create(
+            post=post,
+            user=editor,
+            action='edited_content',
+            details={'version': version.version_number}
+        )
+
+        return JsonResponse({'status': 'success', 'version': version.version_number})
+    
     def delete(self, request, post_id):
-        post = get_object_or_404(Post, id=post_id)
-        collaboration = get_object_or_404(Collaboration, post=post, user=request.user)
+        post, role = collaboration_roles.require(request, post_id)
 
-        if collaboration.role in ['editor', 'contributor']:
+        if collaboration_roles.can_edit(role):
             post.delete()
             return JsonResponse({'status': 'success'})
         return JsonResponse({'status': 'error', 'message': 'Insufficient permissions'})
     
     def like(self, request, post_id):
-        post = get_object_or_404(Post, id=post_id)
-        collaboration = get_object_or_404(Collaboration, post=post, user=request.user)
-
-        if collaboration.role in ['editor', 'contributor']:
-            post.likes += 1
-            post.save()
-
-            CollaborationHistory.objects.create(
-                post=post,
-                user=request.user,
-                action='liked_post'
-            )
+        post, role = collaboration_roles.require(request, post_id)
 
+        if collaboration_roles.can_edit(role):
+            post_counters.like(post.post_id)
+            trending_topics.record(post.post_id, 'like')
             return JsonResponse({'status': 'success'})
         return JsonResponse({'status': 'error', 'message': 'Insufficient permissions'})
     
     def dislike(self, request, post_id):
-        post = get_object_or_404(Post, id=post_id)
-        collaboration = get_object_or_404(Collaboration, post=post, user=request.user)
+        post, role = collaboration_roles.require(request, post_id)
         
-        if collaboration.role in ['editor', 'contributor']:
-            post.dislikes += 1
-            post.save()
-
-            CollaborationHistory.objects.create(
-                post=post,
-                user=request.user,
-                action='disliked_post'
-            )
-
+        if collaboration_roles.can_edit(role):
+            post_counters.dislike(post.post_id)
             return JsonResponse({'status': 'success'})
         return JsonResponse({'status': 'error', 'message': 'Insufficient permissions'})
     
     def report(self, request, post_id):
-        post = get_object_or_404(Post, id=post_id)
-        collaboration = get_object_or_404(Collaboration, post=post, user=request.user)
+        post, role = collaboration_roles.require(request, post_id)
         
-        if collaboration.role in ['editor', 'contributor']:
+        if collaboration_roles.can_edit(role):
             report_reason = request.POST.get('reason')
             post.reported = True
             post.report_reason = report_reason